@@ -0,0 +1,76 @@
+import hashlib
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.orm import Session
+from .models import ArticleHistory, ContentBlob
+from ..utils.settings import get_setting
+
+# Bodies smaller than this stay inline; compression and the extra lookup don't pay off
+BLOB_MIN_BYTES = get_setting("history", "blob_min_bytes", default=512)
+COMPRESSION_LEVEL = 6
+
+ID_CHUNK = 500
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def compress(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+def decompress(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+def save_blobs(db: Session, blobs: Dict[str, Tuple[bytes, int]]) -> int:
+    """Insert (compressed data, size) by hash; bodies already stored are left as they are. Returns the bytes added"""
+    hashes, added = list(blobs), 0
+    for start in range(0, len(hashes), ID_CHUNK):
+        chunk = hashes[start:start + ID_CHUNK]
+        stored = set(db.execute(select(ContentBlob.hash).where(ContentBlob.hash.in_(chunk))).scalars())
+        rows = [{"hash": h, "data": blobs[h][0], "size": blobs[h][1]} for h in chunk if h not in stored]
+        if rows:
+            # OR IGNORE: another writer may have stored the same body meanwhile
+            db.execute(insert(ContentBlob).prefix_with("OR IGNORE"), rows)
+            added += sum(len(row["data"]) for row in rows)
+    return added
+
+def load_blobs(db: Session, hashes: Iterable[str]) -> Dict[str, str]:
+    """Decompressed text by hash; only called when the content is actually needed"""
+    hashes = list(dict.fromkeys(hashes))
+    texts = {}
+    for start in range(0, len(hashes), ID_CHUNK):
+        for blob_hash, data in db.execute(
+            select(ContentBlob.hash, ContentBlob.data).where(ContentBlob.hash.in_(hashes[start:start + ID_CHUNK]))
+        ):
+            texts[blob_hash] = decompress(data)
+    missing = set(hashes) - set(texts)
+    if missing:
+        raise LookupError(f"Content blobs missing: {sorted(missing)[:3]}")
+    return texts
+
+def article_blob_hashes(db: Session, article_ids: List[str]) -> List[str]:
+    """Blobs referenced by the given articles' history"""
+    hashes = set()
+    for start in range(0, len(article_ids), ID_CHUNK):
+        hashes.update(db.execute(select(ArticleHistory.blob_hash).where(
+            ArticleHistory.article_id.in_(article_ids[start:start + ID_CHUNK]), ArticleHistory.blob_hash.isnot(None)
+        )).scalars())
+    return list(hashes)
+
+def unreferenced_bytes(db: Session) -> int:
+    """Compressed bytes held by blobs no history row references, i.e. what collect_garbage frees"""
+    return db.execute(select(func.coalesce(func.sum(func.length(ContentBlob.data)), 0)).where(
+        ~exists().where(ArticleHistory.blob_hash == ContentBlob.hash)
+    )).scalar()
+
+def collect_garbage(db: Session, hashes: Optional[List[str]] = None) -> int:
+    """Delete blobs no history row references any more, among hashes if given, else all of them"""
+    unreferenced = ~exists().where(ArticleHistory.blob_hash == ContentBlob.hash)
+    if hashes is None:
+        return db.execute(delete(ContentBlob).where(unreferenced)).rowcount
+    deleted = 0
+    for start in range(0, len(hashes), ID_CHUNK):
+        deleted += db.execute(delete(ContentBlob).where(
+            ContentBlob.hash.in_(hashes[start:start + ID_CHUNK]), unreferenced
+        )).rowcount
+    return deleted
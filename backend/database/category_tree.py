@@ -0,0 +1,92 @@
+from typing import Optional
+from sqlalchemy import select, insert, update, delete, func, literal, true
+from sqlalchemy.orm import Session
+from .models import Category, CategoryClosure, article_category_association
+
+def subtree_ids(category_id: str):
+    """SELECT of the category and every category below it"""
+    return select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+
+def subtree_article_ids(category_id: str):
+    """SELECT of the articles filed under the category or any of its descendants: one indexed join"""
+    return select(article_category_association.c.article_id).join(
+        CategoryClosure, CategoryClosure.descendant_id == article_category_association.c.category_id
+    ).where(CategoryClosure.ancestor_id == category_id)
+
+def link_category(db: Session, category_id: str, parent_id: Optional[str]):
+    """Closure rows for a new leaf: itself at depth 0, then one per ancestor of its parent"""
+    db.execute(insert(CategoryClosure).values(ancestor_id=category_id, descendant_id=category_id, depth=0))
+    if parent_id is not None:
+        db.execute(insert(CategoryClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(CategoryClosure.ancestor_id, literal(category_id), CategoryClosure.depth + 1)
+            .where(CategoryClosure.descendant_id == parent_id)
+        ))
+
+def move_category(db: Session, category_id: str, parent_id: Optional[str]):
+    """Re-hang a category's whole subtree under parent_id (None for a root)"""
+    subtree = select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+    if parent_id is not None and db.get(Category, parent_id) is None:
+        raise ValueError("Parent category not found")
+    if parent_id is not None and db.execute(
+        select(CategoryClosure.descendant_id).where(
+            CategoryClosure.ancestor_id == category_id, CategoryClosure.descendant_id == parent_id
+        )
+    ).first():
+        raise ValueError("A category cannot be moved under itself or one of its descendants")
+    
+    # Paths from the old ancestors into the subtree
+    old_ancestors = select(CategoryClosure.ancestor_id).where(
+        CategoryClosure.descendant_id == category_id, CategoryClosure.ancestor_id != category_id
+    )
+    db.execute(delete(CategoryClosure).where(
+        CategoryClosure.descendant_id.in_(subtree), CategoryClosure.ancestor_id.in_(old_ancestors)
+    ).execution_options(synchronize_session=False))
+    
+    if parent_id is not None:
+        above = select(CategoryClosure.ancestor_id, CategoryClosure.depth).where(
+            CategoryClosure.descendant_id == parent_id
+        ).subquery()
+        below = select(CategoryClosure.descendant_id, CategoryClosure.depth).where(
+            CategoryClosure.ancestor_id == category_id
+        ).subquery()
+        db.execute(insert(CategoryClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            # Every new ancestor with every member of the subtree
+            select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+            .select_from(above).join(below, true())
+        ))
+
+def unlink_category(db: Session, category_id: str):
+    """Drop a category from the closure, its children moving up to its parent"""
+    ancestors = select(CategoryClosure.ancestor_id).where(
+        CategoryClosure.descendant_id == category_id, CategoryClosure.ancestor_id != category_id
+    )
+    descendants = select(CategoryClosure.descendant_id).where(
+        CategoryClosure.ancestor_id == category_id, CategoryClosure.descendant_id != category_id
+    )
+    # Every path that ran through the category is one level shorter
+    db.execute(update(CategoryClosure).where(
+        CategoryClosure.ancestor_id.in_(ancestors), CategoryClosure.descendant_id.in_(descendants)
+    ).values(depth=CategoryClosure.depth - 1).execution_options(synchronize_session=False))
+    db.execute(delete(CategoryClosure).where(
+        (CategoryClosure.ancestor_id == category_id) | (CategoryClosure.descendant_id == category_id)
+    ).execution_options(synchronize_session=False))
+
+def rebuild_closure(connection) -> int:
+    """Recompute the whole closure from parent_id links; returns the rows written"""
+    categories = Category.__table__
+    paths = select(
+        categories.c.id.label("ancestor_id"), categories.c.id.label("descendant_id"), literal(0).label("depth")
+    ).cte("paths", recursive=True)
+    # The depth bound stops at parent_id cycles left by older versions, which allowed them
+    limit = select(func.count()).select_from(categories).scalar_subquery()
+    paths = paths.union_all(
+        select(paths.c.ancestor_id, categories.c.id, paths.c.depth + 1)
+        .where(categories.c.parent_id == paths.c.descendant_id, paths.c.depth < limit)
+    )
+    connection.execute(delete(CategoryClosure))
+    result = connection.execute(insert(CategoryClosure).prefix_with("OR IGNORE").from_select(
+        ["ancestor_id", "descendant_id", "depth"], select(paths.c.ancestor_id, paths.c.descendant_id, paths.c.depth)
+    ))
+    return result.rowcount
@@ -1,13 +1,169 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func
-from .models import Article, Category, ArticleHistory, SearchIndex
+from sqlalchemy.orm import Session, defer, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import or_, and_, func, case, type_coerce, String, select, insert, delete, union, union_all, literal, true, false, Select
+from .models import Article, Category, ArticleHistory, SearchIndex, article_category_association
+from .category_tree import link_category, move_category, unlink_category, subtree_ids, subtree_article_ids
+from .blobs import article_blob_hashes, collect_garbage
+from .history import storage_for_new_versions, expand_history, resolve_contents, content_size, insert_history
 from ..models.article import ArticleCreate, ArticleUpdate
 from ..models.category import CategoryCreate, CategoryUpdate
-from typing import List, Optional
+from ..search import fts
+from ..search.tokenizer import unique_tokens, serialize_tokens, has_unsegmented_text
+from ..search.inverted_index import article_index
+from ..search.suggestions import title_index
+from ..search.trigram import trigram_index
+from ..search.cache import search_cache, content_generation, normalize_query
+from ..search.snippets import terms_pattern, substring_pattern, make_snippet, parse_marked_snippet
+from typing import Dict, List, Optional, Tuple, Union
 import uuid
 import json
 from datetime import datetime
 
+def cursor_key(cursor: Optional[dict]) -> Optional[str]:
+    return json.dumps(cursor, sort_keys=True) if cursor else None
+
+def cursor_after(cursor: Optional[dict], engine: str) -> Optional[tuple]:
+    if cursor is None:
+        return None
+    if cursor.get("e") != engine or "id" not in cursor:
+        raise ValueError("Cursor does not belong to this listing")
+    return (cursor.get("r"), cursor["id"])
+
+def cursor_offset(cursor: Optional[dict], engine: str, skip: int) -> int:
+    if cursor is None:
+        return skip
+    if cursor.get("e") != engine or not isinstance(cursor.get("o"), int) or cursor["o"] < 0:
+        raise ValueError("Cursor does not belong to this listing")
+    return cursor["o"]
+
+def keyset_page(rows: list, engine: str, limit: int) -> Tuple[List[str], Optional[dict]]:
+    """Trim a limit+1 fetch of (id, rank) rows to a page and the position after its last row"""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = {"e": engine, "r": rows[-1][1], "id": rows[-1][0]}
+    return [row[0] for row in rows], next_cursor
+
+def offset_page(article_ids: List[str], engine: str, offset: int, limit: int) -> Tuple[List[str], Optional[dict]]:
+    next_cursor = None
+    if len(article_ids) > limit:
+        article_ids = article_ids[:limit]
+        next_cursor = {"e": engine, "o": offset + limit}
+    return article_ids, next_cursor
+
+ARTICLE_FIELDS = ("id", "title", "content", "excerpt", "tags", "version", "created_at", "updated_at", "categories")
+
+def article_load_options(fields: Optional[List[str]] = None, load_content: bool = True) -> list:
+    """Loader options fetching only the requested fields; None means every field"""
+    if fields is None:
+        options = [selectinload(Article.categories)]
+        if not load_content:
+            options.append(defer(Article.content))
+        return options
+    
+    columns = [getattr(Article, field) for field in fields if field not in ("id", "categories")]
+    options = [load_only(Article.id, *columns)]
+    if "categories" in fields:
+        options.append(selectinload(Article.categories))
+    return options
+
+FACETS = ("categories", "tags")
+FACET_ID_CHUNK = 5000
+
+def facet_counts_statement(matches: Select, facets: List[str]):
+    """One statement counting categories and/or tags over the articles in matches.
+
+    The match set is a CTE referenced by every facet, so SQLite evaluates it once.
+    """
+    matches = matches.cte("matches")
+    match_ids = select(matches.c.id)
+    statements = []
+    
+    if "categories" in facets:
+        statements.append(
+            select(
+                literal("categories").label("facet"),
+                Category.id.label("value"),
+                Category.name.label("label"),
+                func.count().label("count")
+            ).select_from(
+                article_category_association.join(Category, Category.id == article_category_association.c.category_id)
+            ).where(
+                article_category_association.c.article_id.in_(match_ids)
+            ).group_by(Category.id, Category.name)
+        )
+    
+    if "tags" in facets:
+        # Rows with malformed tag JSON contribute no tags rather than failing the query
+        tags = func.json_each(
+            case((func.json_valid(Article.tags) == 1, Article.tags), else_=None)
+        ).table_valued("value")
+        statements.append(
+            select(
+                literal("tags").label("facet"),
+                tags.c.value.label("value"),
+                tags.c.value.label("label"),
+                func.count().label("count")
+            ).select_from(Article).join(tags, true()).where(
+                Article.id.in_(match_ids)
+            ).group_by(tags.c.value)
+        )
+    
+    return union_all(*statements) if len(statements) > 1 else statements[0]
+
+def chunked(items: list, size: int = 500):
+    """Slices small enough for SQLite's bound-parameter limit"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def existing_category_ids(db: Session, category_ids: set) -> set:
+    found = set()
+    for chunk in chunked(list(category_ids)):
+        found.update(row.id for row in db.query(Category.id).filter(Category.id.in_(chunk)))
+    return found
+
+def history_row(article_id: str, title: str, content: str, version: int, change_type: str, created_at: datetime, storage: Optional[dict] = None) -> dict:
+    """A history insert; storage (from history.encode_version) replaces the full content with a delta"""
+    row = {
+        "id": str(uuid.uuid4()),
+        "article_id": article_id,
+        "title": title,
+        "content": content,
+        "version": version,
+        "change_type": change_type,
+        "created_at": created_at,
+        "base_id": None,
+        "depth": 0,
+        "size": content_size(content),
+        "blob_hash": None,
+    }
+    if storage is not None:
+        row.update(storage)
+    return row
+
+DUPLICATE_ID_ERROR = "Duplicate id in batch"
+
+def repeated_positions(article_ids: List[str]) -> set:
+    """Positions of ids already seen earlier in a batch; only the first occurrence is applied"""
+    seen, repeated = set(), set()
+    for position, article_id in enumerate(article_ids):
+        if article_id in seen:
+            repeated.add(position)
+        seen.add(article_id)
+    return repeated
+
+def skip_succeeded(results: List[dict]) -> List[dict]:
+    """Results of an atomic batch that was abandoned: only the failures stand"""
+    return [result if result["status"] == "error" else {**result, "status": "skipped"} for result in results]
+
+def search_index_row(article_id: str, title: str, content: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "article_id": article_id,
+        "title_tokens": serialize_tokens(unique_tokens(title)),
+        "content_tokens": serialize_tokens(unique_tokens(content)),
+    }
+
 class ArticleCRUD:
     @staticmethod
     def create_article(db: Session, article: ArticleCreate) -> Article:
@@ -25,8 +181,11 @@ class ArticleCRUD:
             categories = db.query(Category).filter(Category.id.in_(article.categories)).all()
             db_article.categories = categories
         
+        SearchIndexCRUD.index_article(db, db_article)
+        
         db.commit()
         db.refresh(db_article)
+        ArticleCRUD.after_article_write(db_article)
         
         # Create history record
         ArticleCRUD.create_history_record(db, db_article, "created")
@@ -37,9 +196,58 @@ class ArticleCRUD:
     def get_article(db: Session, article_id: str) -> Optional[Article]:
         return db.query(Article).filter(Article.id == article_id).first()
     
+    @staticmethod
+    def get_article_validator(db: Session, article_id: str) -> Optional[Tuple[int, datetime, List[tuple]]]:
+        """(version, updated_at, category stamps) by primary key, without loading the article body"""
+        rows = db.query(
+            Article.version, Article.updated_at, Category.id, Category.parent_id, Category.updated_at
+        ).outerjoin(
+            article_category_association, article_category_association.c.article_id == Article.id
+        ).outerjoin(
+            Category, Category.id == article_category_association.c.category_id
+        ).filter(Article.id == article_id).all()
+        if not rows:
+            return None
+        categories = [tuple(row[2:]) for row in rows if row[2] is not None]
+        return rows[0][0], rows[0][1], categories
+    
     @staticmethod
     def get_articles(db: Session, skip: int = 0, limit: int = 100) -> List[Article]:
-        return db.query(Article).offset(skip).limit(limit).all()
+        return ArticleCRUD.get_articles_page(db, skip=skip, limit=limit)[0]
+    
+    @staticmethod
+    def get_articles_page(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[dict] = None, fields: Optional[List[str]] = None, category_id: Optional[str] = None) -> Tuple[List[Article], Optional[dict]]:
+        """Most recently updated first, paged by offset or by an (updated_at, id) keyset cursor.
+        
+        category_id limits the page to articles filed under that category or any category below it.
+        """
+        # Compare updated_at as stored text: it is what the index orders by, and
+        # it avoids re-formatting timestamps that were written in another format
+        updated_at = type_coerce(Article.updated_at, String)
+        # Categories come in one extra query for the whole page instead of one per article
+        query = db.query(Article, updated_at).options(
+            *article_load_options(fields)
+        ).order_by(updated_at.desc(), Article.id.desc())
+        if category_id is not None:
+            query = query.filter(Article.id.in_(subtree_article_ids(category_id)))
+        
+        after = cursor_after(cursor, "updated_at")
+        if after is not None:
+            # The redundant <= bound lets SQLite seek the index instead of scanning it
+            query = query.filter(
+                updated_at <= after[0],
+                or_(updated_at < after[0], Article.id < after[1])
+            )
+        else:
+            query = query.offset(skip)
+        
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_article, last_updated_at = rows[-1]
+            next_cursor = {"e": "updated_at", "r": last_updated_at, "id": last_article.id}
+        return [article for article, _ in rows], next_cursor
     
     @staticmethod
     def update_article(db: Session, article_id: str, article_update: ArticleUpdate) -> Optional[Article]:
@@ -63,8 +271,11 @@ class ArticleCRUD:
             categories = db.query(Category).filter(Category.id.in_(article_update.categories)).all()
             db_article.categories = categories
         
+        SearchIndexCRUD.index_article(db, db_article)
+        
         db.commit()
         db.refresh(db_article)
+        ArticleCRUD.after_article_write(db_article)
         
         # Create history record
         ArticleCRUD.create_history_record(db, db_article, "updated")
@@ -80,48 +291,525 @@ class ArticleCRUD:
         # Create history record before deletion
         ArticleCRUD.create_history_record(db, db_article, "deleted")
         
+        hashes = article_blob_hashes(db, [db_article.id])
+        SearchIndexCRUD.remove_article(db, db_article.id)
         db.delete(db_article)
+        db.flush()
+        # Snapshots this history shared with no other article go with it
+        collect_garbage(db, hashes)
         db.commit()
+        ArticleCRUD.after_article_delete(article_id)
         return True
     
+    @staticmethod
+    def after_article_write(article: Article):
+        """Bring the in-process search structures up to date once a write has committed"""
+        ArticleCRUD.after_articles_written([(article.id, article.title, article.content)])
+    
+    @staticmethod
+    def after_articles_written(articles: List[Tuple[str, str, str]]):
+        content_generation.bump()
+        for article_id, title, content in articles:
+            article_index.add_article(article_id, title, content)
+            title_index.set_title(article_id, title)
+            trigram_index.add_text(title, content)
+    
+    @staticmethod
+    def after_article_delete(article_id: str):
+        ArticleCRUD.after_articles_deleted([article_id])
+    
+    @staticmethod
+    def after_articles_deleted(article_ids: List[str]):
+        content_generation.bump()
+        for article_id in article_ids:
+            article_index.remove_article(article_id)
+            title_index.remove(article_id)
+    
+    @staticmethod
+    def bulk_create_articles(db: Session, items: List[Tuple[int, ArticleCreate]]) -> List[dict]:
+        """Insert a batch of articles, their categories, history and search rows, committing once"""
+        category_ids = existing_category_ids(db, {cid for _, item in items for cid in item.categories or []})
+        now = datetime.utcnow()
+        
+        articles, links, history, index_rows, results = [], [], [], [], []
+        for index, item in items:
+            article_id = str(uuid.uuid4())
+            articles.append({
+                "id": article_id,
+                "title": item.title,
+                "content": item.content,
+                "tags": json.dumps(item.tags) if item.tags else None,
+                "version": 1,
+                "created_at": now,
+                "updated_at": now,
+            })
+            links.extend(
+                {"article_id": article_id, "category_id": cid}
+                for cid in dict.fromkeys(item.categories or []) if cid in category_ids
+            )
+            history.append(history_row(article_id, item.title, item.content, 1, "created", now))
+            index_rows.append(search_index_row(article_id, item.title, item.content))
+            results.append({"index": index, "id": article_id, "status": "created"})
+        
+        if articles:
+            db.execute(insert(Article), articles)
+            if links:
+                db.execute(insert(article_category_association), links)
+            insert_history(db, history)
+            db.execute(insert(SearchIndex), index_rows)
+            db.commit()
+            ArticleCRUD.after_articles_written([(row["id"], row["title"], row["content"]) for row in articles])
+        return results
+    
+    @staticmethod
+    def bulk_update_articles(db: Session, items: List[Tuple[int, str, ArticleUpdate]], atomic: bool = False) -> List[dict]:
+        """Apply a batch of partial updates in one flush and one commit; unknown ids are reported per item"""
+        found = {}
+        for chunk in chunked(list(dict.fromkeys(article_id for _, article_id, _ in items))):
+            for article in db.query(Article).options(selectinload(Article.categories)).filter(Article.id.in_(chunk)):
+                found[article.id] = article
+        categories = {
+            category.id: category
+            for chunk in chunked(list({cid for _, _, item in items for cid in item.categories or []}))
+            for category in db.query(Category).filter(Category.id.in_(chunk))
+        }
+        now = datetime.utcnow()
+        
+        repeated = repeated_positions([article_id for _, article_id, _ in items])
+        results, updated = [], []
+        for position, (index, article_id, item) in enumerate(items):
+            if position in repeated:
+                results.append({"index": index, "id": article_id, "status": "error", "error": DUPLICATE_ID_ERROR})
+                continue
+            article = found.get(article_id)
+            if article is None:
+                results.append({"index": index, "id": article_id, "status": "error", "error": "Article not found"})
+                continue
+            
+            if item.title is not None:
+                article.title = item.title
+            if item.content is not None:
+                article.content = item.content
+            if item.tags is not None:
+                article.tags = json.dumps(item.tags)
+            if item.categories is not None:
+                article.categories = [categories[cid] for cid in dict.fromkeys(item.categories) if cid in categories]
+            article.version += 1
+            article.updated_at = now
+            updated.append(article)
+            results.append({"index": index, "id": article_id, "status": "updated"})
+        
+        if atomic and len(updated) < len(items):
+            db.rollback()
+            return skip_succeeded(results)
+        
+        if updated:
+            ids = [article.id for article in updated]
+            for chunk in chunked(ids):
+                db.query(SearchIndex).filter(SearchIndex.article_id.in_(chunk)).delete(synchronize_session=False)
+            db.flush()
+            db.execute(insert(SearchIndex), [search_index_row(a.id, a.title, a.content) for a in updated])
+            storage = storage_for_new_versions(db, [(a.id, a.content) for a in updated])
+            insert_history(db, [
+                history_row(a.id, a.title, a.content, a.version, "updated", now, storage[a.id]) for a in updated
+            ])
+            db.commit()
+            ArticleCRUD.after_articles_written([(a.id, a.title, a.content) for a in updated])
+        return results
+    
+    @staticmethod
+    def bulk_delete_articles(db: Session, article_ids: List[str], atomic: bool = False) -> List[dict]:
+        """Delete a batch of articles with their categories, history and search rows in one commit"""
+        found = set()
+        for chunk in chunked(list(dict.fromkeys(article_ids))):
+            found.update(row.id for row in db.query(Article.id).filter(Article.id.in_(chunk)))
+        
+        repeated = repeated_positions(article_ids)
+        results, deleted = [], []
+        for index, article_id in enumerate(article_ids):
+            if index in repeated:
+                results.append({"index": index, "id": article_id, "status": "error", "error": DUPLICATE_ID_ERROR})
+                continue
+            if article_id not in found:
+                results.append({"index": index, "id": article_id, "status": "error", "error": "Article not found"})
+                continue
+            deleted.append(article_id)
+            results.append({"index": index, "id": article_id, "status": "deleted"})
+        
+        if atomic and len(deleted) < len(article_ids):
+            return skip_succeeded(results)
+        
+        if deleted:
+            hashes = article_blob_hashes(db, deleted)
+            for chunk in chunked(deleted):
+                # Same end state as delete_article, whose ORM cascade removes the history
+                db.execute(delete(SearchIndex).where(SearchIndex.article_id.in_(chunk)))
+                db.execute(delete(article_category_association).where(article_category_association.c.article_id.in_(chunk)))
+                db.execute(delete(ArticleHistory).where(ArticleHistory.article_id.in_(chunk)))
+                db.execute(delete(Article).where(Article.id.in_(chunk)))
+            collect_garbage(db, hashes)
+            db.commit()
+            db.expire_all()
+            ArticleCRUD.after_articles_deleted(deleted)
+        return results
+    
     @staticmethod
     def create_history_record(db: Session, article: Article, change_type: str):
-        history = ArticleHistory(
-            id=str(uuid.uuid4()),
-            article_id=article.id,
-            title=article.title,
-            content=article.content,
-            version=article.version,
-            change_type=change_type
-        )
-        db.add(history)
+        # Stored as a delta against the previous version where that is much smaller
+        # and large snapshots as a shared compressed blob
+        storage = storage_for_new_versions(db, [(article.id, article.content)])[article.id]
+        insert_history(db, [
+            history_row(article.id, article.title, article.content, article.version, change_type, datetime.utcnow(), storage)
+        ])
         db.commit()
     
     @staticmethod
     def get_article_history(db: Session, article_id: str) -> List[ArticleHistory]:
-        return db.query(ArticleHistory).filter(
+        """Newest version first, with every entry's full content reconstructed"""
+        history = db.query(ArticleHistory).filter(
+            ArticleHistory.article_id == article_id
+        ).order_by(ArticleHistory.version.desc(), ArticleHistory.created_at.desc()).all()
+        return expand_history(db, history)
+    
+    @staticmethod
+    def get_article_history_page(db: Session, article_id: str, skip: int = 0, limit: int = 50, cursor: Optional[dict] = None) -> Tuple[List[ArticleHistory], Optional[dict]]:
+        """Newest version first without content, paged by offset or by a (version, id) keyset cursor"""
+        query = db.query(ArticleHistory).options(load_only(
+            ArticleHistory.id, ArticleHistory.article_id, ArticleHistory.title, ArticleHistory.version,
+            ArticleHistory.change_type, ArticleHistory.created_at, ArticleHistory.size
+        )).filter(
             ArticleHistory.article_id == article_id
-        ).order_by(ArticleHistory.created_at.desc()).all()
+        ).order_by(ArticleHistory.version.desc(), ArticleHistory.id.desc())
+        
+        after = cursor_after(cursor, "version")
+        if after is not None:
+            query = query.filter(or_(
+                ArticleHistory.version < after[0],
+                and_(ArticleHistory.version == after[0], ArticleHistory.id < after[1])
+            ))
+        else:
+            query = query.offset(skip)
+        
+        entries = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = {"e": "version", "r": entries[-1].version, "id": entries[-1].id}
+        
+        # Deltas written before sizes were recorded
+        unsized = [entry for entry in entries if entry.size is None]
+        if unsized:
+            contents = resolve_contents(db, [entry.id for entry in unsized])
+            for entry in unsized:
+                set_committed_value(entry, "size", content_size(contents[entry.id]))
+        return entries, next_cursor
+    
+    @staticmethod
+    def get_article_version(db: Session, article_id: str, version: int) -> Optional[ArticleHistory]:
+        entry = db.query(ArticleHistory).filter(
+            ArticleHistory.article_id == article_id,
+            ArticleHistory.version == version
+        ).order_by(ArticleHistory.created_at.desc(), ArticleHistory.id.desc()).first()
+        return expand_history(db, [entry])[0] if entry else None
     
     @staticmethod
     def search_articles(db: Session, query: str, skip: int = 0, limit: int = 50) -> List[Article]:
-        search_terms = query.split()
+        return ArticleCRUD.search_articles_page(db, query, skip=skip, limit=limit)[0]
+    
+    @staticmethod
+    def search_articles_page(db: Session, query: str, skip: int = 0, limit: int = 50, cursor: Optional[dict] = None, fields: Optional[List[str]] = None, category_id: Optional[str] = None) -> Tuple[List[Article], Optional[dict]]:
+        article_ids, next_cursor = ArticleCRUD.search_article_page(db, query, skip=skip, limit=limit, cursor=cursor, category_id=category_id)
+        return ArticleCRUD.get_articles_by_ids(db, article_ids, fields=fields), next_cursor
+    
+    @staticmethod
+    def search_article_ids(db: Session, query: str, skip: int = 0, limit: int = 50, category_id: Optional[str] = None) -> List[str]:
+        return ArticleCRUD.search_article_page(db, query, skip=skip, limit=limit, category_id=category_id)[0]
+    
+    @staticmethod
+    def search_article_page(db: Session, query: str, skip: int = 0, limit: int = 50, cursor: Optional[dict] = None, category_id: Optional[str] = None) -> Tuple[List[str], Optional[dict]]:
+        """One page of ranked article ids plus the cursor for the next page (None on the last page)"""
+        return search_cache.get_or_compute(
+            ("search", normalize_query(query), skip, limit, cursor_key(cursor), category_id),
+            lambda: ArticleCRUD.search_article_page_uncached(db, query, skip=skip, limit=limit, cursor=cursor, category_id=category_id)
+        )
+    
+    @staticmethod
+    def search_article_page_uncached(db: Session, query: str, skip: int = 0, limit: int = 50, cursor: Optional[dict] = None, category_id: Optional[str] = None) -> Tuple[List[str], Optional[dict]]:
+        # Token search only finds words from their start. CJK text (never split
+        # into words) and fragments from inside words need the trigram index
+        substring = fts.has_trigram_index(db)
+        if substring and (has_unsegmented_text(query) or (cursor is not None and cursor.get("e") == "substring")):
+            return ArticleCRUD.search_substring_page(db, query, skip=skip, limit=limit, cursor=cursor, category_id=category_id)
+        
+        article_ids, next_cursor = ArticleCRUD.search_token_page(db, query, skip=skip, limit=limit, cursor=cursor, category_id=category_id)
+        if article_ids or cursor is not None or not substring:
+            return article_ids, next_cursor
+        # An empty page past the end of real token matches stays empty
+        if skip and ArticleCRUD.search_token_page(db, query, skip=0, limit=1, category_id=category_id)[0]:
+            return article_ids, next_cursor
+        return ArticleCRUD.search_substring_page(db, query, skip=skip, limit=limit, category_id=category_id)
+    
+    @staticmethod
+    def search_substring_page(db: Session, query: str, skip: int = 0, limit: int = 50, cursor: Optional[dict] = None, category_id: Optional[str] = None) -> Tuple[List[str], Optional[dict]]:
+        after = cursor_after(cursor, "substring")
+        rows = fts.search_substring_ranked(db, query, skip=0 if after else skip, limit=limit + 1, after=after, category_id=category_id)
+        return keyset_page(rows, "substring", limit)
+    
+    @staticmethod
+    def search_token_page(db: Session, query: str, skip: int = 0, limit: int = 50, cursor: Optional[dict] = None, category_id: Optional[str] = None) -> Tuple[List[str], Optional[dict]]:
+        # Each engine resumes from its own kind of position, so a cursor is
+        # only valid for the engine that issued it
+        if article_index.loaded:
+            offset = cursor_offset(cursor, "memory", skip)
+            allowed = set(db.execute(subtree_article_ids(category_id)).scalars()) if category_id is not None else None
+            article_ids = article_index.search(query, skip=offset, limit=limit + 1, allowed=allowed)
+            return offset_page(article_ids, "memory", offset, limit)
+        
+        if fts.has_fts_index(db):
+            after = cursor_after(cursor, "fts")
+            rows = fts.search_ranked(db, query, skip=0 if after else skip, limit=limit + 1, after=after, category_id=category_id)
+            return keyset_page(rows, "fts", limit)
+        
+        terms = unique_tokens(query)
+        if terms:
+            after = cursor_after(cursor, "tokens")
+            rows = SearchIndexCRUD.search_ranked(db, terms, skip=0 if after else skip, limit=limit + 1, after=after, category_id=category_id)
+            return keyset_page(rows, "tokens", limit)
+        return [], None
+    
+    @staticmethod
+    def search_match_source(db: Session, query: str) -> Union[Select, List[str]]:
+        """Every article matching query: a SELECT of ids for the SQL engines, a list for the in-memory one"""
+        # Same choice of engine as search_article_page_uncached
+        substring = fts.has_trigram_index(db)
+        if not (substring and has_unsegmented_text(query)):
+            source = ArticleCRUD.token_match_source(db, query)
+            if not substring or isinstance(source, list) and source:
+                return source
+            if not isinstance(source, list):
+                matches = source.subquery()
+                if db.execute(select(matches.c.id).limit(1)).first() is not None:
+                    return source
+        return fts.substring_match_select(db, query)
+    
+    @staticmethod
+    def token_match_source(db: Session, query: str) -> Union[Select, List[str]]:
+        if article_index.loaded:
+            return article_index.search(query, limit=len(article_index))
+        
+        if fts.has_fts_index(db):
+            return fts.match_select(query)
+        
+        terms = unique_tokens(query)
+        if terms:
+            return SearchIndexCRUD.match_select(terms)
+        return select(Article.id.label("id")).where(false())
+    
+    @staticmethod
+    def search_facets(db: Session, query: str, facets: List[str], fuzzy: bool = False, category_id: Optional[str] = None) -> dict:
+        """Hit counts per category and/or tag over the whole match set, not just one page"""
+        return search_cache.get_or_compute(
+            ("facets", normalize_query(query), tuple(sorted(facets)), fuzzy, category_id),
+            lambda: ArticleCRUD.search_facets_uncached(db, query, facets, fuzzy=fuzzy, category_id=category_id)
+        )
+    
+    @staticmethod
+    def search_facets_uncached(db: Session, query: str, facets: List[str], fuzzy: bool = False, category_id: Optional[str] = None) -> dict:
+        queries = [query]
+        if fuzzy:
+            trigram_index.ensure_loaded(db)
+            queries = [variant for variant, _ in trigram_index.query_variants(query)]
+        
+        sources = [ArticleCRUD.search_match_source(db, q) for q in queries]
+        selects = [source for source in sources if not isinstance(source, list)]
+        listed = list(dict.fromkeys(article_id for source in sources if isinstance(source, list) for article_id in source))
+        
+        counts = {facet: {} for facet in facets}
+        
+        def tally(matches: Select):
+            if category_id is not None:
+                matches = matches.subquery()
+                matches = select(matches.c.id).where(matches.c.id.in_(subtree_article_ids(category_id)))
+            for facet, value, label, count in db.execute(facet_counts_statement(matches, facets)):
+                entry = counts[facet].setdefault(value, {"value": value, "label": label, "count": 0})
+                entry["count"] += count
+        
+        if selects:
+            tally(union(*selects) if len(selects) > 1 else selects[0])
+        # In-memory matches arrive as ids; keep each IN list under SQLite's variable limit
+        for start in range(0, len(listed), FACET_ID_CHUNK):
+            tally(select(Article.id.label("id")).where(Article.id.in_(listed[start:start + FACET_ID_CHUNK])))
+        
+        return {
+            facet: sorted(values.values(), key=lambda entry: (-entry["count"], entry["label"]))
+            for facet, values in counts.items()
+        }
+    
+    @staticmethod
+    def search_articles_fuzzy(db: Session, query: str, skip: int = 0, limit: int = 50, cursor: Optional[dict] = None, fields: Optional[List[str]] = None, category_id: Optional[str] = None) -> Tuple[List[Article], Optional[dict]]:
+        """Typo-tolerant search: run spelling variants from the trigram index, most similar first"""
+        offset = cursor_offset(cursor, "fuzzy", skip)
+        article_ids = search_cache.get_or_compute(
+            ("fuzzy", normalize_query(query), offset, limit, category_id),
+            lambda: ArticleCRUD.search_article_ids_fuzzy(db, query, skip=offset, limit=limit + 1, category_id=category_id)
+        )
+        article_ids, next_cursor = offset_page(article_ids, "fuzzy", offset, limit)
+        return ArticleCRUD.get_articles_by_ids(db, article_ids, fields=fields), next_cursor
+    
+    @staticmethod
+    def search_article_ids_fuzzy(db: Session, query: str, skip: int = 0, limit: int = 50, category_id: Optional[str] = None) -> List[str]:
+        trigram_index.ensure_loaded(db)
+        
+        article_ids = []
+        seen = set()
+        for variant, _ in trigram_index.query_variants(query):
+            for article_id in ArticleCRUD.search_article_ids(db, variant, skip=0, limit=skip + limit, category_id=category_id):
+                if article_id not in seen:
+                    seen.add(article_id)
+                    article_ids.append(article_id)
+            if len(article_ids) >= skip + limit:
+                break
+        
+        return article_ids[skip:skip + limit]
+    
+    @staticmethod
+    def search_article_snippets(db: Session, query: str, skip: int = 0, limit: int = 50, fuzzy: bool = False, cursor: Optional[dict] = None, category_id: Optional[str] = None) -> Tuple[List[Tuple[Article, str, list]], Optional[dict]]:
+        """Ranked (article, snippet, highlight offsets) hits; article content is not loaded when FTS5 can cut the snippet"""
+        if fuzzy:
+            articles, next_cursor = ArticleCRUD.search_articles_fuzzy(db, query, skip=skip, limit=limit, cursor=cursor, category_id=category_id)
+            variant_terms = set()
+            for variant, _ in trigram_index.query_variants(query):
+                variant_terms.update(variant.split())
+            pattern = terms_pattern(list(variant_terms))
+            return [(article, *make_snippet(article.content, pattern)) for article in articles], next_cursor
+        
+        article_ids, next_cursor = ArticleCRUD.search_article_page(db, query, skip=skip, limit=limit, cursor=cursor, category_id=category_id)
+        if not article_index.loaded and fts.has_fts_index(db):
+            snippets = fts.search_snippets(db, query, article_ids)
+            # Hits from the trigram index have no word match to cut around
+            if all(article_id in snippets for article_id in article_ids):
+                articles = ArticleCRUD.get_articles_by_ids(db, article_ids, load_content=False)
+                return [(article, *parse_marked_snippet(snippets[article.id])) for article in articles], next_cursor
+        
+        pattern = terms_pattern(unique_tokens(query))
+        fragments = substring_pattern(query.split())
+        articles = ArticleCRUD.get_articles_by_ids(db, article_ids)
+        return [
+            (article, *make_snippet(article.content, pattern if pattern is not None and pattern.search(article.content) else fragments))
+            for article in articles
+        ], next_cursor
+    
+    @staticmethod
+    def get_articles_by_ids(db: Session, article_ids: List[str], load_content: bool = True, fields: Optional[List[str]] = None) -> List[Article]:
+        if not article_ids:
+            return []
+        query = db.query(Article).options(*article_load_options(fields, load_content=load_content))
+        articles = query.filter(Article.id.in_(article_ids)).all()
+        # Keep the caller's (ranked) order
+        by_id = {article.id: article for article in articles}
+        return [by_id[article_id] for article_id in article_ids if article_id in by_id]
+
+class SearchIndexCRUD:
+    @staticmethod
+    def index_article(db: Session, article: Article) -> SearchIndex:
+        """Tokenize an article into its search_index row; the caller commits"""
+        entry = db.query(SearchIndex).filter(SearchIndex.article_id == article.id).first()
+        if entry is None:
+            entry = SearchIndex(id=str(uuid.uuid4()), article_id=article.id)
+            db.add(entry)
+        entry.title_tokens = serialize_tokens(unique_tokens(article.title))
+        entry.content_tokens = serialize_tokens(unique_tokens(article.content))
+        return entry
+    
+    @staticmethod
+    def remove_article(db: Session, article_id: str):
+        db.query(SearchIndex).filter(
+            SearchIndex.article_id == article_id
+        ).delete(synchronize_session=False)
+    
+    @staticmethod
+    def match_conditions(terms: List[str]) -> Tuple[list, list]:
+        """Per-term match conditions and title-hit expressions over the token lists"""
         search_conditions = []
+        title_hits = []
         
-        for term in search_terms:
+        for term in terms:
+            # Token prefix match against the space-delimited token lists
+            pattern = "% " + term.replace("_", "\\_") + "%"
+            title_match = SearchIndex.title_tokens.like(pattern, escape="\\")
             search_conditions.append(
-                or_(
-                    Article.title.ilike(f"%{term}%"),
-                    Article.content.ilike(f"%{term}%")
-                )
+                or_(title_match, SearchIndex.content_tokens.like(pattern, escape="\\"))
             )
+            title_hits.append(case((title_match, 1), else_=0))
+        
+        return search_conditions, title_hits
+    
+    @staticmethod
+    def search_ranked(db: Session, terms: List[str], skip: int = 0, limit: int = 50, after: Optional[Tuple[int, str]] = None, category_id: Optional[str] = None) -> List[Tuple[str, int]]:
+        """(article id, title hit count) pairs, most title hits first"""
+        search_conditions, title_hits = SearchIndexCRUD.match_conditions(terms)
+        
+        hits = sum(title_hits)
+        query = db.query(SearchIndex.article_id, hits).filter(and_(*search_conditions))
+        if category_id is not None:
+            query = query.filter(SearchIndex.article_id.in_(subtree_article_ids(category_id)))
+        if after is not None:
+            query = query.filter(or_(
+                hits < after[0],
+                and_(hits == after[0], SearchIndex.article_id > after[1])
+            ))
+        rows = query.order_by(
+            hits.desc(), SearchIndex.article_id
+        ).offset(skip).limit(limit).all()
+        return [(row[0], row[1]) for row in rows]
+    
+    @staticmethod
+    def match_select(terms: List[str]) -> Select:
+        search_conditions, _ = SearchIndexCRUD.match_conditions(terms)
+        return select(SearchIndex.article_id.label("id")).where(and_(*search_conditions))
+    
+    @staticmethod
+    def reindex(db: Session, only_missing: bool = False, batch_size: int = 500) -> int:
+        """Rebuild search_index in bulk, optionally only for articles that have no row yet"""
+        if not only_missing:
+            db.query(SearchIndex).delete(synchronize_session=False)
         
-        if search_conditions:
-            return db.query(Article).filter(
-                and_(*search_conditions)
-            ).offset(skip).limit(limit).all()
+        indexed = 0
+        last_id = ""
+        while True:
+            query = db.query(Article.id, Article.title, Article.content).filter(Article.id > last_id)
+            if only_missing:
+                query = query.outerjoin(
+                    SearchIndex, SearchIndex.article_id == Article.id
+                ).filter(SearchIndex.id.is_(None))
+            rows = query.order_by(Article.id).limit(batch_size).all()
+            if not rows:
+                break
+            
+            db.bulk_insert_mappings(SearchIndex, [
+                {
+                    "id": str(uuid.uuid4()),
+                    "article_id": row.id,
+                    "title_tokens": serialize_tokens(unique_tokens(row.title)),
+                    "content_tokens": serialize_tokens(unique_tokens(row.content)),
+                }
+                for row in rows
+            ])
+            indexed += len(rows)
+            last_id = rows[-1].id
         
-        return []
+        db.commit()
+        return indexed
+
+def attach_children(parents: List[Category], categories: List[Category]) -> List[Category]:
+    """Set each parent's children from the given categories without lazy loading them"""
+    children: Dict[str, List[Category]] = {}
+    for category in categories:
+        if category.parent_id is not None:
+            children.setdefault(category.parent_id, []).append(category)
+    for parent in parents:
+        set_committed_value(parent, "children", children.get(parent.id, []))
+    return parents
 
 class CategoryCRUD:
     @staticmethod
@@ -134,7 +822,10 @@ class CategoryCRUD:
             parent_id=category.parent_id
         )
         db.add(db_category)
+        db.flush()
+        link_category(db, db_category.id, db_category.parent_id)
         db.commit()
+        content_generation.bump()
         db.refresh(db_category)
         return db_category
     
@@ -146,9 +837,32 @@ class CategoryCRUD:
     def get_categories(db: Session, skip: int = 0, limit: int = 100) -> List[Category]:
         return db.query(Category).offset(skip).limit(limit).all()
     
+    @staticmethod
+    def get_article_counts(db: Session, category_ids: List[str]) -> Dict[str, int]:
+        """Articles per category, counted over the association table without loading any article"""
+        counts = {}
+        for chunk in chunked(category_ids):
+            counts.update(db.execute(
+                select(article_category_association.c.category_id, func.count())
+                .where(article_category_association.c.category_id.in_(chunk))
+                .group_by(article_category_association.c.category_id)
+            ).all())
+        return counts
+    
     @staticmethod
     def get_root_categories(db: Session) -> List[Category]:
-        return db.query(Category).filter(Category.parent_id.is_(None)).all()
+        """Root categories with their whole trees, from a single query over all categories"""
+        categories = db.query(Category).all()
+        return [category for category in attach_children(categories, categories) if category.parent_id is None]
+    
+    @staticmethod
+    def get_category_tree(db: Session, category: Category) -> Category:
+        """Load a category's descendants in one query over the closure and attach them as its children"""
+        descendants = db.query(Category).filter(
+            Category.id.in_(subtree_ids(category.id)), Category.id != category.id
+        ).all()
+        attach_children([category] + descendants, descendants)
+        return category
     
     @staticmethod
     def update_category(db: Session, category_id: str, category_update: CategoryUpdate) -> Optional[Category]:
@@ -162,11 +876,14 @@ class CategoryCRUD:
             db_category.description = category_update.description
         if category_update.color is not None:
             db_category.color = category_update.color
-        if category_update.parent_id is not None:
+        if category_update.parent_id is not None and category_update.parent_id != db_category.parent_id:
+            # Raises ValueError for a move under its own subtree
+            move_category(db, db_category.id, category_update.parent_id)
             db_category.parent_id = category_update.parent_id
         
         db_category.updated_at = datetime.utcnow()
         db.commit()
+        content_generation.bump()
         db.refresh(db_category)
         return db_category
     
@@ -176,10 +893,16 @@ class CategoryCRUD:
         if not db_category:
             return False
         
-        # Move children to parent or make them root categories
-        for child in db_category.children:
-            child.parent_id = db_category.parent_id
+        # Move children to parent or make them root categories; with the
+        # children collection reloaded afterwards, the delete-orphan cascade
+        # no longer sees them
+        db.query(Category).filter(Category.parent_id == category_id).update(
+            {"parent_id": db_category.parent_id}, synchronize_session=False
+        )
+        unlink_category(db, category_id)
+        db.expire(db_category, ["children"])
         
         db.delete(db_category)
         db.commit()
+        content_generation.bump()
         return True
\ No newline at end of file
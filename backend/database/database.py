@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, inspect, MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from pathlib import Path
@@ -34,7 +34,66 @@ def get_db():
 
 def create_tables():
     from .models import Article, Category, ArticleHistory
+    from ..search.fts import create_fts_index
+    enable_incremental_vacuum()
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    # create_all only creates indexes together with new tables
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    # create_all skips existing tables, so databases created before the
+    # FTS5 index existed get it (and a one-off rebuild) here
+    with engine.begin() as connection:
+        create_fts_index(None, connection)
+        backfill_category_closure(connection)
+
+def backfill_category_closure(connection):
+    """Build the category closure for databases whose categories predate it"""
+    from .category_tree import rebuild_closure
+    closure_rows = connection.exec_driver_sql("SELECT count(*) FROM category_closure").scalar()
+    if not closure_rows and connection.exec_driver_sql("SELECT count(*) FROM categories").scalar():
+        rebuild_closure(connection)
+
+def enable_incremental_vacuum(bind=None):
+    """Let history retention hand freed pages back to the filesystem.
+
+    auto_vacuum can only be switched on an empty database; existing ones
+    switch on their next full VACUUM (database/compact_history.py --vacuum).
+    """
+    bind = bind if bind is not None else engine
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.connect() as connection:
+        if not inspect(connection).get_table_names():
+            connection.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+
+def add_missing_columns(bind=None):
+    """Add nullable columns introduced after a database was created, then backfill them"""
+    from .models import EXCERPT_LENGTH
+    bind = bind if bind is not None else engine
+    inspector = inspect(bind)
+    added = set()
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                    added.add(f"{table.name}.{column.name}")
+        if "articles.excerpt" in added:
+            # Same rule as models.make_excerpt
+            connection.exec_driver_sql(
+                "UPDATE articles SET excerpt = CASE WHEN length(content) > ? "
+                "THEN substr(content, 1, ?) || '...' ELSE content END",
+                (EXCERPT_LENGTH, EXCERPT_LENGTH)
+            )
+        if "article_history.size" in added:
+            # Delta rows are sized when first listed (see ArticleCRUD.get_article_history_page)
+            connection.exec_driver_sql(
+                "UPDATE article_history SET size = length(CAST(content AS BLOB)) WHERE base_id IS NULL"
+            )
 
 def drop_tables():
     Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,172 @@
+import io
+import json
+import re
+import zipfile
+from datetime import datetime
+from typing import Iterator, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .models import Article, Category, ArticleHistory, article_category_association
+from .history import resolve_contents
+from ..utils.responses import dumps
+
+EXPORT_FORMAT_VERSION = 1
+EXPORT_BATCH_SIZE = 200
+
+def _parse_tags(tags: Optional[str]) -> List[str]:
+    if not tags:
+        return []
+    try:
+        return json.loads(tags)
+    except json.JSONDecodeError:
+        return []
+
+def iter_categories(db: Session) -> Iterator[dict]:
+    for category in db.execute(select(Category.__table__).order_by(Category.id)).mappings():
+        yield dict(category)
+    db.rollback()
+
+def iter_articles(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+    """Every article with its category ids, read in keyset batches.
+
+    Rows are plain tuples rather than ORM objects, so nothing accumulates in
+    the session, and each batch is its own short read transaction so a long
+    export never holds off writers.
+    """
+    columns = [Article.id, Article.title, Article.content, Article.tags, Article.version, Article.created_at, Article.updated_at]
+    last_id = ""
+    while True:
+        rows = db.execute(
+            select(*columns).where(Article.id > last_id).order_by(Article.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        categories = {row.id: [] for row in rows}
+        for article_id, category_id in db.execute(
+            select(article_category_association.c.article_id, article_category_association.c.category_id)
+            .where(article_category_association.c.article_id.in_(list(categories)))
+            .order_by(article_category_association.c.article_id, article_category_association.c.category_id)
+        ):
+            categories[article_id].append(category_id)
+        db.rollback()
+
+        for row in rows:
+            yield {
+                "id": row.id,
+                "title": row.title,
+                "content": row.content,
+                "tags": _parse_tags(row.tags),
+                "categories": categories[row.id],
+                "version": row.version,
+                "created_at": row.created_at,
+                "updated_at": row.updated_at,
+            }
+        last_id = rows[-1].id
+
+def iter_history(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+    """History entries with full content, whether stored inline, as blobs or as deltas"""
+    history = ArticleHistory.__table__
+    columns = [history.c.id, history.c.article_id, history.c.title, history.c.content, history.c.version, history.c.change_type, history.c.created_at]
+    last_id = ""
+    while True:
+        rows = db.execute(
+            select(*columns, history.c.base_id, history.c.blob_hash).where(history.c.id > last_id).order_by(history.c.id).limit(batch_size)
+        ).all()
+        contents = resolve_contents(db, [row.id for row in rows if row.base_id is not None or row.blob_hash is not None])
+        db.rollback()
+        if not rows:
+            break
+        for row in rows:
+            entry = {column.name: getattr(row, column.name) for column in columns}
+            entry["content"] = contents.get(row.id, row.content)
+            yield entry
+        last_id = rows[-1].id
+
+def export_ndjson(db: Session, include_history: bool = True) -> Iterator[bytes]:
+    """One JSON object per line: a meta header, then categories, articles and history"""
+    yield dumps({"type": "meta", "format": "wiki-export", "version": EXPORT_FORMAT_VERSION, "exported_at": datetime.utcnow()}) + b"\n"
+    for category in iter_categories(db):
+        yield dumps({"type": "category", **category}) + b"\n"
+    for article in iter_articles(db):
+        yield dumps({"type": "article", **article}) + b"\n"
+    if include_history:
+        for entry in iter_history(db):
+            yield dumps({"type": "history", **entry}) + b"\n"
+
+def slugify(title: str) -> str:
+    slug = re.sub(r"[^\w\s-]", "", title.lower())
+    return re.sub(r"[\s_-]+", "-", slug).strip("-")[:60] or "untitled"
+
+def _yaml_value(value) -> str:
+    # JSON scalars and flow sequences are valid YAML
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return json.dumps(value, ensure_ascii=False)
+
+def article_markdown(article: dict, category_names: dict) -> str:
+    front_matter = {
+        "id": article["id"],
+        "title": article["title"],
+        "tags": article["tags"],
+        "categories": [category_names.get(category_id, category_id) for category_id in article["categories"]],
+        "version": article["version"],
+        "created_at": article["created_at"],
+        "updated_at": article["updated_at"],
+    }
+    lines = ["---"] + [f"{key}: {_yaml_value(value)}" for key, value in front_matter.items()] + ["---", ""]
+    return "\n".join(lines) + article["content"] + "\n"
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that hands written bytes back in chunks.
+
+    zipfile switches to data descriptors on unseekable output, so an archive
+    can be produced front to back without ever holding it in memory.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def export_zip(db: Session, include_history: bool = True) -> Iterator[bytes]:
+    """Zip of one Markdown file per article with front-matter, plus categories.json and history.ndjson.
+
+    Article bodies are streamed; only zipfile's central directory (a small
+    record per entry) grows with the number of articles.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        categories = list(iter_categories(db))
+        category_names = {category["id"]: category["name"] for category in categories}
+        archive.writestr("categories.json", dumps(categories))
+        yield sink.drain()
+
+        for article in iter_articles(db):
+            # The id keeps names unique however titles collide
+            name = f"articles/{slugify(article['title'])}-{article['id']}.md"
+            archive.writestr(name, article_markdown(article, category_names))
+            yield sink.drain()
+
+        if include_history:
+            with archive.open("history.ndjson", mode="w", force_zip64=True) as history:
+                for entry in iter_history(db):
+                    history.write(dumps(entry) + b"\n")
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+    yield sink.drain()
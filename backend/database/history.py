@@ -0,0 +1,228 @@
+import json
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, insert, update, func, literal, bindparam
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from .models import ArticleHistory, ContentBlob
+from .blobs import BLOB_MIN_BYTES, content_hash, compress, save_blobs, load_blobs
+from ..utils.settings import get_setting
+
+# Every Nth version is stored in full, bounding how many deltas a read applies
+SNAPSHOT_INTERVAL = max(1, get_setting("history", "snapshot_interval", default=20))
+# A delta must be at most this fraction of the content, or the version is stored in full
+MAX_DELTA_RATIO = 0.5
+
+ID_CHUNK = 500
+
+def make_delta(base: str, content: str) -> str:
+    """Line-based delta turning base into content: JSON [[start, end, replacement], ...] over base's lines"""
+    base_lines = base.splitlines(keepends=True)
+    lines = content.splitlines(keepends=True)
+    operations = [
+        [i1, i2, "".join(lines[j1:j2])]
+        for tag, i1, i2, j1, j2 in SequenceMatcher(None, base_lines, lines).get_opcodes()
+        if tag != "equal"
+    ]
+    return json.dumps(operations, ensure_ascii=False, separators=(",", ":"))
+
+def apply_delta(base: str, delta: str) -> str:
+    base_lines = base.splitlines(keepends=True)
+    parts, position = [], 0
+    for start, end, replacement in json.loads(delta):
+        parts.extend(base_lines[position:start])
+        parts.append(replacement)
+        position = end
+    parts.extend(base_lines[position:])
+    return "".join(parts)
+
+def content_size(content: str) -> int:
+    return len(content.encode("utf-8"))
+
+def encode_version(content: str, previous: Optional[Tuple[str, int, str]]) -> dict:
+    """Storage columns for a new history row given the (id, depth, content) of the row before it"""
+    size = content_size(content)
+    if previous is not None:
+        previous_id, previous_depth, previous_content = previous
+        if previous_depth + 1 < SNAPSHOT_INTERVAL:
+            delta = make_delta(previous_content, content)
+            if len(delta) <= len(content) * MAX_DELTA_RATIO:
+                return {"content": delta, "base_id": previous_id, "depth": previous_depth + 1, "size": size}
+    return {"content": content, "base_id": None, "depth": 0, "size": size}
+
+def pack_storage(storage: dict) -> Tuple[str, Optional[str]]:
+    """(content column, blob hash) for storage columns: large snapshots move to a blob"""
+    if storage["base_id"] is None and storage["size"] >= BLOB_MIN_BYTES:
+        return "", content_hash(storage["content"])
+    return storage["content"], None
+
+def insert_history(db: Session, rows: List[dict]):
+    """Insert history rows (see crud.history_row), storing large snapshot bodies as shared blobs"""
+    blobs = {}
+    for row in rows:
+        content, blob_hash = pack_storage(row)
+        if blob_hash is not None and blob_hash not in blobs:
+            blobs[blob_hash] = (compress(row["content"]), row["size"])
+        row["content"], row["blob_hash"] = content, blob_hash
+    save_blobs(db, blobs)
+    db.execute(insert(ArticleHistory), rows)
+
+def resolve_contents(db: Session, entry_ids: Iterable[str]) -> Dict[str, str]:
+    """Full text of the given history rows, each chain read back to its snapshot in one recursive query"""
+    history = ArticleHistory.__table__
+    entry_ids = list(dict.fromkeys(entry_ids))
+    contents = {}
+    for start in range(0, len(entry_ids), ID_CHUNK):
+        chain = select(
+            history.c.id.label("origin"), history.c.id, history.c.base_id, history.c.blob_hash,
+            history.c.content, literal(0).label("step")
+        ).where(history.c.id.in_(entry_ids[start:start + ID_CHUNK])).cte("chain", recursive=True)
+        chain = chain.union_all(
+            select(chain.c.origin, history.c.id, history.c.base_id, history.c.blob_hash, history.c.content, chain.c.step + 1)
+            .where(history.c.id == chain.c.base_id)
+        )
+        rows = db.execute(select(chain).order_by(chain.c.origin, chain.c.step.desc())).all()
+        # Only the snapshots the requested chains start from are decompressed
+        blobs = load_blobs(db, {row.blob_hash for row in rows if row.blob_hash is not None})
+        
+        # Per origin: the snapshot first, then each delta on the way back up
+        origin, text = None, None
+        for row in rows:
+            if row.origin != origin:
+                origin = row.origin
+                if row.base_id is not None:
+                    raise LookupError(f"History row {row.id} is a delta against missing row {row.base_id}")
+                text = blobs[row.blob_hash] if row.blob_hash is not None else row.content
+            else:
+                text = apply_delta(text, row.content)
+            if row.step == 0:
+                contents[origin] = text
+    return contents
+
+def latest_entries(db: Session, article_ids: List[str]) -> Dict[str, Tuple[str, int]]:
+    """(id, depth) of each article's newest history row"""
+    history = ArticleHistory.__table__
+    latest = {}
+    for start in range(0, len(article_ids), ID_CHUNK):
+        ranked = select(
+            history.c.article_id, history.c.id, history.c.depth,
+            func.row_number().over(
+                partition_by=history.c.article_id,
+                order_by=(history.c.version.desc(), history.c.created_at.desc())
+            ).label("position")
+        ).where(history.c.article_id.in_(article_ids[start:start + ID_CHUNK])).subquery()
+        for article_id, entry_id, depth in db.execute(
+            select(ranked.c.article_id, ranked.c.id, ranked.c.depth).where(ranked.c.position == 1)
+        ):
+            latest[article_id] = (entry_id, depth or 0)
+    return latest
+
+def storage_for_new_versions(db: Session, articles: List[Tuple[str, str]]) -> Dict[str, dict]:
+    """Storage columns for one new history row per (article_id, content)"""
+    latest = latest_entries(db, [article_id for article_id, _ in articles])
+    contents = resolve_contents(db, [entry_id for entry_id, _ in latest.values()])
+    storage = {}
+    for article_id, content in articles:
+        previous = latest.get(article_id)
+        if previous is not None:
+            previous = (previous[0], previous[1], contents[previous[0]])
+        storage[article_id] = encode_version(content, previous)
+    return storage
+
+def expand_history(db: Session, entries: List[ArticleHistory]) -> List[ArticleHistory]:
+    """Put each entry's full text in its content attribute without marking it modified"""
+    snapshots = [entry for entry in entries if entry.base_id is None]
+    blobs = load_blobs(db, {entry.blob_hash for entry in snapshots if entry.blob_hash is not None})
+    for entry in snapshots:
+        if entry.blob_hash is not None:
+            set_committed_value(entry, "content", blobs[entry.blob_hash])
+    
+    deltas = sorted((entry for entry in entries if entry.base_id is not None), key=lambda entry: entry.depth or 0)
+    if not deltas:
+        return entries
+    contents = {entry.id: entry.content for entry in snapshots}
+    # Bases outside the given rows (e.g. a page of history) are resolved from the database
+    contents.update(resolve_contents(db, {entry.base_id for entry in deltas} - {entry.id for entry in entries}))
+    # Ascending depth applies every base before the deltas built on it
+    for entry in deltas:
+        contents[entry.id] = apply_delta(contents[entry.base_id], entry.content)
+        set_committed_value(entry, "content", contents[entry.id])
+    return entries
+
+def load_history_rows(db: Session, article_ids: List[str]) -> Tuple[list, Dict[str, str]]:
+    """Every history row of the given articles in version order, plus the full text of rows not stored inline"""
+    history = ArticleHistory.__table__
+    rows = db.execute(
+        select(
+            history.c.id, history.c.article_id, history.c.version, history.c.created_at, history.c.content,
+            history.c.base_id, history.c.depth, history.c.size, history.c.blob_hash,
+            func.length(ContentBlob.data).label("blob_bytes")
+        ).outerjoin(ContentBlob, ContentBlob.hash == history.c.blob_hash)
+        .where(history.c.article_id.in_(article_ids))
+        .order_by(history.c.article_id, history.c.version, history.c.created_at, history.c.id)
+    ).all()
+    return rows, resolve_contents(db, [row.id for row in rows if row.base_id is not None or row.blob_hash is not None])
+
+def reencode_rows(rows: list, contents: Dict[str, str], stats: dict) -> Tuple[List[dict], Dict[str, Tuple[bytes, int]]]:
+    """Update parameters re-encoding rows (grouped by article, in version order) as a fresh chain, and the blobs they need"""
+    updates, blobs, previous, article_id = [], {}, None, None
+    for row in rows:
+        if row.article_id != article_id:
+            article_id, previous = row.article_id, None
+        content = contents.get(row.id, row.content)
+        storage = encode_version(content, previous)
+        packed, blob_hash = pack_storage(storage)
+        
+        stats["bytes_before"] += content_size(row.content) + (row.blob_bytes or 0)
+        blob_bytes = 0
+        if blob_hash is not None:
+            if blob_hash == row.blob_hash:
+                blob_bytes = row.blob_bytes
+            else:
+                blobs[blob_hash] = (compress(content), storage["size"])
+                blob_bytes = len(blobs[blob_hash][0])
+        stats["bytes_after"] += content_size(packed) + blob_bytes
+        
+        if (packed, blob_hash, storage["base_id"], storage["depth"], storage["size"]) != (row.content, row.blob_hash, row.base_id, row.depth, row.size):
+            updates.append({
+                "entry_id": row.id, "new_content": packed, "new_blob_hash": blob_hash,
+                "new_base_id": storage["base_id"], "new_depth": storage["depth"], "new_size": storage["size"]
+            })
+        previous = (row.id, storage["depth"], content)
+    return updates, blobs
+
+def rewrite_rows(db: Session, updates: List[dict], blobs: Dict[str, Tuple[bytes, int]]) -> int:
+    """Apply reencode_rows' updates; returns the bytes of blobs it had to add"""
+    history = ArticleHistory.__table__
+    added = save_blobs(db, blobs)
+    if updates:
+        db.execute(update(history).where(history.c.id == bindparam("entry_id")).values(
+            content=bindparam("new_content"), blob_hash=bindparam("new_blob_hash"), base_id=bindparam("new_base_id"),
+            depth=bindparam("new_depth"), size=bindparam("new_size")
+        ), updates)
+    return added
+
+def compact_history(db: Session, batch_size: int = 200, progress=None) -> dict:
+    """Re-encode every article's history as blob snapshots plus deltas, a batch of articles per transaction"""
+    history = ArticleHistory.__table__
+    stats = {"articles": 0, "rows": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    last_article_id = ""
+    while True:
+        article_ids = list(db.execute(
+            select(history.c.article_id).where(history.c.article_id > last_article_id)
+            .group_by(history.c.article_id).order_by(history.c.article_id).limit(batch_size)
+        ).scalars())
+        if not article_ids:
+            break
+
+        rows, contents = load_history_rows(db, article_ids)
+        updates, blobs = reencode_rows(rows, contents, stats)
+        rewrite_rows(db, updates, blobs)
+        db.commit()
+        stats["articles"] += len(article_ids)
+        stats["rows"] += len(rows)
+        stats["rewritten"] += len(updates)
+        last_article_id = article_ids[-1]
+        if progress:
+            progress(stats)
+    return stats
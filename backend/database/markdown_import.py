@@ -0,0 +1,313 @@
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from .models import Article, Category, article_category_association
+from .crud import SearchIndexCRUD, chunked, history_row
+from .history import insert_history
+from .category_tree import link_category
+from ..search import fts
+from ..search.cache import content_generation
+from ..search.inverted_index import article_index
+from ..search.suggestions import title_index
+from ..search.trigram import trigram_index
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - PyYAML comes with uvicorn[standard]
+    yaml = None
+
+MARKDOWN_SUFFIXES = (".md", ".markdown")
+IMPORT_BATCH_SIZE = 1000
+PARSE_CHUNK_SIZE = 64
+
+FRONT_MATTER = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.DOTALL)
+HEADING = re.compile(r"^#[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+
+def _simple_front_matter(text: str) -> dict:
+    # Flat "key: value" lines, enough for the exporter's JSON-valued front-matter
+    data, key = {}, None
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if line.lstrip().startswith("- ") and key is not None:
+            if not isinstance(data.get(key), list):
+                data[key] = []
+            data[key].append(line.lstrip()[2:].strip().strip("\"'"))
+            continue
+        key, _, value = line.partition(":")
+        key, value = key.strip(), value.strip()
+        if not value:
+            data[key] = None
+            continue
+        try:
+            data[key] = json.loads(value)
+        except json.JSONDecodeError:
+            if value.startswith("[") and value.endswith("]"):
+                data[key] = [item.strip().strip("\"'") for item in value[1:-1].split(",") if item.strip()]
+            else:
+                data[key] = value.strip("\"'")
+    return data
+
+def split_front_matter(text: str) -> Tuple[dict, str]:
+    """Front-matter mapping and the body after it; a missing or unreadable block yields {}"""
+    match = FRONT_MATTER.match(text)
+    if not match:
+        return {}, text
+    if yaml is None:
+        data = _simple_front_matter(match.group(1))
+    else:
+        try:
+            data = yaml.safe_load(match.group(1))
+        except yaml.YAMLError:
+            data = _simple_front_matter(match.group(1))
+    return (data if isinstance(data, dict) else {}), text[match.end():]
+
+def _string_list(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    return list(dict.fromkeys(str(item).strip() for item in value if item is not None and str(item).strip()))
+
+def _timestamp(value, default: datetime) -> datetime:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return default
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if not isinstance(value, datetime):
+        return default
+    # Stored as naive UTC like everything else
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def title_from_filename(path: Path) -> str:
+    return re.sub(r"[-_]+", " ", path.stem).strip() or path.stem
+
+def parse_markdown_file(path: str, root: str) -> dict:
+    """Parse one file into an article row; runs in the worker processes, so it only touches the file"""
+    relative = Path(path).relative_to(root)
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        modified = datetime.utcfromtimestamp(os.stat(path).st_mtime)
+    except OSError as e:
+        return {"path": str(relative), "error": str(e)}
+
+    meta, body = split_front_matter(text)
+    title = meta.get("title")
+    if not isinstance(title, str) or not title.strip():
+        heading = HEADING.search(body)
+        title = heading.group(1) if heading else title_from_filename(relative)
+    created_at = _timestamp(meta.get("created_at", meta.get("date")), modified)
+
+    version = meta.get("version")
+    return {
+        "path": str(relative),
+        "id": meta["id"] if isinstance(meta.get("id"), str) and meta["id"].strip() else None,
+        "title": title.strip(),
+        "content": body.strip("\n"),
+        "tags": _string_list(meta.get("tags")),
+        "categories": _string_list(meta.get("categories")),
+        "directories": relative.parent.parts,
+        "version": version if isinstance(version, int) and version > 0 else 1,
+        "created_at": created_at,
+        "updated_at": _timestamp(meta.get("updated_at"), max(created_at, modified)),
+    }
+
+def _parse_pair(args: Tuple[str, str]) -> dict:
+    return parse_markdown_file(*args)
+
+def find_markdown_files(root: str) -> List[str]:
+    """Every Markdown file under root in a stable order, skipping hidden files and directories"""
+    found = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith("."))
+        found.extend(
+            os.path.join(directory, name) for name in sorted(files)
+            if name.lower().endswith(MARKDOWN_SUFFIXES) and not name.startswith(".")
+        )
+    return found
+
+def parse_files(paths: List[str], root: str, workers: Optional[int] = None) -> Iterator[dict]:
+    """Parsed files in input order, from a process pool (workers=0 parses in this process)"""
+    if workers == 0:
+        for path in paths:
+            yield parse_markdown_file(path, root)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_parse_pair, [(path, root) for path in paths], chunksize=PARSE_CHUNK_SIZE)
+
+class CategoryResolver:
+    """Maps directory paths and front-matter names to category ids, creating what is missing.
+
+    Directories become nested categories. Category names are unique, so a
+    directory whose name is already taken under another parent is named by
+    its full path instead (e.g. "guides/setup").
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.by_name: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.ids = set()
+        for category_id, name, parent_id in db.execute(select(Category.id, Category.name, Category.parent_id)):
+            self.by_name[name] = (category_id, parent_id)
+            self.ids.add(category_id)
+        self.by_path: Dict[Tuple[str, ...], str] = {}
+        self.created = 0
+
+    def _create(self, name: str, parent_id: Optional[str]) -> str:
+        category_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        self.db.execute(insert(Category), [{
+            "id": category_id, "name": name, "parent_id": parent_id, "created_at": now, "updated_at": now
+        }])
+        link_category(self.db, category_id, parent_id)
+        self.by_name[name] = (category_id, parent_id)
+        self.ids.add(category_id)
+        self.created += 1
+        return category_id
+
+    def for_directory(self, parts: Tuple[str, ...]) -> Optional[str]:
+        if not parts:
+            return None
+        if parts in self.by_path:
+            return self.by_path[parts]
+
+        parent_id = self.for_directory(parts[:-1])
+        path = "/".join(parts)
+        for name in (parts[-1], path):
+            existing = self.by_name.get(name)
+            if existing is None:
+                category_id = self._create(name, parent_id)
+                break
+            if existing[1] == parent_id or name == path:
+                category_id = existing[0]
+                break
+        self.by_path[parts] = category_id
+        return category_id
+
+    def for_name(self, name: str) -> str:
+        # Exports list category names, falling back to the id for unnamed ones
+        if name in self.ids:
+            return name
+        existing = self.by_name.get(name)
+        return existing[0] if existing else self._create(name, None)
+
+def _write_batch(db: Session, batch: List[dict], categories: CategoryResolver, directory_categories: bool, seen: set) -> int:
+    requested = [item["id"] for item in batch if item["id"]]
+    taken = set()
+    for chunk in chunked(requested):
+        taken.update(row.id for row in db.query(Article.id).filter(Article.id.in_(chunk)))
+
+    articles, links, history = [], [], []
+    for item in batch:
+        article_id = item["id"]
+        if article_id in taken or article_id in seen:
+            # Already imported (e.g. re-importing an export): leave it alone
+            continue
+        article_id = article_id or str(uuid.uuid4())
+        seen.add(article_id)
+
+        category_ids = [categories.for_name(name) for name in item["categories"]]
+        if directory_categories:
+            category_ids.append(categories.for_directory(item["directories"]))
+
+        articles.append({
+            "id": article_id,
+            "title": item["title"],
+            "content": item["content"],
+            "tags": json.dumps(item["tags"]) if item["tags"] else None,
+            "version": item["version"],
+            "created_at": item["created_at"],
+            "updated_at": item["updated_at"],
+        })
+        links.extend(
+            {"article_id": article_id, "category_id": category_id}
+            for category_id in dict.fromkeys(category_ids) if category_id is not None
+        )
+        history.append(history_row(article_id, item["title"], item["content"], item["version"], "created", item["updated_at"]))
+
+    if articles:
+        db.execute(insert(Article), articles)
+        if links:
+            db.execute(insert(article_category_association), links)
+        insert_history(db, history)
+    db.commit()
+    return len(articles)
+
+def _refresh_search_structures(db: Session):
+    content_generation.bump()
+    if article_index.loaded:
+        article_index.load(db)
+    if title_index.loaded:
+        title_index.load(db)
+    # Rebuilt lazily from the FTS vocabulary on the next fuzzy search
+    trigram_index.unload()
+
+def import_markdown_tree(db: Session, root: str, workers: Optional[int] = None, batch_size: int = IMPORT_BATCH_SIZE, directory_categories: bool = True, progress=None) -> dict:
+    """Import every Markdown file under root.
+
+    Files are parsed in a process pool while this process is the single
+    writer, inserting parsed rows in large batched transactions. The FTS
+    insert trigger is suspended for the duration and the full-text and token
+    indexes are rebuilt once at the end instead of row by row.
+    """
+    started = time.perf_counter()
+    paths = find_markdown_files(root)
+    categories = CategoryResolver(db)
+    stats = {"files": len(paths), "imported": 0, "skipped": 0, "errors": []}
+
+    connection = db.connection()
+    defer_fts = fts.has_fts_index(db)
+    if defer_fts:
+        # If this process dies before the finally block, create_fts_index
+        # sees the missing trigger on the next startup and rebuilds
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts.FTS_TABLE}_ai")
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts.TRIGRAM_TABLE}_ai")
+        db.commit()
+
+    try:
+        batch, seen = [], set()
+        for parsed in parse_files(paths, root, workers):
+            if "error" in parsed:
+                stats["errors"].append({"path": parsed["path"], "error": parsed["error"]})
+                continue
+            batch.append(parsed)
+            if len(batch) >= batch_size:
+                stats["imported"] += _write_batch(db, batch, categories, directory_categories, seen)
+                batch = []
+                if progress:
+                    progress(stats)
+        stats["imported"] += _write_batch(db, batch, categories, directory_categories, seen)
+    finally:
+        indexing_started = time.perf_counter()
+        db.rollback()
+        if defer_fts:
+            # Seeing the suspended insert triggers, this rebuilds the FTS indexes
+            fts.create_fts_index(None, db.connection())
+            db.commit()
+
+    SearchIndexCRUD.reindex(db, only_missing=True)
+    _refresh_search_structures(db)
+
+    elapsed = time.perf_counter() - started
+    stats["skipped"] = len(paths) - stats["imported"] - len(stats["errors"])
+    stats["categories_created"] = categories.created
+    stats["seconds"] = round(elapsed, 3)
+    stats["index_seconds"] = round(time.perf_counter() - indexing_started, 3)
+    stats["files_per_second"] = round(len(paths) / elapsed, 1) if elapsed > 0 else None
+    return stats
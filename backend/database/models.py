@@ -1,22 +1,37 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import event, Index, Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean, LargeBinary
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from .database import Base
+from ..search.fts import create_fts_index, drop_fts_index
 
 # Association table for many-to-many relationship between articles and categories
 article_category_association = Table(
     'article_categories',
     Base.metadata,
     Column('article_id', String, ForeignKey('articles.id'), primary_key=True),
-    Column('category_id', String, ForeignKey('categories.id'), primary_key=True)
+    Column('category_id', String, ForeignKey('categories.id'), primary_key=True),
+    # The primary key leads with article_id; counts and listings go by category
+    Index('ix_article_categories_category_id', 'category_id', 'article_id')
 )
 
+EXCERPT_LENGTH = 200
+
+def make_excerpt(content: str) -> str:
+    if content is None:
+        return None
+    return content[:EXCERPT_LENGTH] + "..." if len(content) > EXCERPT_LENGTH else content
+
+def excerpt_default(context) -> str:
+    # Covers Core inserts (e.g. bulk loads) that bypass the ORM validator below
+    return make_excerpt(context.get_current_parameters().get("content"))
+
 class Article(Base):
     __tablename__ = "articles"
     
     id = Column(String, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
     content = Column(Text, nullable=False)
+    excerpt = Column(Text, nullable=True, default=excerpt_default)  # List view preview, kept in sync with content
     tags = Column(Text, nullable=True)  # JSON string of tags
     version = Column(Integer, default=1)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -25,6 +40,20 @@ class Article(Base):
     # Relationships
     categories = relationship("Category", secondary=article_category_association, back_populates="articles")
     history = relationship("ArticleHistory", back_populates="article", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pagination of the article list (most recently updated first)
+        Index("ix_articles_updated_at_id", "updated_at", "id"),
+    )
+    
+    @validates("content")
+    def update_excerpt(self, key, content):
+        self.excerpt = make_excerpt(content)
+        return content
+
+# Keep the FTS5 search index alongside the articles table
+event.listen(Article.__table__, "after_create", create_fts_index)
+event.listen(Article.__table__, "before_drop", drop_fts_index)
 
 class Category(Base):
     __tablename__ = "categories"
@@ -48,20 +77,45 @@ class ArticleHistory(Base):
     id = Column(String, primary_key=True, index=True)
     article_id = Column(String, ForeignKey('articles.id'), nullable=False)
     title = Column(String, nullable=False)
-    content = Column(Text, nullable=False)
+    content = Column(Text, nullable=False)  # Full text, a delta against base_id (see history.py), or '' when in a blob
     version = Column(Integer, nullable=False)
     change_type = Column(String, nullable=False)  # 'created', 'updated', 'deleted'
+    base_id = Column(String, nullable=True)  # History row the delta applies to; NULL for full snapshots
+    depth = Column(Integer, nullable=True)  # Deltas between this row and its snapshot
+    size = Column(Integer, nullable=True)  # UTF-8 bytes of the full content, so listings never touch it
+    blob_hash = Column(String, nullable=True, index=True)  # Snapshot text stored in content_blobs
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     article = relationship("Article", back_populates="history")
+    
+    __table_args__ = (
+        # An article's versions, newest first, and single-version lookups
+        Index("ix_article_history_article_id_version", "article_id", "version"),
+    )
 
 class SearchIndex(Base):
     __tablename__ = "search_index"
     
     id = Column(String, primary_key=True, index=True)
-    article_id = Column(String, ForeignKey('articles.id'), nullable=False)
+    article_id = Column(String, ForeignKey('articles.id'), nullable=False, unique=True, index=True)
     title_tokens = Column(Text, nullable=False)  # Tokenized title for search
     content_tokens = Column(Text, nullable=False)  # Tokenized content for search
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+class ContentBlob(Base):
+    __tablename__ = "content_blobs"
+    
+    hash = Column(String, primary_key=True)  # SHA-256 of the UTF-8 text, so identical bodies share a row
+    data = Column(LargeBinary, nullable=False)  # zlib-compressed UTF-8 text
+    size = Column(Integer, nullable=False)  # Uncompressed bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CategoryClosure(Base):
+    # Every (ancestor, descendant) pair of the category tree, each category with itself at depth 0
+    __tablename__ = "category_closure"
+    
+    ancestor_id = Column(String, ForeignKey('categories.id'), primary_key=True)
+    descendant_id = Column(String, ForeignKey('categories.id'), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
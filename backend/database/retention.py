@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, List, Optional, Set
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.orm import Session
+from .models import ArticleHistory
+from .history import load_history_rows, reencode_rows, rewrite_rows, content_size
+from .blobs import collect_garbage, unreferenced_bytes
+from ..utils.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Pages released per PRAGMA incremental_vacuum step
+VACUUM_STEP_PAGES = 256
+
+class RetentionPolicy:
+    """Keep every version for keep_all_days, then the newest per day until daily_days, then the newest per week.
+
+    An article's newest history row is always kept.
+    """
+
+    def __init__(self, keep_all_days: int = 7, daily_days: int = 90):
+        self.keep_all_days = keep_all_days
+        self.daily_days = max(daily_days, keep_all_days)
+
+    @classmethod
+    def from_settings(cls) -> "RetentionPolicy":
+        return cls(
+            keep_all_days=get_setting("history", "retention", "keep_all_days", default=7),
+            daily_days=get_setting("history", "retention", "daily_days", default=90),
+        )
+
+    def cutoffs(self, now: datetime):
+        return now - timedelta(days=self.keep_all_days), now - timedelta(days=self.daily_days)
+
+    def bucket(self, created_at: datetime, now: datetime) -> Optional[Hashable]:
+        """The period a version competes in for survival, or None when it is kept regardless"""
+        keep_all, daily = self.cutoffs(now)
+        if created_at >= keep_all:
+            return None
+        if created_at >= daily:
+            return ("day", created_at.strftime("%Y-%m-%d"))
+        # Same week numbering as SQLite's strftime('%W'), used to find candidates
+        return ("week", created_at.strftime("%Y-%W"))
+
+    def kept_ids(self, rows: list, now: datetime) -> Set[str]:
+        """Ids to keep among one article's rows, given in version order"""
+        kept = {rows[-1].id}
+        newest: Dict[Hashable, str] = {}
+        for row in rows:
+            bucket = self.bucket(row.created_at, now)
+            if bucket is None:
+                kept.add(row.id)
+            else:
+                # Later rows in version order replace earlier ones
+                newest[bucket] = row.id
+        kept.update(newest.values())
+        return kept
+
+def candidate_articles(db: Session, policy: RetentionPolicy, now: datetime, after: str, limit: int) -> List[str]:
+    """Articles holding two or more versions in one retention bucket, i.e. something to prune"""
+    keep_all, daily = policy.cutoffs(now)
+    created_at = ArticleHistory.created_at
+    bucket = case(
+        (created_at >= daily, func.strftime("%Y-%m-%d", created_at)),
+        else_=func.strftime("week %Y-%W", created_at)
+    )
+    buckets = select(ArticleHistory.article_id).where(
+        created_at < keep_all, ArticleHistory.article_id > after
+    ).group_by(ArticleHistory.article_id, bucket).having(func.count() > 1).subquery()
+    return list(db.execute(
+        select(buckets.c.article_id).distinct().order_by(buckets.c.article_id).limit(limit)
+    ).scalars())
+
+def prune_articles(db: Session, article_ids: List[str], policy: RetentionPolicy, now: datetime, stats: dict):
+    """Delete expired versions of the given articles, re-encoding the survivors so no delta loses its base"""
+    rows, contents = load_history_rows(db, article_ids)
+    by_article: Dict[str, list] = {}
+    for row in rows:
+        by_article.setdefault(row.article_id, []).append(row)
+
+    kept_rows, expired = [], []
+    for article_rows in by_article.values():
+        kept = policy.kept_ids(article_rows, now)
+        for row in article_rows:
+            (kept_rows if row.id in kept else expired).append(row)
+    if not expired:
+        return
+
+    encoding = {"bytes_before": 0, "bytes_after": 0}
+    updates, blobs = reencode_rows(kept_rows, contents, encoding)
+    blob_bytes_added = rewrite_rows(db, updates, blobs)
+    expired_ids = [row.id for row in expired]
+    for start in range(0, len(expired_ids), 500):
+        db.execute(delete(ArticleHistory).where(ArticleHistory.id.in_(expired_ids[start:start + 500])))
+
+    stats["articles"] += len({row.article_id for row in expired})
+    stats["rows_deleted"] += len(expired)
+    stats["rows_rewritten"] += len(updates)
+    # Inline bytes actually removed or rewritten; blobs freed by the expired
+    # rows are counted when run_retention collects them
+    inline = {row.id: row.content for row in kept_rows}
+    stats["bytes_reclaimed"] += (
+        sum(content_size(row.content) for row in expired)
+        + sum(content_size(inline[update["entry_id"]]) - content_size(update["new_content"]) for update in updates)
+        - blob_bytes_added
+    )
+
+def incremental_vacuum(db: Session, pause: float = 0.0, should_stop: Callable[[], bool] = lambda: False) -> int:
+    """Return free pages to the filesystem in small steps; bytes freed, 0 unless auto_vacuum is INCREMENTAL"""
+    connection = db.connection()
+    if connection.dialect.name != "sqlite" or connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+        return 0
+    page_size = connection.exec_driver_sql("PRAGMA page_size").scalar()
+    free_pages = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+    freed = 0
+    while free_pages and not should_stop():
+        # Each step of the pragma frees one page, and the driver's execute() only
+        # steps once; executescript() runs it to completion
+        connection.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES});")
+        db.commit()
+        connection = db.connection()
+        remaining = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+        if remaining >= free_pages:
+            break
+        freed += (free_pages - remaining) * page_size
+        free_pages = remaining
+        if pause:
+            time.sleep(pause)
+    return freed
+
+def run_retention(db: Session, policy: Optional[RetentionPolicy] = None, batch_size: int = 50, pause: float = 0.05, now: Optional[datetime] = None, should_stop: Callable[[], bool] = lambda: False) -> dict:
+    """One retention pass: prune a batch of articles per short transaction, drop unreferenced blobs, then vacuum incrementally"""
+    policy = policy or RetentionPolicy.from_settings()
+    # History timestamps are naive UTC
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+    stats = {"articles": 0, "rows_deleted": 0, "rows_rewritten": 0, "blobs_deleted": 0, "bytes_reclaimed": 0, "file_bytes_freed": 0}
+
+    last_article_id = ""
+    while not should_stop():
+        article_ids = candidate_articles(db, policy, now, last_article_id, batch_size)
+        if not article_ids:
+            break
+        prune_articles(db, article_ids, policy, now, stats)
+        db.commit()
+        last_article_id = article_ids[-1]
+        # Give request handlers a turn at the write lock
+        if pause:
+            time.sleep(pause)
+
+    if not should_stop():
+        # Also catches blobs orphaned by deleted articles and rewritten snapshots
+        stats["bytes_reclaimed"] += unreferenced_bytes(db)
+        stats["blobs_deleted"] = collect_garbage(db)
+        db.commit()
+    # Re-encoding can outgrow what a pass frees; that is nothing reclaimed, not a negative amount
+    stats["bytes_reclaimed"] = max(stats["bytes_reclaimed"], 0)
+    if stats["rows_deleted"] or stats["blobs_deleted"]:
+        stats["file_bytes_freed"] = incremental_vacuum(db, pause=pause, should_stop=should_stop)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+class RetentionJob:
+    """Runs history retention periodically in a worker thread, started and stopped by the app lifespan"""
+
+    def __init__(self, session_factory: Callable[[], Session], policy: Optional[RetentionPolicy] = None, interval_seconds: float = 3600, startup_delay_seconds: float = 60, batch_size: int = 50):
+        self.session_factory = session_factory
+        self.policy = policy or RetentionPolicy.from_settings()
+        self.interval_seconds = interval_seconds
+        self.startup_delay_seconds = startup_delay_seconds
+        self.batch_size = batch_size
+        self.last_run: Optional[dict] = None
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, session_factory: Callable[[], Session]) -> "RetentionJob":
+        return cls(
+            session_factory,
+            interval_seconds=get_setting("history", "retention", "interval_minutes", default=60) * 60,
+            startup_delay_seconds=get_setting("history", "retention", "startup_delay_seconds", default=60),
+            batch_size=get_setting("history", "retention", "batch_size", default=50),
+        )
+
+    def run_once(self) -> dict:
+        db = self.session_factory()
+        try:
+            return run_retention(db, self.policy, batch_size=self.batch_size, should_stop=self._stop.is_set)
+        finally:
+            db.close()
+
+    async def _loop(self):
+        await asyncio.sleep(self.startup_delay_seconds)
+        while not self._stop.is_set():
+            try:
+                self.last_run = await asyncio.to_thread(self.run_once)
+                logger.info(
+                    "History retention: deleted %(rows_deleted)d rows from %(articles)d articles, "
+                    "rewrote %(rows_rewritten)d, dropped %(blobs_deleted)d blobs, reclaimed %(bytes_reclaimed)d bytes "
+                    "(%(file_bytes_freed)d bytes of file) in %(seconds)ss", self.last_run
+                )
+            except Exception:
+                logger.exception("History retention failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        self._stop.clear()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        # The flag ends a pass in progress after its current batch
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -2,10 +2,20 @@ from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
-from database.database import get_db, create_tables
+from backend.database.database import get_db, create_tables, SessionLocal
+from backend.database.crud import SearchIndexCRUD
+from backend.database.retention import RetentionJob
+from backend.search.inverted_index import article_index
+from backend.search.suggestions import title_index
+from backend.search.trigram import trigram_index
+from backend.utils.settings import get_setting
+from backend.utils.cursor import NEXT_CURSOR_HEADER
+from backend.utils.responses import FastJSONResponse
+from backend.utils.compression import CompressionMiddleware, compressed_cache
 from backend.routes.articles import router as articles_router
 from backend.routes.search import router as search_router
 from backend.routes.categories import router as categories_router
+from backend.routes.export import router as export_router
 from contextlib import asynccontextmanager
 import logging
 
@@ -18,9 +28,30 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Creating database tables...")
     create_tables()
+    db = SessionLocal()
+    try:
+        indexed = SearchIndexCRUD.reindex(db, only_missing=True)
+        if indexed:
+            logger.info(f"Indexed {indexed} articles missing from the search index")
+        title_index.load(db)
+        if get_setting("search", "in_memory_index", default=False):
+            logger.info("Loading in-memory search index...")
+            article_index.load(db)
+            logger.info(f"In-memory search index ready ({len(article_index)} articles)")
+    finally:
+        db.close()
+    retention_job = None
+    if get_setting("history", "retention", "enabled", default=True):
+        retention_job = RetentionJob.from_settings(SessionLocal)
+        retention_job.start()
     yield
     # Shutdown
     logger.info("Shutting down...")
+    if retention_job is not None:
+        await retention_job.stop()
+    article_index.unload()
+    title_index.unload()
+    trigram_index.unload()
 
 # Create FastAPI app
 app = FastAPI(
@@ -30,6 +61,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
@@ -40,12 +72,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+if get_setting("compression", "enabled", default=True):
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=get_setting("compression", "minimum_size", default=1024),
+        gzip_level=get_setting("compression", "gzip_level", default=6),
+        brotli_quality=get_setting("compression", "brotli_quality", default=5),
+        cache=compressed_cache,
+    )
+
 # Include routers
 app.include_router(articles_router, prefix="/api/v1/articles", tags=["articles"])
 app.include_router(search_router, prefix="/api/v1/search", tags=["search"])
 app.include_router(categories_router, prefix="/api/v1/categories", tags=["categories"])
+app.include_router(export_router, prefix="/api/v1/export", tags=["export"])
 
 @app.get("/")
 async def root():
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 from datetime import datetime
 
 class ArticleBase(BaseModel):
@@ -17,6 +17,25 @@ class ArticleUpdate(BaseModel):
     tags: Optional[List[str]] = None
     categories: Optional[List[str]] = None
 
+BULK_MAX_ITEMS = 5000
+
+class ArticleBulkUpdate(ArticleUpdate):
+    id: str
+
+class ArticleBulkDelete(BaseModel):
+    ids: List[str] = Field(..., max_length=BULK_MAX_ITEMS)
+
+class BulkItemResult(BaseModel):
+    index: int  # position in the request array
+    id: Optional[str] = None
+    status: str  # 'created', 'updated', 'deleted', 'error' or 'skipped' (atomic batches with errors)
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    results: List[BulkItemResult]
+    succeeded: int
+    failed: int
+
 class ArticleResponse(BaseModel):
     id: str
     title: str
@@ -38,10 +57,21 @@ class ArticleHistoryResponse(BaseModel):
     version: int
     change_type: str
     created_at: datetime
+    size: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class ArticleHistorySummary(BaseModel):
+    """History listing entry: everything but the content"""
+    id: str
+    article_id: str
+    title: str
+    version: int
+    change_type: str
+    created_at: datetime
+    size: Optional[int] = None
+
 class ArticleListResponse(BaseModel):
     id: str
     title: str
@@ -56,7 +86,54 @@ class ArticleListResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ArticleSummary(BaseModel):
+    """Sparse article projection: only the fields requested via `fields=` are set"""
+    id: str
+    title: Optional[str] = None
+    content: Optional[str] = None
+    excerpt: Optional[str] = None
+    tags: Optional[List[str]] = None
+    version: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    categories: Optional[List['CategoryResponse']] = None
+
+    class Config:
+        from_attributes = True
+
+class ArticleSearchHit(BaseModel):
+    id: str
+    title: str
+    tags: Optional[List[str]] = None
+    version: int
+    created_at: datetime
+    updated_at: datetime
+    categories: Optional[List['CategoryResponse']] = None
+    snippet: str
+    highlights: List[Tuple[int, int]] = []  # [start, end) offsets into snippet
+    title_highlights: List[Tuple[int, int]] = []  # [start, end) offsets into title
+
+    class Config:
+        from_attributes = True
+
+class FacetCount(BaseModel):
+    value: str
+    label: str
+    count: int
+
+class SearchFacets(BaseModel):
+    categories: Optional[List[FacetCount]] = None
+    tags: Optional[List[FacetCount]] = None
+
+class SearchResultsResponse(BaseModel):
+    items: Union[List[ArticleListResponse], List[ArticleSummary], List[ArticleSearchHit]]
+    facets: SearchFacets
+    next_cursor: Optional[str] = None
+
 # Import here to avoid circular imports
 from .category import CategoryResponse
 ArticleResponse.model_rebuild()
-ArticleListResponse.model_rebuild()
\ No newline at end of file
+ArticleListResponse.model_rebuild()
+ArticleSummary.model_rebuild()
+ArticleSearchHit.model_rebuild()
+SearchResultsResponse.model_rebuild()
\ No newline at end of file
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple, Union
 from ..database.database import get_db
-from ..database.crud import ArticleCRUD
+from ..database.crud import ArticleCRUD, ARTICLE_FIELDS
+from ..database.models import make_excerpt
+from ..utils.cursor import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from ..utils.responses import FastJSONResponse
+from ..utils.http_cache import article_etag, article_last_modified, is_not_modified, validator_headers
 from ..models.article import (
     ArticleCreate, 
     ArticleUpdate, 
     ArticleResponse, 
     ArticleListResponse,
-    ArticleHistoryResponse
+    ArticleHistoryResponse,
+    ArticleHistorySummary,
+    ArticleSummary,
+    ArticleBulkUpdate,
+    ArticleBulkDelete,
+    BulkResponse,
+    BULK_MAX_ITEMS
 )
 import json
 
@@ -21,28 +32,81 @@ async def create_article(
 ):
     try:
         db_article = ArticleCRUD.create_article(db, article)
-        return format_article_response(db_article)
+        return FastJSONResponse(format_article_response(db_article))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/", response_model=List[ArticleListResponse])
+@router.get("/", response_model=Union[List[ArticleListResponse], List[ArticleSummary]])
 async def get_articles(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; takes precedence over skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,excerpt,tags,categories"),
     db: Session = Depends(get_db)
 ):
-    articles = ArticleCRUD.get_articles(db, skip=skip, limit=limit)
-    return [format_article_list_response(article) for article in articles]
+    requested_fields = parse_fields(fields)
+    try:
+        articles, next_cursor = ArticleCRUD.get_articles_page(
+            db, skip=skip, limit=limit, cursor=decode_cursor(cursor), fields=requested_fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {NEXT_CURSOR_HEADER: encode_cursor(next_cursor)} if next_cursor is not None else None
+    return FastJSONResponse(format_article_list(articles, requested_fields), headers=headers)
+
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_create_articles(
+    items: List[Any] = Body(..., max_length=BULK_MAX_ITEMS),
+    atomic: bool = Query(False, description="Write nothing if any item fails"),
+    db: Session = Depends(get_db)
+):
+    valid, errors = validate_bulk_items(items, ArticleCreate)
+    if atomic and errors:
+        return format_bulk_response(errors + skipped_results(valid))
+    return format_bulk_response(errors + ArticleCRUD.bulk_create_articles(db, valid))
 
-@router.get("/{article_id}", response_model=ArticleResponse)
+@router.put("/bulk", response_model=BulkResponse)
+async def bulk_update_articles(
+    items: List[Any] = Body(..., max_length=BULK_MAX_ITEMS),
+    atomic: bool = Query(False, description="Write nothing if any item fails"),
+    db: Session = Depends(get_db)
+):
+    valid, errors = validate_bulk_items(items, ArticleBulkUpdate)
+    if atomic and errors:
+        return format_bulk_response(errors + skipped_results(valid))
+    results = ArticleCRUD.bulk_update_articles(db, [(index, item.id, item) for index, item in valid], atomic=atomic)
+    return format_bulk_response(errors + results)
+
+@router.post("/bulk/delete", response_model=BulkResponse)
+async def bulk_delete_articles(
+    request: ArticleBulkDelete,
+    atomic: bool = Query(False, description="Write nothing if any item fails"),
+    db: Session = Depends(get_db)
+):
+    return format_bulk_response(ArticleCRUD.bulk_delete_articles(db, request.ids, atomic=atomic))
+
+@router.get("/{article_id}", response_model=ArticleResponse, responses={304: {"description": "Not modified since the version in If-None-Match"}})
 async def get_article(
     article_id: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
+    if if_none_match is not None or if_modified_since is not None:
+        # Revalidation only needs the version and timestamp, never the body
+        validator = ArticleCRUD.get_article_validator(db, article_id)
+        if not validator:
+            raise HTTPException(status_code=404, detail="Article not found")
+        version, updated_at, categories = validator
+        etag = article_etag(article_id, version, categories)
+        last_modified = article_last_modified(updated_at, categories)
+        if is_not_modified(if_none_match, if_modified_since, etag, last_modified):
+            return Response(status_code=304, headers=validator_headers(etag, last_modified))
+    
     article = ArticleCRUD.get_article(db, article_id)
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
-    return format_article_response(article)
+    return FastJSONResponse(format_article_response(article), headers=article_validator_headers(article))
 
 @router.put("/{article_id}", response_model=ArticleResponse)
 async def update_article(
@@ -53,7 +117,7 @@ async def update_article(
     article = ArticleCRUD.update_article(db, article_id, article_update)
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
-    return format_article_response(article)
+    return FastJSONResponse(format_article_response(article), headers=article_validator_headers(article))
 
 @router.delete("/{article_id}")
 async def delete_article(
@@ -64,87 +128,187 @@ async def delete_article(
         raise HTTPException(status_code=404, detail="Article not found")
     return {"message": "Article deleted successfully"}
 
-@router.get("/{article_id}/history", response_model=List[ArticleHistoryResponse])
+@router.get("/{article_id}/history", response_model=List[ArticleHistorySummary])
 async def get_article_history(
     article_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; takes precedence over skip"),
     db: Session = Depends(get_db)
 ):
     # First check if article exists
-    article = ArticleCRUD.get_article(db, article_id)
-    if not article:
+    if not ArticleCRUD.get_article_validator(db, article_id):
         raise HTTPException(status_code=404, detail="Article not found")
     
-    history = ArticleCRUD.get_article_history(db, article_id)
-    return history
+    try:
+        history, next_cursor = ArticleCRUD.get_article_history_page(
+            db, article_id, skip=skip, limit=limit, cursor=decode_cursor(cursor)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {NEXT_CURSOR_HEADER: encode_cursor(next_cursor)} if next_cursor is not None else None
+    return FastJSONResponse([format_history_summary(entry) for entry in history], headers=headers)
 
-def format_article_response(article) -> ArticleResponse:
-    tags = []
-    if article.tags:
-        try:
-            tags = json.loads(article.tags)
-        except json.JSONDecodeError:
-            tags = []
-    
-    categories = []
-    if article.categories:
-        categories = [
-            {
-                "id": cat.id,
-                "name": cat.name,
-                "description": cat.description,
-                "color": cat.color,
-                "parent_id": cat.parent_id,
-                "created_at": cat.created_at,
-                "updated_at": cat.updated_at
-            }
-            for cat in article.categories
-        ]
-    
-    return ArticleResponse(
-        id=article.id,
-        title=article.title,
-        content=article.content,
-        tags=tags,
-        version=article.version,
-        created_at=article.created_at,
-        updated_at=article.updated_at,
-        categories=categories
-    )
-
-def format_article_list_response(article) -> ArticleListResponse:
-    tags = []
-    if article.tags:
+@router.get("/{article_id}/history/{version}", response_model=ArticleHistoryResponse)
+async def get_article_version(
+    article_id: str,
+    version: int,
+    db: Session = Depends(get_db)
+):
+    entry = ArticleCRUD.get_article_version(db, article_id, version)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return FastJSONResponse(format_history_entry(entry))
+
+def validate_bulk_items(items: List[Any], model) -> Tuple[list, List[dict]]:
+    """(index, parsed item) pairs for valid items, and per-item error results for the rest"""
+    valid, errors = [], []
+    for index, item in enumerate(items):
         try:
-            tags = json.loads(article.tags)
-        except json.JSONDecodeError:
-            tags = []
+            valid.append((index, model.model_validate(item)))
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            errors.append({
+                "index": index,
+                "id": item.get("id") if isinstance(item, dict) else None,
+                "status": "error",
+                "error": f"{location}: {error['msg']}" if location else error["msg"]
+            })
+    return valid, errors
+
+def skipped_results(valid: list) -> List[dict]:
+    return [{"index": index, "id": getattr(item, "id", None), "status": "skipped"} for index, item in valid]
+
+def format_bulk_response(results: List[dict]) -> FastJSONResponse:
+    results = sorted(results, key=lambda result: result["index"])
+    failed = sum(1 for result in results if result["status"] == "error")
+    succeeded = sum(1 for result in results if result["status"] not in ("error", "skipped"))
+    return FastJSONResponse({"results": results, "succeeded": succeeded, "failed": failed})
+
+def article_validator_headers(article) -> dict:
+    categories = [(category.id, category.parent_id, category.updated_at) for category in article.categories]
+    return validator_headers(article_etag(article.id, article.version, categories), article_last_modified(article.updated_at, categories))
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Validated `fields=` list; id is always included"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in ARTICLE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field: {unknown[0]}")
+    return list(dict.fromkeys(["id"] + requested))
+
+def parse_tags(article) -> List[str]:
+    if not article.tags:
+        return []
+    try:
+        return json.loads(article.tags)
+    except json.JSONDecodeError:
+        return []
+
+def format_categories(article) -> List[dict]:
+    if not article.categories:
+        return []
+    return [
+        {
+            "id": cat.id,
+            "name": cat.name,
+            "description": cat.description,
+            "color": cat.color,
+            "parent_id": cat.parent_id,
+            "created_at": cat.created_at,
+            "updated_at": cat.updated_at,
+            "children": None
+        }
+        for cat in article.categories
+    ]
+
+def format_article_response(article) -> dict:
+    tags = parse_tags(article)
+    categories = format_categories(article)
     
-    categories = []
-    if article.categories:
-        categories = [
-            {
-                "id": cat.id,
-                "name": cat.name,
-                "description": cat.description,
-                "color": cat.color,
-                "parent_id": cat.parent_id,
-                "created_at": cat.created_at,
-                "updated_at": cat.updated_at
-            }
-            for cat in article.categories
-        ]
+    return {
+        "id": article.id,
+        "title": article.title,
+        "content": article.content,
+        "tags": tags,
+        "version": article.version,
+        "created_at": article.created_at,
+        "updated_at": article.updated_at,
+        "categories": categories
+    }
+
+def format_article_list_response(article) -> dict:
+    tags = parse_tags(article)
+    categories = format_categories(article)
     
-    # Create excerpt from content
-    excerpt = article.content[:200] + "..." if len(article.content) > 200 else article.content
+    excerpt = article.excerpt if article.excerpt is not None else make_excerpt(article.content)
     
-    return ArticleListResponse(
-        id=article.id,
-        title=article.title,
-        content=article.content,
-        tags=tags,
-        version=article.version,
-        created_at=article.created_at,
-        updated_at=article.updated_at,
-        categories=categories,
-        excerpt=excerpt
-    )
\ No newline at end of file
+    return {
+        "id": article.id,
+        "title": article.title,
+        "content": article.content,
+        "tags": tags,
+        "version": article.version,
+        "created_at": article.created_at,
+        "updated_at": article.updated_at,
+        "categories": categories,
+        "excerpt": excerpt
+    }
+
+def format_article_summary(article, fields: List[str]) -> dict:
+    # Only touches the requested attributes; the rest were never loaded
+    values = {}
+    for field in fields:
+        if field == "tags":
+            values[field] = parse_tags(article)
+        elif field == "categories":
+            values[field] = format_categories(article)
+        else:
+            values[field] = getattr(article, field)
+    return values
+
+def format_article_list(articles, fields: Optional[List[str]] = None) -> list:
+    if fields is None:
+        return [format_article_list_response(article) for article in articles]
+    return [format_article_summary(article, fields) for article in articles]
+
+def format_search_hit(article, snippet: str, highlights, title_highlights) -> dict:
+    # Deliberately never touches article.content, which may be deferred
+    return {
+        "id": article.id,
+        "title": article.title,
+        "tags": parse_tags(article),
+        "version": article.version,
+        "created_at": article.created_at,
+        "updated_at": article.updated_at,
+        "categories": format_categories(article),
+        "snippet": snippet,
+        "highlights": highlights,
+        "title_highlights": title_highlights
+    }
+
+def format_history_entry(entry) -> dict:
+    return {
+        "id": entry.id,
+        "article_id": entry.article_id,
+        "title": entry.title,
+        "content": entry.content,
+        "version": entry.version,
+        "change_type": entry.change_type,
+        "created_at": entry.created_at,
+        "size": entry.size
+    }
+
+def format_history_summary(entry) -> dict:
+    return {
+        "id": entry.id,
+        "article_id": entry.article_id,
+        "title": entry.title,
+        "version": entry.version,
+        "change_type": entry.change_type,
+        "created_at": entry.created_at,
+        "size": entry.size
+    }
\ No newline at end of file
@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 from ..database.database import get_db
-from ..database.crud import CategoryCRUD
+from ..database.crud import ArticleCRUD, CategoryCRUD
+from ..models.article import ArticleListResponse, ArticleSummary
+from ..routes.articles import format_article_list, parse_fields
+from ..utils.cursor import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from ..utils.responses import FastJSONResponse
 from ..models.category import (
     CategoryCreate, 
     CategoryUpdate, 
@@ -19,7 +23,7 @@ async def create_category(
 ):
     try:
         db_category = CategoryCRUD.create_category(db, category)
-        return format_category_response(db_category)
+        return FastJSONResponse(format_category_response(db_category))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -30,14 +34,15 @@ async def get_categories(
     db: Session = Depends(get_db)
 ):
     categories = CategoryCRUD.get_categories(db, skip=skip, limit=limit)
-    return [format_category_list_response(category) for category in categories]
+    counts = CategoryCRUD.get_article_counts(db, [category.id for category in categories])
+    return FastJSONResponse([format_category_list_response(category, counts.get(category.id, 0)) for category in categories])
 
 @router.get("/roots", response_model=List[CategoryResponse])
 async def get_root_categories(
     db: Session = Depends(get_db)
 ):
     categories = CategoryCRUD.get_root_categories(db)
-    return [format_category_response(category) for category in categories]
+    return FastJSONResponse([format_category_response(category) for category in categories])
 
 @router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(
@@ -47,7 +52,29 @@ async def get_category(
     category = CategoryCRUD.get_category(db, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    return format_category_response(category)
+    return FastJSONResponse(format_category_response(CategoryCRUD.get_category_tree(db, category)))
+
+@router.get("/{category_id}/articles", response_model=Union[List[ArticleListResponse], List[ArticleSummary]])
+async def get_category_articles(
+    category_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; takes precedence over skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,excerpt,tags,categories"),
+    db: Session = Depends(get_db)
+):
+    # Everything filed in this category or any category below it
+    if not CategoryCRUD.get_category(db, category_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+    requested_fields = parse_fields(fields)
+    try:
+        articles, next_cursor = ArticleCRUD.get_articles_page(
+            db, skip=skip, limit=limit, cursor=decode_cursor(cursor), fields=requested_fields, category_id=category_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {NEXT_CURSOR_HEADER: encode_cursor(next_cursor)} if next_cursor is not None else None
+    return FastJSONResponse(format_article_list(articles, requested_fields), headers=headers)
 
 @router.put("/{category_id}", response_model=CategoryResponse)
 async def update_category(
@@ -55,10 +82,13 @@ async def update_category(
     category_update: CategoryUpdate,
     db: Session = Depends(get_db)
 ):
-    category = CategoryCRUD.update_category(db, category_id, category_update)
+    try:
+        category = CategoryCRUD.update_category(db, category_id, category_update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    return format_category_response(category)
+    return FastJSONResponse(format_category_response(CategoryCRUD.get_category_tree(db, category)))
 
 @router.delete("/{category_id}")
 async def delete_category(
@@ -69,32 +99,32 @@ async def delete_category(
         raise HTTPException(status_code=404, detail="Category not found")
     return {"message": "Category deleted successfully"}
 
-def format_category_response(category) -> CategoryResponse:
+def format_category_response(category) -> dict:
+    # Expects children already attached (CategoryCRUD.get_root_categories / get_category_tree),
+    # otherwise every node lazy-loads its own
     children = []
     if category.children:
         children = [format_category_response(child) for child in category.children]
     
-    return CategoryResponse(
-        id=category.id,
-        name=category.name,
-        description=category.description,
-        color=category.color,
-        parent_id=category.parent_id,
-        created_at=category.created_at,
-        updated_at=category.updated_at,
-        children=children
-    )
+    return {
+        "id": category.id,
+        "name": category.name,
+        "description": category.description,
+        "color": category.color,
+        "parent_id": category.parent_id,
+        "created_at": category.created_at,
+        "updated_at": category.updated_at,
+        "children": children
+    }
 
-def format_category_list_response(category) -> CategoryListResponse:
-    article_count = len(category.articles) if category.articles else 0
-    
-    return CategoryListResponse(
-        id=category.id,
-        name=category.name,
-        description=category.description,
-        color=category.color,
-        parent_id=category.parent_id,
-        created_at=category.created_at,
-        updated_at=category.updated_at,
-        article_count=article_count
-    )
\ No newline at end of file
+def format_category_list_response(category, article_count: int = 0) -> dict:
+    return {
+        "id": category.id,
+        "name": category.name,
+        "description": category.description,
+        "color": category.color,
+        "parent_id": category.parent_id,
+        "created_at": category.created_at,
+        "updated_at": category.updated_at,
+        "article_count": article_count
+    }
\ No newline at end of file
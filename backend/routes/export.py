@@ -0,0 +1,36 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from ..database.database import get_db
+from ..database.export import export_ndjson, export_zip
+
+router = APIRouter()
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "zip": "application/zip",
+}
+
+@router.get("/")
+async def export_wiki(
+    format: str = Query("ndjson", pattern="^(ndjson|zip)$", description="'ndjson' for one JSON object per line, 'zip' for Markdown files with front-matter"),
+    history: bool = Query(True, description="Include article history"),
+    db: Session = Depends(get_db)
+):
+    filename = f"wiki-export-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_export(db, format, history),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def stream_export(db: Session, format: str, include_history: bool):
+    # The request's session is closed once the endpoint returns, before the
+    # body is streamed, so the export reads through its own session
+    session = Session(bind=db.get_bind())
+    try:
+        export = export_zip if format == "zip" else export_ndjson
+        yield from export(session, include_history=include_history)
+    finally:
+        session.close()
@@ -1,22 +1,74 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 from ..database.database import get_db
-from ..database.crud import ArticleCRUD
-from ..models.article import ArticleListResponse
-from ..routes.articles import format_article_list_response
+from ..database.crud import ArticleCRUD, CategoryCRUD, FACETS
+from ..models.article import ArticleListResponse, ArticleSearchHit, ArticleSummary, SearchResultsResponse
+from ..routes.articles import format_article_list, format_search_hit, parse_fields
+from ..search.snippets import terms_pattern, find_highlights
+from ..search.tokenizer import unique_tokens
+from ..search.cache import search_cache
+from ..utils.cursor import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from ..utils.responses import FastJSONResponse
+from ..search.suggestions import title_index
 
 router = APIRouter()
 
-@router.get("/articles", response_model=List[ArticleListResponse])
+@router.get("/articles", response_model=Union[List[ArticleListResponse], List[ArticleSummary], List[ArticleSearchHit], SearchResultsResponse])
 async def search_articles(
     q: str = Query(..., min_length=1, description="Search query"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; takes precedence over skip"),
+    mode: str = Query("full", pattern="^(full|snippet)$", description="'snippet' returns a query-centred snippet with highlight offsets instead of content"),
+    fuzzy: bool = Query(False, description="Tolerate misspelled terms, ranking closer spellings first"),
+    facets: Optional[str] = Query(None, description="Comma-separated facets to count over all hits: categories, tags"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return in full mode, e.g. title,excerpt,tags"),
+    category: Optional[str] = Query(None, description="Only articles in this category or any category below it"),
     db: Session = Depends(get_db)
 ):
-    articles = ArticleCRUD.search_articles(db, q, skip=skip, limit=limit)
-    return [format_article_list_response(article) for article in articles]
+    requested_facets = [facet.strip() for facet in facets.split(",") if facet.strip()] if facets else []
+    unknown = [facet for facet in requested_facets if facet not in FACETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown facet: {unknown[0]}")
+    requested_fields = parse_fields(fields)
+    if requested_fields is not None and mode == "snippet":
+        raise HTTPException(status_code=400, detail="fields is not supported in snippet mode")
+    if category is not None and not CategoryCRUD.get_category(db, category):
+        raise HTTPException(status_code=404, detail="Category not found")
+    
+    try:
+        position = decode_cursor(cursor)
+        if mode == "snippet":
+            hits, next_cursor = ArticleCRUD.search_article_snippets(db, q, skip=skip, limit=limit, fuzzy=fuzzy, cursor=position, category_id=category)
+        elif fuzzy:
+            articles, next_cursor = ArticleCRUD.search_articles_fuzzy(db, q, skip=skip, limit=limit, cursor=position, fields=requested_fields, category_id=category)
+        else:
+            articles, next_cursor = ArticleCRUD.search_articles_page(db, q, skip=skip, limit=limit, cursor=position, fields=requested_fields, category_id=category)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    encoded_cursor = encode_cursor(next_cursor) if next_cursor is not None else None
+    headers = {NEXT_CURSOR_HEADER: encoded_cursor} if encoded_cursor is not None else None
+    
+    if mode == "snippet":
+        pattern = terms_pattern(unique_tokens(q))
+        items = [
+            format_search_hit(article, snippet, highlights, find_highlights(article.title, pattern))
+            for article, snippet, highlights in hits
+        ]
+    else:
+        items = format_article_list(articles, requested_fields)
+    
+    if not requested_facets:
+        return FastJSONResponse(items, headers=headers)
+    
+    # Facets are opt-in so plain searches keep returning a bare list
+    return FastJSONResponse({
+        "items": items,
+        "facets": ArticleCRUD.search_facets(db, q, requested_facets, fuzzy=fuzzy, category_id=category),
+        "next_cursor": encoded_cursor
+    }, headers=headers)
 
 @router.get("/suggestions")
 async def get_search_suggestions(
@@ -24,15 +76,18 @@ async def get_search_suggestions(
     limit: int = Query(10, ge=1, le=20),
     db: Session = Depends(get_db)
 ):
-    # This is a simple implementation - in production you might want to use a proper search engine
-    articles = ArticleCRUD.search_articles(db, q, skip=0, limit=limit)
+    title_index.ensure_loaded(db)
     
     suggestions = []
-    for article in articles:
+    for article_id, title in title_index.suggest(q, limit=limit):
         suggestions.append({
-            "id": article.id,
-            "title": article.title,
+            "id": article_id,
+            "title": title,
             "type": "article"
         })
     
-    return {"suggestions": suggestions}
\ No newline at end of file
+    return {"suggestions": suggestions}
+
+@router.get("/cache")
+async def get_search_cache_stats():
+    return search_cache.stats()
\ No newline at end of file
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+import threading
+import time
+from ..utils.settings import get_setting
+
+class ContentGeneration:
+    """Counter bumped by every article write; cached results from older generations are stale"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+content_generation = ContentGeneration()
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+class SearchCache:
+    """LRU + TTL cache of search results, versioned by the content generation"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0, generation: ContentGeneration = content_generation):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._generation = generation
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if self.max_size <= 0:
+            return compute()
+
+        generation = self._generation.value
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, entry_generation, expires_at = entry
+                if entry_generation == generation and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            # Don't store a result computed while a write bumped the generation
+            if self._generation.value == generation:
+                self._entries[key] = (value, generation, now + self.ttl_seconds)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "generation": self._generation.value,
+            }
+
+search_cache = SearchCache(
+    max_size=get_setting("search", "cache_size", default=1024),
+    ttl_seconds=get_setting("search", "cache_ttl_seconds", default=300),
+)
@@ -0,0 +1,292 @@
+from sqlalchemy import text, bindparam, select, column, literal_column, false, String
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+from .snippets import MATCH_START, MATCH_END, ELLIPSIS, FTS_SNIPPET_TOKENS
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "articles_fts"
+FTS_VOCAB_TABLE = "articles_fts_vocab"
+TRIGRAM_TABLE = "articles_fts_trigram"
+TRIGRAM_VOCAB_TABLE = "articles_fts_trigram_vocab"
+TRIGRAM_SOURCE_VIEW = "articles_fts_trigram_source"
+
+# Fragments shorter than a trigram expand to the indexed trigrams they start
+# with; very common one-character fragments are cut off at this many
+FRAGMENT_EXPANSION_LIMIT = 1000
+
+# Title matches weigh more than body matches in the BM25 ranking
+BM25_WEIGHTS = (10.0, 1.0)
+
+# Articles filed under :category_id or any category below it (see database/category_tree.py)
+SUBTREE_ARTICLES_SQL = (
+    "SELECT article_categories.article_id FROM category_closure "
+    "JOIN article_categories ON article_categories.category_id = category_closure.descendant_id "
+    "WHERE category_closure.ancestor_id = :category_id"
+)
+
+# External-content FTS5 table: the index lives in articles_fts, the text stays in articles
+FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content,
+        content='articles', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON articles BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.rowid, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON articles BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.rowid, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content ON articles BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.rowid, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.rowid, new.title, new.content);
+    END
+    """,
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')",
+]
+
+# Substring index: every three-character window of title and body, so
+# fragments from inside words and unsegmented CJK text match without a
+# LIKE scan. The view pads each field with two spaces, giving a one- or
+# two-character fragment at the very end of a field a trigram to start.
+TRIGRAM_DDL = [
+    f"""
+    CREATE VIEW IF NOT EXISTS {TRIGRAM_SOURCE_VIEW} AS
+    SELECT rowid AS article_rowid, title || '  ' AS title, content || '  ' AS content FROM articles
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TRIGRAM_TABLE} USING fts5(
+        title, content,
+        content='{TRIGRAM_SOURCE_VIEW}', content_rowid='article_rowid',
+        tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TRIGRAM_TABLE}_ai AFTER INSERT ON articles BEGIN
+        INSERT INTO {TRIGRAM_TABLE}(rowid, title, content)
+        VALUES (new.rowid, new.title || '  ', new.content || '  ');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TRIGRAM_TABLE}_ad AFTER DELETE ON articles BEGIN
+        INSERT INTO {TRIGRAM_TABLE}({TRIGRAM_TABLE}, rowid, title, content)
+        VALUES ('delete', old.rowid, old.title || '  ', old.content || '  ');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TRIGRAM_TABLE}_au AFTER UPDATE OF title, content ON articles BEGIN
+        INSERT INTO {TRIGRAM_TABLE}({TRIGRAM_TABLE}, rowid, title, content)
+        VALUES ('delete', old.rowid, old.title || '  ', old.content || '  ');
+        INSERT INTO {TRIGRAM_TABLE}(rowid, title, content)
+        VALUES (new.rowid, new.title || '  ', new.content || '  ');
+    END
+    """,
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TRIGRAM_VOCAB_TABLE} USING fts5vocab({TRIGRAM_TABLE}, 'row')",
+]
+
+FTS_DROP_DDL = [
+    f"DROP TABLE IF EXISTS {TRIGRAM_VOCAB_TABLE}",
+    f"DROP TRIGGER IF EXISTS {TRIGRAM_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {TRIGRAM_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {TRIGRAM_TABLE}_au",
+    f"DROP TABLE IF EXISTS {TRIGRAM_TABLE}",
+    f"DROP VIEW IF EXISTS {TRIGRAM_SOURCE_VIEW}",
+    f"DROP TABLE IF EXISTS {FTS_VOCAB_TABLE}",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+def fts5_available(connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    try:
+        connection.exec_driver_sql("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS temp.fts5_probe")
+        return True
+    except Exception:
+        return False
+
+def trigram_tokenizer_available(connection) -> bool:
+    """The trigram tokenizer ships with SQLite 3.34 and later"""
+    try:
+        connection.exec_driver_sql("CREATE VIRTUAL TABLE IF NOT EXISTS temp.trigram_probe USING fts5(x, tokenize='trigram')")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS temp.trigram_probe")
+        return True
+    except Exception:
+        return False
+
+def schema_object_exists(connection, kind: str, name: str) -> bool:
+    row = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (kind, name)
+    ).first()
+    return row is not None
+
+def fts_index_exists(connection) -> bool:
+    return schema_object_exists(connection, "table", FTS_TABLE)
+
+def trigram_index_exists(connection) -> bool:
+    return schema_object_exists(connection, "table", TRIGRAM_TABLE)
+
+def insert_trigger_exists(connection) -> bool:
+    if trigram_index_exists(connection) and not schema_object_exists(connection, "trigger", f"{TRIGRAM_TABLE}_ai"):
+        return False
+    return schema_object_exists(connection, "trigger", f"{FTS_TABLE}_ai")
+
+def create_fts_index(target, connection, **kw):
+    """Create the FTS5 indexes and their sync triggers; no-op when FTS5 is unavailable"""
+    if not fts5_available(connection):
+        logger.info("SQLite FTS5 is not available, search falls back to the search_index token table")
+        return
+    with_trigram = trigram_tokenizer_available(connection)
+    if not with_trigram:
+        logger.info("SQLite has no trigram tokenizer, search only matches words from their start")
+    # A bulk import suspends the insert triggers until it has rebuilt the index;
+    # finding a table without them means such an import never finished
+    in_sync = (
+        fts_index_exists(connection) and insert_trigger_exists(connection)
+        and (trigram_index_exists(connection) or not with_trigram)
+    )
+    for statement in FTS_DDL + (TRIGRAM_DDL if with_trigram else []):
+        connection.exec_driver_sql(statement)
+    if not in_sync:
+        rebuild_fts_index(connection)
+
+def drop_fts_index(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in FTS_DROP_DDL:
+        connection.exec_driver_sql(statement)
+
+def rebuild_fts_index(connection):
+    """Re-read every article into the indexes, e.g. after a VACUUM renumbered rowids"""
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    if trigram_index_exists(connection):
+        connection.exec_driver_sql(f"INSERT INTO {TRIGRAM_TABLE}({TRIGRAM_TABLE}) VALUES ('rebuild')")
+
+def has_fts_index(db: Session) -> bool:
+    connection = db.connection()
+    return connection.dialect.name == "sqlite" and fts_index_exists(connection)
+
+def has_trigram_index(db: Session) -> bool:
+    connection = db.connection()
+    return connection.dialect.name == "sqlite" and trigram_index_exists(connection)
+
+def vocabulary(db: Session) -> Iterable[str]:
+    """Every distinct term in the index, straight from FTS5's term list"""
+    for row in db.execute(text(f"SELECT term FROM {FTS_VOCAB_TABLE}")):
+        yield row[0]
+
+def build_match_expression(query: str) -> Optional[str]:
+    # Every term must match (AND), each as a quoted prefix phrase so user input
+    # can never be interpreted as FTS5 query syntax
+    phrases = []
+    for term in query.split():
+        term = term.replace('"', '""')
+        if term.strip('"'):
+            phrases.append(f'"{term}"*')
+    return " AND ".join(phrases) if phrases else None
+
+def quote_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+def build_substring_expression(db: Session, query: str) -> Optional[str]:
+    """Trigram MATCH requiring every whitespace-separated fragment as a substring"""
+    groups = []
+    for fragment in query.lower().split():
+        if len(fragment) >= 3:
+            groups.append(quote_phrase(fragment))
+            continue
+        trigrams = db.execute(
+            text(f"SELECT term FROM {TRIGRAM_VOCAB_TABLE} WHERE term >= :low AND term < :high LIMIT :limit"),
+            {"low": fragment, "high": fragment + chr(0x10FFFF), "limit": FRAGMENT_EXPANSION_LIMIT},
+        ).scalars().all()
+        if not trigrams:
+            return None
+        groups.append("(" + " OR ".join(quote_phrase(trigram) for trigram in trigrams) + ")")
+    return " AND ".join(groups) if groups else None
+
+def search_ranked(db: Session, query: str, skip: int = 0, limit: int = 50, after: Optional[Tuple[float, str]] = None, category_id: Optional[str] = None) -> List[Tuple[str, float]]:
+    """(article id, bm25 score) pairs, best first; `after` resumes behind a previous (score, id)"""
+    return ranked_matches(db, FTS_TABLE, build_match_expression(query), skip=skip, limit=limit, after=after, category_id=category_id)
+
+def search_substring_ranked(db: Session, query: str, skip: int = 0, limit: int = 50, after: Optional[Tuple[float, str]] = None, category_id: Optional[str] = None) -> List[Tuple[str, float]]:
+    """Like search_ranked, but over the trigram index so query words match anywhere inside words"""
+    return ranked_matches(db, TRIGRAM_TABLE, build_substring_expression(db, query), skip=skip, limit=limit, after=after, category_id=category_id)
+
+def ranked_matches(db: Session, table: str, match: Optional[str], skip: int = 0, limit: int = 50, after: Optional[Tuple[float, str]] = None, category_id: Optional[str] = None) -> List[Tuple[str, float]]:
+    if match is None:
+        return []
+    params = {"match": match, "limit": limit, "skip": skip}
+    within = ""
+    if category_id is not None:
+        within = f"AND articles.id IN ({SUBTREE_ARTICLES_SQL})"
+        params["category_id"] = category_id
+    keyset = ""
+    if after is not None:
+        keyset = "WHERE score > :after_score OR (score = :after_score AND id > :after_id) "
+        params.update(after_score=after[0], after_id=after[1])
+    rows = db.execute(
+        text(
+            "SELECT id, score FROM ("
+            f"SELECT articles.id AS id, bm25({table}, {BM25_WEIGHTS[0]}, {BM25_WEIGHTS[1]}) AS score "
+            f"FROM {table} "
+            f"JOIN articles ON articles.rowid = {table}.rowid "
+            f"WHERE {table} MATCH :match {within}"
+            ") "
+            f"{keyset}"
+            "ORDER BY score, id "
+            "LIMIT :limit OFFSET :skip"
+        ),
+        params,
+    )
+    return [(row[0], row[1]) for row in rows]
+
+def match_select(query: str):
+    """SELECT of the ids of every matching article, for use as a subquery"""
+    return matches_select(FTS_TABLE, build_match_expression(query))
+
+def substring_match_select(db: Session, query: str):
+    return matches_select(TRIGRAM_TABLE, build_substring_expression(db, query))
+
+def matches_select(table: str, match: Optional[str]):
+    if match is None:
+        return select(literal_column("NULL").label("id")).where(false())
+    return text(
+        f"SELECT articles.id AS id FROM {table} "
+        f"JOIN articles ON articles.rowid = {table}.rowid "
+        f"WHERE {table} MATCH :match"
+    ).columns(column("id", String)).bindparams(match=match)
+
+def search_snippets(db: Session, query: str, article_ids: List[str]) -> Dict[str, str]:
+    """Marked content snippets for already-ranked hits; bodies never leave SQLite"""
+    match = build_match_expression(query)
+    if match is None or not article_ids:
+        return {}
+    rows = db.execute(
+        text(
+            f"SELECT articles.id, snippet({FTS_TABLE}, 1, :start, :end, :ellipsis, {FTS_SNIPPET_TOKENS}) "
+            f"FROM {FTS_TABLE} "
+            f"JOIN articles ON articles.rowid = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match AND articles.id IN :article_ids"
+        ).bindparams(bindparam("article_ids", expanding=True)),
+        {
+            "match": match, "article_ids": article_ids,
+            "start": MATCH_START, "end": MATCH_END, "ellipsis": ELLIPSIS,
+        },
+    )
+    return {row[0]: row[1] for row in rows}
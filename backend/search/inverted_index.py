@@ -0,0 +1,176 @@
+from array import array
+from bisect import bisect_left, insort
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Set
+import threading
+from .tokenizer import unique_tokens, tokenize
+
+# Rebuild posting lists once this share of doc ids belongs to replaced/deleted articles
+COMPACT_RATIO = 0.25
+
+def intersect(left: array, right: array) -> array:
+    """Intersect two ascending posting lists, galloping through the longer one"""
+    if len(left) > len(right):
+        left, right = right, left
+    result = array("I")
+    position = 0
+    for doc_id in left:
+        position = bisect_left(right, doc_id, position)
+        if position == len(right):
+            break
+        if right[position] == doc_id:
+            result.append(doc_id)
+            position += 1
+    return result
+
+class InvertedIndex:
+    """In-process term -> doc id index for single-node deployments.
+
+    Doc ids are dense integers handed out in write order, so appending a new
+    document keeps every posting list sorted. Updating an article gives it a
+    fresh doc id and tombstones the old one; tombstoned ids are skipped at
+    query time and dropped when the index is compacted.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._postings: Dict[str, array] = {}
+        self._terms: List[str] = []  # sorted vocabulary for prefix lookups
+        self._doc_ids: Dict[str, int] = {}
+        self._article_ids: List[Optional[str]] = []
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def load(self, db: Session, batch_size: int = 1000):
+        from ..database.models import Article
+
+        with self._lock:
+            self._reset()
+            # Load in updated_at order so doc id order matches write order
+            query = db.query(Article.id, Article.title, Article.content, Article.updated_at)
+            last = None
+            while True:
+                page = query
+                if last is not None:
+                    page = page.filter(tuple_(Article.updated_at, Article.id) > last)
+                rows = page.order_by(Article.updated_at, Article.id).limit(batch_size).all()
+                if not rows:
+                    break
+                for row in rows:
+                    self._add(row.id, row.title, row.content, sort_terms=False)
+                last = (rows[-1].updated_at, rows[-1].id)
+            self._terms = sorted(self._postings)
+            self.loaded = True
+
+    def unload(self):
+        with self._lock:
+            self._reset()
+            self.loaded = False
+
+    def add_article(self, article_id: str, title: str, content: str):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(article_id)
+            self._add(article_id, title, content)
+            self._maybe_compact()
+
+    def remove_article(self, article_id: str):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(article_id)
+            self._maybe_compact()
+
+    def search(self, query: str, skip: int = 0, limit: int = 50, allowed: Optional[Set[str]] = None) -> List[str]:
+        """Article ids containing every query term as a token prefix, most recently written first.
+
+        allowed, when given, restricts the results to those ids.
+        """
+        terms = unique_tokens(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            postings = [self._prefix_postings(term) for term in terms]
+            postings.sort(key=len)
+            matches = postings[0]
+            for posting in postings[1:]:
+                if not matches:
+                    break
+                matches = intersect(matches, posting)
+
+            article_ids = []
+            for doc_id in reversed(matches):
+                article_id = self._article_ids[doc_id]
+                if article_id is None or (allowed is not None and article_id not in allowed):
+                    continue
+                article_ids.append(article_id)
+                if len(article_ids) >= skip + limit:
+                    break
+            return article_ids[skip:]
+
+    def _add(self, article_id: str, title: str, content: str, sort_terms: bool = True):
+        doc_id = len(self._article_ids)
+        self._article_ids.append(article_id)
+        self._doc_ids[article_id] = doc_id
+        for term in dict.fromkeys(tokenize(title) + tokenize(content)):
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = array("I")
+                if sort_terms:
+                    insort(self._terms, term)
+            posting.append(doc_id)
+
+    def _remove(self, article_id: str):
+        doc_id = self._doc_ids.pop(article_id, None)
+        if doc_id is not None:
+            self._article_ids[doc_id] = None
+            self._tombstones += 1
+
+    def _prefix_postings(self, prefix: str) -> array:
+        matched = []
+        position = bisect_left(self._terms, prefix)
+        while position < len(self._terms) and self._terms[position].startswith(prefix):
+            matched.append(self._postings[self._terms[position]])
+            position += 1
+        if len(matched) == 1:
+            return matched[0]
+        merged = set()
+        for posting in matched:
+            merged.update(posting)
+        return array("I", sorted(merged))
+
+    def _maybe_compact(self):
+        if self._tombstones > len(self._article_ids) * COMPACT_RATIO:
+            self._compact()
+
+    def _compact(self):
+        # Renumber live documents densely, preserving their relative order
+        remap = {}
+        article_ids = []
+        for doc_id, article_id in enumerate(self._article_ids):
+            if article_id is not None:
+                remap[doc_id] = len(article_ids)
+                article_ids.append(article_id)
+
+        postings = {}
+        for term, posting in self._postings.items():
+            compacted = array("I", (remap[doc_id] for doc_id in posting if doc_id in remap))
+            if compacted:
+                postings[term] = compacted
+
+        self._postings = postings
+        self._terms = sorted(postings)
+        self._article_ids = article_ids
+        self._doc_ids = {article_id: doc_id for doc_id, article_id in enumerate(article_ids)}
+        self._tombstones = 0
+
+article_index = InvertedIndex()
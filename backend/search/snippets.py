@@ -0,0 +1,75 @@
+import re
+from typing import List, Optional, Pattern, Tuple
+
+# Markers passed to FTS5 snippet(); control characters never appear in article text
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+ELLIPSIS = "…"
+
+SNIPPET_WIDTH = 160
+FTS_SNIPPET_TOKENS = 32
+
+Highlight = Tuple[int, int]
+
+def terms_pattern(terms: List[str]) -> Optional[Pattern]:
+    """Case-insensitive pattern matching any term as a word prefix"""
+    if not terms:
+        return None
+    alternatives = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\w*", re.IGNORECASE)
+
+def substring_pattern(terms: List[str]) -> Optional[Pattern]:
+    """Case-insensitive pattern matching any term anywhere, for hits found by substring search"""
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+
+def find_highlights(text: str, pattern: Optional[Pattern]) -> List[Highlight]:
+    if pattern is None or not text:
+        return []
+    return [(match.start(), match.end()) for match in pattern.finditer(text)]
+
+def make_snippet(text: str, pattern: Optional[Pattern], width: int = SNIPPET_WIDTH) -> Tuple[str, List[Highlight]]:
+    """Cut a window of text centred on the first match, with match offsets into it"""
+    first = pattern.search(text) if pattern is not None else None
+    anchor = first.start() if first else 0
+
+    start = max(0, anchor - width // 3)
+    end = min(len(text), start + width)
+    start = max(0, min(start, end - width))
+    # Don't cut words in half at either edge
+    if start > 0:
+        space = text.find(" ", start, anchor)
+        if space != -1:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(" ", first.end() if first else start, end)
+        if space != -1:
+            end = space
+
+    prefix = ELLIPSIS if start > 0 else ""
+    suffix = ELLIPSIS if end < len(text) else ""
+    snippet = prefix + text[start:end] + suffix
+    highlights = [
+        (match_start + len(prefix), match_end + len(prefix))
+        for match_start, match_end in find_highlights(text[start:end], pattern)
+    ]
+    return snippet, highlights
+
+def parse_marked_snippet(marked: str) -> Tuple[str, List[Highlight]]:
+    """Strip FTS5 snippet() markers, returning the text and the marked offsets"""
+    parts = []
+    highlights = []
+    length = 0
+    match_start = None
+    for piece in re.split(f"([{MATCH_START}{MATCH_END}])", marked):
+        if piece == MATCH_START:
+            match_start = length
+        elif piece == MATCH_END:
+            if match_start is not None:
+                highlights.append((match_start, length))
+            match_start = None
+        else:
+            parts.append(piece)
+            length += len(piece)
+    return "".join(parts), highlights
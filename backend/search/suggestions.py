@@ -0,0 +1,109 @@
+from bisect import bisect_left, insort
+from sqlalchemy.orm import Session
+from typing import Dict, List, Tuple
+import threading
+
+def normalize_title(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def word_suffixes(key: str) -> List[str]:
+    """'getting started guide' -> ['started guide', 'guide']"""
+    words = key.split(" ")
+    return [" ".join(words[i:]) for i in range(1, len(words))]
+
+class TitleIndex:
+    """Sorted title keys for autocomplete, answered with bisect.
+
+    Titles whose start matches the prefix rank first, then titles where a
+    later word starts with it. Only ids and titles are held, never content.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._titles: Dict[str, str] = {}
+        self._full: List[Tuple[str, str]] = []  # (normalized title, article id)
+        self._words: List[Tuple[str, str]] = []  # (normalized title from word n>0, article id)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def load(self, db: Session):
+        from ..database.models import Article
+
+        with self._lock:
+            self._reset()
+            for article_id, title in db.query(Article.id, Article.title):
+                self._titles[article_id] = title
+                key = normalize_title(title)
+                self._full.append((key, article_id))
+                self._words.extend((suffix, article_id) for suffix in word_suffixes(key))
+            self._full.sort()
+            self._words.sort()
+            self.loaded = True
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            self.load(db)
+
+    def unload(self):
+        with self._lock:
+            self._reset()
+            self.loaded = False
+
+    def set_title(self, article_id: str, title: str):
+        if not self.loaded:
+            return
+        with self._lock:
+            if self._titles.get(article_id) == title:
+                return
+            self._remove(article_id)
+            self._titles[article_id] = title
+            key = normalize_title(title)
+            insort(self._full, (key, article_id))
+            for suffix in word_suffixes(key):
+                insort(self._words, (suffix, article_id))
+
+    def remove(self, article_id: str):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(article_id)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """(article id, title) pairs whose title or a word in it starts with prefix"""
+        prefix = normalize_title(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            matches: Dict[str, str] = {}
+            for entries in (self._full, self._words):
+                position = bisect_left(entries, (prefix,))
+                while len(matches) < limit and position < len(entries):
+                    key, article_id = entries[position]
+                    if not key.startswith(prefix):
+                        break
+                    matches.setdefault(article_id, self._titles[article_id])
+                    position += 1
+            return list(matches.items())
+
+    def _remove(self, article_id: str):
+        title = self._titles.pop(article_id, None)
+        if title is None:
+            return
+        key = normalize_title(title)
+        self._delete_entry(self._full, (key, article_id))
+        for suffix in word_suffixes(key):
+            self._delete_entry(self._words, (suffix, article_id))
+
+    @staticmethod
+    def _delete_entry(entries: List[Tuple[str, str]], entry: Tuple[str, str]):
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+title_index = TitleIndex()
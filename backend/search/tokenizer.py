@@ -0,0 +1,25 @@
+import re
+from typing import Iterable, List
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Scripts written without spaces between words: kana, CJK ideographs, hangul.
+# Neither this tokenizer nor FTS5's unicode61 splits a run of them into words
+UNSEGMENTED_PATTERN = re.compile("[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af\uff66-\uff9f]")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens, in order of appearance"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+def has_unsegmented_text(text: str) -> bool:
+    """True when text contains a script whose words only a substring match can find"""
+    return UNSEGMENTED_PATTERN.search(text) is not None
+
+def unique_tokens(text: str) -> List[str]:
+    return list(dict.fromkeys(tokenize(text)))
+
+def serialize_tokens(tokens: Iterable[str]) -> str:
+    # Space-delimited on both ends so "% term%" matches a token prefix
+    # and "% term %" matches a whole token
+    return " " + " ".join(tokens) + " "
@@ -0,0 +1,133 @@
+from array import array
+from collections import Counter
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Set, Tuple
+import threading
+from .tokenizer import tokenize, unique_tokens
+
+SIMILARITY_THRESHOLD = 0.3
+CANDIDATES_PER_TERM = 3
+MAX_VARIANTS = 5
+
+def trigrams(term: str) -> Set[str]:
+    # Padded like pg_trgm so word starts and short words still yield trigrams
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """Trigram -> term id postings over the vocabulary of all titles and bodies.
+
+    Typo candidates are looked up per query term by trigram overlap, so the
+    work depends on vocabulary size rather than on the number of articles.
+    Terms are only ever added; a term whose last article was deleted just
+    produces a candidate without hits.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._terms: List[str] = []
+        self._term_ids: Dict[str, int] = {}
+        self._sizes = array("H")
+        self._postings: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def load(self, db: Session):
+        with self._lock:
+            self._reset()
+            for term in self._vocabulary(db):
+                self._add_term(term)
+            self.loaded = True
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            self.load(db)
+
+    def unload(self):
+        with self._lock:
+            self._reset()
+            self.loaded = False
+
+    def add_text(self, *texts: str):
+        if not self.loaded:
+            return
+        with self._lock:
+            for text in texts:
+                for term in tokenize(text):
+                    if term not in self._term_ids:
+                        self._add_term(term)
+
+    def similar(self, term: str, limit: int = CANDIDATES_PER_TERM, threshold: float = SIMILARITY_THRESHOLD) -> List[Tuple[str, float]]:
+        """Vocabulary terms ranked by trigram Jaccard similarity to term"""
+        grams = trigrams(term)
+        with self._lock:
+            shared = Counter()
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    shared.update(posting)
+
+            scored = []
+            for term_id, count in shared.items():
+                similarity = count / (len(grams) + self._sizes[term_id] - count)
+                if similarity >= threshold:
+                    scored.append((self._terms[term_id], similarity))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def query_variants(self, query: str, max_variants: int = MAX_VARIANTS) -> List[Tuple[str, float]]:
+        """Spelling variants of a query, best first, scored by the product of term similarities"""
+        # Beam search over the terms: the best variants always extend one of the
+        # best partial variants, so keeping max_variants of them per step is
+        # exact and costs terms * max_variants * candidates, not candidates ** terms
+        beam: List[Tuple[List[str], float]] = [([], 1.0)]
+        for term in unique_tokens(query):
+            # The term as typed always stays a candidate: it may still match as a prefix
+            candidates = [(term, 1.0)] + [c for c in self.similar(term) if c[0] != term]
+            beam = [
+                (terms + [candidate], score * similarity)
+                for terms, score in beam
+                for candidate, similarity in candidates[:CANDIDATES_PER_TERM + 1]
+            ]
+            beam.sort(key=lambda item: -item[1])
+            del beam[max_variants:]
+
+        if len(beam) == 1 and not beam[0][0]:
+            return []
+        return [(" ".join(terms), score) for terms, score in beam]
+
+    def _add_term(self, term: str):
+        term_id = len(self._terms)
+        self._terms.append(term)
+        self._term_ids[term] = term_id
+        grams = trigrams(term)
+        self._sizes.append(min(len(grams), 0xFFFF))
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array("I")
+            posting.append(term_id)
+
+    @staticmethod
+    def _vocabulary(db: Session) -> Iterable[str]:
+        from . import fts
+        from ..database.models import SearchIndex
+
+        if fts.has_fts_index(db):
+            yield from fts.vocabulary(db)
+            return
+
+        # Without FTS5, collect the vocabulary from the pre-tokenized rows
+        seen = set()
+        for title_tokens, content_tokens in db.query(SearchIndex.title_tokens, SearchIndex.content_tokens).yield_per(500):
+            for term in (title_tokens + content_tokens).split():
+                if term not in seen:
+                    seen.add(term)
+                    yield term
+
+trigram_index = TrigramIndex()
@@ -0,0 +1,225 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .settings import get_setting
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+
+# Bodies this large are compressed off the event loop
+THREAD_THRESHOLD = 64 * 1024
+
+def negotiate_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """Best supported content-coding for an Accept-Encoding header: br, then gzip"""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            weights[coding.strip().lower()] = quality
+
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli_available else ["gzip"]
+    best = max(candidates, key=lambda coding: weights.get(coding, wildcard))
+    return best if weights.get(best, wildcard) > 0 else None
+
+def is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
+
+class StreamCompressor:
+    """Incremental gzip/brotli encoder that flushes after each chunk, so streamed lines arrive promptly"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self.compress = lambda data: self._compressor.process(data) + self._compressor.flush()
+            self.finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self.compress = lambda data: self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self._compressor.flush
+
+def compress_body(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by (path, body digest, encoding), bounded by entries and bytes.
+
+    Only responses carrying an ETag are cached, but the key is a digest of the
+    uncompressed body rather than the ETag: a weak ETag only promises an
+    equivalent representation, not identical bytes, and the path carries no
+    query string, so (path, ETag) alone could hand one body's compressed
+    bytes to a different body.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple[str, str, str], body: bytes):
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+class CompressionMiddleware:
+    """gzip/brotli response compression above a size threshold.
+
+    Whole responses are compressed in one go (from the cache when they carry an
+    ETag); streaming responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5, cache: Optional[CompressedCache] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressionResponder(self, scope, encoding, send)(receive)
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, encoding: str, send: Send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.streaming: Optional[StreamCompressor] = None
+        self.passthrough = False
+
+    async def __call__(self, receive: Receive):
+        await self.middleware.app(self.scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Hold the headers back until the first body chunk shows the size
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        if self.streaming is not None:
+            body = self.streaming.compress(message.get("body", b""))
+            if not message.get("more_body", False):
+                body += self.streaming.finish()
+            await self.send({"type": "http.response.body", "body": body, "more_body": message.get("more_body", False)})
+            return
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not is_compressible(headers) or self.start_message["status"] in (204, 304) or (not more_body and len(body) < self.middleware.minimum_size):
+            self.passthrough = True
+            await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+        if more_body:
+            del headers["Content-Length"]
+            self.streaming = StreamCompressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": self.streaming.compress(body), "more_body": True})
+            return
+
+        compressed = await self.compress(body, headers.get("etag"))
+        headers["Content-Length"] = str(len(compressed))
+        await self.send(self.start_message)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    async def compress(self, body: bytes, etag: Optional[str]) -> bytes:
+        cache = self.middleware.cache
+        key = None
+        if cache is not None and etag and self.scope["method"] == "GET" and self.start_message["status"] == 200:
+            key = (self.scope["path"], hashlib.blake2b(body, digest_size=16).hexdigest(), self.encoding)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        encode: Callable[[], bytes] = lambda: compress_body(body, self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+        compressed = await anyio.to_thread.run_sync(encode) if len(body) >= THREAD_THRESHOLD else encode()
+
+        if key is not None:
+            cache.put(key, compressed)
+        return compressed
+
+compressed_cache = CompressedCache(
+    max_entries=get_setting("compression", "cache_entries", default=256),
+    max_bytes=get_setting("compression", "cache_max_bytes", default=16 * 1024 * 1024),
+)
@@ -0,0 +1,23 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(position: dict) -> str:
+    """Pack a keyset position into an opaque, URL-safe token"""
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
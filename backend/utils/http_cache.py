@@ -0,0 +1,61 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Tuple
+
+# (id, parent_id, updated_at) of a category embedded in the article body
+CategoryStamp = Tuple[str, Optional[str], Optional[datetime]]
+
+def article_etag(article_id: str, version: int, categories: Iterable[CategoryStamp] = ()) -> str:
+    # Weak: the representation is the same across content-codings (gzip etc.)
+    stamps = sorted((str(stamp[0]), str(stamp[1]), str(stamp[2])) for stamp in categories)
+    if not stamps:
+        return f'W/"{article_id}-{version}"'
+    # Category edits change the body without bumping the article version
+    digest = hashlib.blake2b(repr(stamps).encode(), digest_size=8).hexdigest()
+    return f'W/"{article_id}-{version}-{digest}"'
+
+def article_last_modified(updated_at: Optional[datetime], categories: Iterable[CategoryStamp] = ()) -> Optional[datetime]:
+    """Newest of the article's and its embedded categories' timestamps"""
+    stamps = [value for value in [updated_at] + [stamp[2] for stamp in categories] if value is not None]
+    return max((_as_utc(value) for value in stamps), default=None)
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    return format_datetime(_as_utc(value).astimezone(timezone.utc), usegmt=True)
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def is_not_modified(if_none_match: Optional[str], if_modified_since: Optional[str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """RFC 7232 evaluation for GET: If-None-Match wins, If-Modified-Since only applies without it"""
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison, as required for If-None-Match
+        return _opaque_tag(etag) in {_opaque_tag(tag) for tag in if_none_match.split(",")}
+
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
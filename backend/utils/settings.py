@@ -0,0 +1,30 @@
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_PATH = Path(__file__).parent.parent.parent / "config" / "settings.json"
+
+@lru_cache(maxsize=1)
+def load_settings() -> dict:
+    # The backend image ships without config/, so a missing file means defaults
+    try:
+        with open(SETTINGS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid settings file {SETTINGS_PATH}: {e}")
+        return {}
+
+def get_setting(*keys: str, default: Any = None) -> Any:
+    """Look up a nested setting, e.g. get_setting("search", "in_memory_index")"""
+    value = load_settings()
+    for key in keys:
+        if not isinstance(value, dict) or key not in value:
+            return default
+        value = value[key]
+    return value
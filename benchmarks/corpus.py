@@ -0,0 +1,179 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import bisect
+import itertools
+import json
+import math
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterator, List, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from backend.database.models import Article, Category, article_category_association
+from backend.database.crud import SearchIndexCRUD
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+VOCABULARY_SIZE = 20_000
+TAG_COUNT = 300
+ROOT_CATEGORIES = 8
+CHILD_CATEGORIES = 5
+BATCH_SIZE = 1000
+
+SYLLABLES = [
+    "ka", "ri", "to", "me", "na", "lo", "su", "vi", "de", "ra", "po", "li", "ne", "sa", "mo",
+    "tu", "ze", "bi", "go", "fa", "ch", "str", "qu", "an", "el", "or", "is", "un", "ex", "ion",
+]
+
+def parse_size(size: str) -> int:
+    return SIZES.get(size.lower()) or int(size)
+
+class CorpusGenerator:
+    """Deterministic synthetic wiki: the same seed always yields the same articles.
+
+    Word and tag frequencies follow a Zipf distribution and article bodies are
+    log-normally sized Markdown, so term selectivity and row sizes resemble a
+    real knowledge base rather than uniform noise.
+    """
+
+    def __init__(self, seed: int = 42, vocabulary_size: int = VOCABULARY_SIZE):
+        self.seed = seed
+        rng = random.Random(seed)
+        words = set()
+        while len(words) < vocabulary_size:
+            words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+        self.words = sorted(words)
+        rng.shuffle(self.words)
+        self._word_weights = list(itertools.accumulate(1.0 / rank for rank in range(1, len(self.words) + 1)))
+
+        self.tags = [f"{self.words[i]}-{self.words[i + 1]}" for i in range(0, TAG_COUNT * 2, 2)]
+        self._tag_weights = list(itertools.accumulate(1.0 / rank for rank in range(1, len(self.tags) + 1)))
+
+        self.categories = []
+        for i in range(ROOT_CATEGORIES):
+            root_id = self._uuid(rng)
+            self.categories.append({"id": root_id, "name": f"Topic {i + 1}", "parent_id": None})
+            for j in range(CHILD_CATEGORIES):
+                self.categories.append({"id": self._uuid(rng), "name": f"Topic {i + 1}.{j + 1}", "parent_id": root_id})
+
+    @staticmethod
+    def _uuid(rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def _pick(self, rng: random.Random, items: list, weights: list, k: int) -> list:
+        total = weights[-1]
+        return [items[bisect.bisect(weights, rng.random() * total)] for _ in range(k)]
+
+    def sentence(self, rng: random.Random, length: int) -> str:
+        words = self._pick(rng, self.words, self._word_weights, length)
+        return " ".join(words).capitalize() + "."
+
+    def markdown(self, rng: random.Random, target_size: int) -> str:
+        parts = []
+        size = 0
+        while size < target_size:
+            kind = rng.random()
+            if kind < 0.15:
+                block = "## " + self.sentence(rng, rng.randint(2, 6))[:-1]
+            elif kind < 0.3:
+                block = "\n".join(f"- {self.sentence(rng, rng.randint(3, 10))}" for _ in range(rng.randint(2, 6)))
+            elif kind < 0.36:
+                lines = [f"{word} = {rng.randint(0, 999)}" for word in self._pick(rng, self.words, self._word_weights, rng.randint(2, 8))]
+                block = "```\n" + "\n".join(lines) + "\n```"
+            else:
+                block = " ".join(self.sentence(rng, rng.randint(6, 20)) for _ in range(rng.randint(2, 6)))
+            parts.append(block)
+            size += len(block) + 2
+        return "\n\n".join(parts)
+
+    def article(self, index: int) -> Tuple[dict, List[str]]:
+        """Article row and category ids for the index-th article"""
+        rng = random.Random(f"{self.seed}:{index}")
+        title = self.sentence(rng, rng.randint(2, 7))[:-1]
+        # Median around 2 KB with a long tail, capped like a very long wiki page
+        size = min(int(rng.lognormvariate(7.6, 0.9)), 60_000)
+        tags = sorted(set(self._pick(rng, self.tags, self._tag_weights, rng.randint(0, 5))))
+        categories = sorted({category["id"] for category in rng.sample(self.categories, rng.choice([0, 1, 1, 1, 2, 2, 3]))})
+        created_at = datetime(2022, 1, 1) + timedelta(seconds=rng.randint(0, 3 * 365 * 86400))
+        updated_at = created_at + timedelta(seconds=rng.randint(0, 90 * 86400)) if rng.random() < 0.4 else created_at
+        row = {
+            "id": self._uuid(rng),
+            "title": f"{title} {index}",
+            "content": f"# {title}\n\n" + self.markdown(rng, size),
+            "tags": json.dumps(tags),
+            "version": 1,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+        return row, categories
+
+    def articles(self, count: int) -> Iterator[Tuple[dict, List[str]]]:
+        for index in range(count):
+            yield self.article(index)
+
+    def queries(self, count: int, seed: int = 0) -> List[str]:
+        """Search queries drawn from the corpus vocabulary: mostly one or two terms, some prefixes"""
+        rng = random.Random(f"{self.seed}:queries:{seed}")
+        queries = []
+        for _ in range(count):
+            # Ranks spread evenly on a log scale, from common words (skipping the
+            # top 20 nobody searches for) down to rare ones with a handful of hits
+            terms = [
+                self.words[int(math.exp(rng.uniform(math.log(20), math.log(len(self.words)))))]
+                for _ in range(rng.choice([1, 1, 2, 2, 3]))
+            ]
+            if rng.random() < 0.2:
+                terms[-1] = terms[-1][:max(2, len(terms[-1]) - 2)]
+            queries.append(" ".join(terms))
+        return queries
+
+def generate_corpus(db: Session, count: int, seed: int = 42, batch_size: int = BATCH_SIZE) -> CorpusGenerator:
+    """Insert count synthetic articles with their categories and search index rows"""
+    generator = CorpusGenerator(seed)
+    db.execute(insert(Category), generator.categories)
+    db.commit()
+
+    articles = generator.articles(count)
+    while True:
+        batch = list(itertools.islice(articles, batch_size))
+        if not batch:
+            break
+        db.execute(insert(Article), [row for row, _ in batch])
+        links = [
+            {"article_id": row["id"], "category_id": category_id}
+            for row, categories in batch for category_id in categories
+        ]
+        if links:
+            db.execute(insert(article_category_association), links)
+        db.commit()
+
+    SearchIndexCRUD.reindex(db, batch_size=batch_size)
+    return generator
+
+if __name__ == "__main__":
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from backend.database.database import Base
+
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic wiki database")
+    parser.add_argument("--size", default="10k", help="10k, 100k, 1m or an article count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", required=True, help="path of the SQLite file to create")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} already exists")
+    engine = create_engine(f"sqlite:///{args.db}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        started = time.perf_counter()
+        generate_corpus(db, parse_size(args.size), seed=args.seed)
+        print(f"Generated {parse_size(args.size)} articles in {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
@@ -0,0 +1,183 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import logging
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from backend.main import app
+from backend.database.database import Base, get_db, add_missing_columns, DATABASE_DIR
+from backend.database.models import Article
+from backend.search.cache import search_cache
+from backend.search.fts import create_fts_index
+from backend.search.suggestions import title_index
+from backend.search.trigram import trigram_index
+from benchmarks.corpus import CorpusGenerator, generate_corpus, parse_size
+
+BENCH_DIR = DATABASE_DIR / "bench"
+
+def percentile_summary(samples: List[float], elapsed: float) -> dict:
+    """Latency percentiles in milliseconds and throughput for one operation"""
+    ordered = sorted(samples)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else None,
+        "min_ms": round(ordered[0] * 1000, 3),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+def measure(operation: Callable[[int], object], requests: int, warmup: int) -> dict:
+    for i in range(warmup):
+        operation(i)
+    samples = []
+    started = time.perf_counter()
+    for i in range(requests):
+        t0 = time.perf_counter()
+        operation(warmup + i)
+        samples.append(time.perf_counter() - t0)
+    return percentile_summary(samples, time.perf_counter() - started)
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def open_corpus(path: Path, count: int, seed: int):
+    """Session on a benchmark database, generating the corpus on first use"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    with engine.begin() as connection:
+        create_fts_index(None, connection)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    existing = db.query(func.count(Article.id)).scalar()
+    if existing == 0:
+        print(f"Generating {count} articles into {path} ...")
+        started = time.perf_counter()
+        generate_corpus(db, count, seed=seed)
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+    elif existing != count:
+        raise SystemExit(f"{path} holds {existing} articles, expected {count}; delete it to regenerate")
+    return db
+
+def run_benchmarks(db, generator: CorpusGenerator, requests: int, warmup: int, use_cache: bool) -> Dict[str, dict]:
+    def override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if not use_cache:
+        search_cache.max_size = 0
+    title_index.load(db)
+    trigram_index.unload()
+
+    queries = generator.queries(requests + warmup)
+    rng = random.Random(generator.seed)
+    article_ids = [row[0] for row in db.query(Article.id).order_by(Article.id).all()]
+    sample_ids = [rng.choice(article_ids) for _ in range(requests + warmup)]
+    prefixes = [query.split()[0][:rng.randint(2, 4)] for query in queries]
+    list_cursor = {"value": None}
+
+    def get(url: str, **params):
+        response = client.get(url, params=params)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}: {response.text[:200]}")
+        return response
+
+    def list_page(i: int, **extra):
+        # Walk the listing with cursors, restarting from the top every 20 pages
+        params = {"limit": 50, **extra}
+        if list_cursor["value"] and i % 20:
+            params["cursor"] = list_cursor["value"]
+        list_cursor["value"] = get("/api/v1/articles/", **params).headers.get("X-Next-Cursor")
+
+    operations = {
+        "search": lambda i: get("/api/v1/search/articles", q=queries[i], limit=20),
+        "search_snippet": lambda i: get("/api/v1/search/articles", q=queries[i], limit=20, mode="snippet"),
+        "suggestions": lambda i: get("/api/v1/search/suggestions", q=prefixes[i]),
+        "list": list_page,
+        "list_summary": lambda i: list_page(i, fields="title,excerpt,tags,categories"),
+        "get_article": lambda i: get(f"/api/v1/articles/{sample_ids[i]}"),
+    }
+
+    results = {}
+    try:
+        for name, operation in operations.items():
+            print(f"  {name} ...")
+            results[name] = measure(operation, requests, warmup)
+    finally:
+        app.dependency_overrides.clear()
+    return results
+
+def compare(results: dict, baseline: dict):
+    print(f"\n{'operation':<16}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}   p95 vs baseline")
+    for name, summary in results["operations"].items():
+        before = baseline.get("operations", {}).get(name)
+        change = f"{(summary['p95_ms'] / before['p95_ms'] - 1) * 100:+.1f}%" if before and before["p95_ms"] else "-"
+        print(f"{name:<16}{summary['p50_ms']:>12}{summary['p95_ms']:>12}{summary['p99_ms']:>12}   {change}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search, suggestions, listing and article fetch")
+    parser.add_argument("--size", default="10k", help="10k, 100k, 1m or an article count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="corpus database (default: data/bench/corpus-<size>-<seed>.db)")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per operation")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--cache", action="store_true", help="keep the search result cache enabled")
+    parser.add_argument("--output", help="results JSON (default: data/bench/results-<size>-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    count = parse_size(args.size)
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    db_path = Path(args.db) if args.db else BENCH_DIR / f"corpus-{args.size.lower()}-{args.seed}.db"
+
+    db = open_corpus(db_path, count, args.seed)
+    try:
+        operations = run_benchmarks(db, CorpusGenerator(args.seed), args.requests, args.warmup, args.cache)
+    finally:
+        db.close()
+
+    started_at = datetime.now(timezone.utc)
+    results = {
+        "timestamp": started_at.isoformat(),
+        "revision": git_revision(),
+        "app_version": app.version,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "corpus": {"articles": count, "seed": args.seed, "database": str(db_path)},
+        "settings": {"requests": args.requests, "warmup": args.warmup, "cache": args.cache},
+        "operations": operations,
+    }
+    output = Path(args.output) if args.output else BENCH_DIR / f"results-{args.size.lower()}-{started_at:%Y%m%dT%H%M%S}.json"
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else {}
+    compare(results, baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from backend.database.models import Article, Category
+from backend.models.article import ArticleListResponse
+from backend.routes.articles import format_article_list
+from backend.utils.responses import FastJSONResponse
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.search_benchmark import percentile_summary
+
+SUMMARY_FIELDS = ["id", "title", "excerpt", "tags", "categories", "updated_at"]
+
+def build_page(size: int, seed: int) -> List[Article]:
+    """Transient articles with categories, shaped like a listing page"""
+    generator = CorpusGenerator(seed)
+    now = datetime.utcnow()
+    categories = {
+        data["id"]: Category(created_at=now, updated_at=now, description=None, color="#2196F3", **data)
+        for data in generator.categories
+    }
+    page = []
+    for row, category_ids in generator.articles(size):
+        article = Article(**row)
+        article.categories = [categories[category_id] for category_id in category_ids]
+        page.append(article)
+    return page
+
+def model_path(articles: List[Article]) -> bytes:
+    """The previous path: Pydantic models, response_model validation, jsonable_encoder, stdlib json"""
+    field = create_response_field("response", List[ArticleListResponse])
+    models = [ArticleListResponse(**row) for row in format_article_list(articles)]
+    content = asyncio.run(serialize_response(field=field, response_content=models))
+    return JSONResponse(jsonable_encoder(content)).body
+
+def fast_path(articles: List[Article]) -> bytes:
+    return FastJSONResponse(format_article_list(articles)).body
+
+def fast_summary_path(articles: List[Article]) -> bytes:
+    return FastJSONResponse(format_article_list(articles, SUMMARY_FIELDS)).body
+
+def measure(render: Callable[[List[Article]], bytes], page: List[Article], iterations: int) -> dict:
+    render(page)
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        body = render(page)
+        samples.append(time.perf_counter() - t0)
+    summary = percentile_summary(samples, time.perf_counter() - started)
+    summary["bytes"] = len(body)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response serialization paths on article list pages")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    page = build_page(args.page_size, args.seed)
+    # Both paths must produce the same document
+    assert json.loads(model_path(page)) == json.loads(fast_path(page))
+
+    paths = {"models": model_path, "fast": fast_path, "fast_summary": fast_summary_path}
+    results = {name: measure(render, page, args.iterations) for name, render in paths.items()}
+
+    print(f"{'path':<14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'KB':>10}{'speedup':>10}")
+    for name, summary in results.items():
+        speedup = results["models"]["p50_ms"] / summary["p50_ms"]
+        print(f"{name:<14}{summary['p50_ms']:>10}{summary['p95_ms']:>10}{summary['p99_ms']:>10}{summary['bytes'] // 1024:>10}{speedup:>9.1f}x")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "page_size": args.page_size, "iterations": args.iterations, "paths": results
+        }, indent=2))
+
+if __name__ == "__main__":
+    main()
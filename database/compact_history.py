@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from backend.database.database import SessionLocal, create_tables, engine
+from backend.database.history import compact_history
+from backend.database.blobs import collect_garbage
+
+def compact_database(batch_size: int = 200, vacuum: bool = False):
+    """Migrate article history to compressed blob snapshots plus deltas; safe to run again"""
+
+    # Adds the history storage columns and the blob table to databases created before them
+    create_tables()
+
+    db = SessionLocal()
+
+    try:
+        started = time.perf_counter()
+
+        def progress(stats):
+            print(f"  {stats['articles']} articles, {stats['rows']} history rows...")
+
+        stats = compact_history(db, batch_size=batch_size, progress=progress)
+
+        elapsed = time.perf_counter() - started
+        saved = stats["bytes_before"] - stats["bytes_after"]
+        print(f"Rewrote {stats['rewritten']} of {stats['rows']} history rows for {stats['articles']} articles in {elapsed:.2f}s")
+        print(f"Removed {collect_garbage(db)} unreferenced content blobs")
+        db.commit()
+        print(f"History content: {stats['bytes_before'] / 1024 / 1024:.1f} MB -> {stats['bytes_after'] / 1024 / 1024:.1f} MB "
+              f"({saved / 1024 / 1024:.1f} MB saved)")
+    except Exception as e:
+        print(f"Error compacting history: {e}")
+        db.rollback()
+        return
+    finally:
+        db.close()
+
+    if vacuum:
+        # Freed pages stay in the file until it is rebuilt; the rebuild also
+        # switches on incremental vacuum for the history retention job
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            connection.exec_driver_sql("VACUUM")
+        print("Vacuumed the database file")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store article history as periodic compressed snapshots plus deltas")
+    parser.add_argument("--batch-size", type=int, default=200, help="articles per transaction")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to shrink the database file")
+    args = parser.parse_args()
+    compact_database(batch_size=args.batch_size, vacuum=args.vacuum)
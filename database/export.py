@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from backend.database.database import SessionLocal, create_tables
+from backend.database.export import export_ndjson, export_zip
+
+def export_database(output: str, format: str = "ndjson", include_history: bool = True):
+    """Stream the whole wiki to a file without loading it into memory"""
+
+    create_tables()
+
+    db = SessionLocal()
+
+    try:
+        started = time.perf_counter()
+        export = export_zip if format == "zip" else export_ndjson
+        written = 0
+        with open(output, "wb") as f:
+            for chunk in export(db, include_history=include_history):
+                f.write(chunk)
+                written += len(chunk)
+
+        elapsed = time.perf_counter() - started
+        print(f"Exported {written / 1024 / 1024:.1f} MB to {output} in {elapsed:.2f}s")
+    except Exception as e:
+        print(f"Error exporting database: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the wiki as NDJSON or a zip of Markdown files")
+    parser.add_argument("output", help="file to write")
+    parser.add_argument("--format", choices=["ndjson", "zip"], default=None, help="defaults to the output file's extension")
+    parser.add_argument("--no-history", action="store_true", help="leave out article history")
+    args = parser.parse_args()
+    format = args.format or ("zip" if args.output.endswith(".zip") else "ndjson")
+    export_database(args.output, format=format, include_history=not args.no_history)
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from backend.database.database import SessionLocal, create_tables
+from backend.database.markdown_import import import_markdown_tree, IMPORT_BATCH_SIZE
+
+def import_directory(root: str, workers: int = None, batch_size: int = IMPORT_BATCH_SIZE, directory_categories: bool = True):
+    """Import a directory tree of Markdown files, one article per file"""
+
+    create_tables()
+
+    db = SessionLocal()
+
+    try:
+        def progress(stats):
+            print(f"  {stats['imported']} articles written...")
+
+        stats = import_markdown_tree(
+            db, root, workers=workers, batch_size=batch_size,
+            directory_categories=directory_categories, progress=progress
+        )
+
+        print(f"Imported {stats['imported']} of {stats['files']} files in {stats['seconds']:.2f}s "
+              f"({stats['files_per_second']} files/sec, search index rebuild {stats['index_seconds']:.2f}s)")
+        if stats["skipped"]:
+            print(f"Skipped {stats['skipped']} files whose article id already exists")
+        if stats["categories_created"]:
+            print(f"Created {stats['categories_created']} categories")
+        for error in stats["errors"]:
+            print(f"Could not read {error['path']}: {error['error']}")
+    except Exception as e:
+        print(f"Error importing {root}: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a directory tree of Markdown files as articles")
+    parser.add_argument("root", help="directory to import")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count, 0 parses in-process)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="articles per write transaction")
+    parser.add_argument("--no-directory-categories", action="store_true", help="don't turn directories into categories")
+    args = parser.parse_args()
+    import_directory(args.root, workers=args.workers, batch_size=args.batch_size, directory_categories=not args.no_directory_categories)
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from backend.database.database import SessionLocal, create_tables
+from backend.database.crud import SearchIndexCRUD
+from backend.search import fts
+
+def reindex_database(only_missing: bool = False, batch_size: int = 500):
+    """Rebuild the search indexes from the articles table"""
+
+    create_tables()
+
+    db = SessionLocal()
+
+    try:
+        started = time.perf_counter()
+        indexed = SearchIndexCRUD.reindex(db, only_missing=only_missing, batch_size=batch_size)
+
+        if not only_missing and fts.has_fts_index(db):
+            fts.rebuild_fts_index(db.connection())
+            db.commit()
+
+        elapsed = time.perf_counter() - started
+        print(f"Indexed {indexed} articles in {elapsed:.2f}s")
+    except Exception as e:
+        print(f"Error reindexing database: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the wiki search indexes")
+    parser.add_argument("--missing-only", action="store_true", help="only index articles without a search_index row")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    reindex_database(only_missing=args.missing_only, batch_size=args.batch_size)
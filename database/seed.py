@@ -4,6 +4,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.database.database import SessionLocal, create_tables
 from backend.database.models import Article, Category, ArticleHistory
+from backend.database.category_tree import link_category
+from backend.database.crud import SearchIndexCRUD
 import uuid
 import json
 from datetime import datetime
@@ -54,6 +56,8 @@ def seed_database():
         for cat_data in categories:
             db_category = Category(**cat_data)
             db.add(db_category)
+            db.flush()
+            link_category(db, db_category.id, db_category.parent_id)
             db_categories.append(db_category)
         
         db.commit()
@@ -193,6 +197,7 @@ Document your code properly:
             db_article = Article(**article_data)
             db_article.categories = categories
             db.add(db_article)
+            SearchIndexCRUD.index_article(db, db_article)
             
             # Create history record
             history = ArticleHistory(
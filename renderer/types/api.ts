@@ -53,9 +53,13 @@ export interface ArticleListResponse extends BaseResponse {
 export interface ArticleHistoryResponse extends BaseResponse {
   article_id: string;
   title: string;
-  content: string;
   version: number;
   change_type: 'created' | 'updated' | 'deleted';
+  size: number | null;
+}
+
+export interface ArticleVersionResponse extends ArticleHistoryResponse {
+  content: string;
 }
 
 // Category types
@@ -87,6 +91,7 @@ export interface CategoryResponse extends BaseResponse {
 export interface SearchQuery {
   q: string;
   category_ids?: string[];
+  category?: string; // the category and every category below it
   tags?: string[];
   skip?: number;
   limit?: number;
@@ -130,11 +135,13 @@ export const API_ENDPOINTS = {
   ARTICLES: '/api/v1/articles/',
   ARTICLE_BY_ID: (id: string) => `/api/v1/articles/${id}/`,
   ARTICLE_HISTORY: (id: string) => `/api/v1/articles/${id}/history/`,
+  ARTICLE_VERSION: (id: string, version: number) => `/api/v1/articles/${id}/history/${version}`,
   
   // Categories
   CATEGORIES: '/api/v1/categories/',
   CATEGORY_BY_ID: (id: string) => `/api/v1/categories/${id}/`,
   ROOT_CATEGORIES: '/api/v1/categories/roots/',
+  CATEGORY_ARTICLES: (id: string) => `/api/v1/categories/${id}/articles`,
   
   // Search
   SEARCH_ARTICLES: '/api/v1/search/articles/',
@@ -1,7 +1,8 @@
 import pytest
 import os
 import tempfile
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 from backend.main import app
@@ -45,6 +46,21 @@ def client(test_db):
     yield TestClient(app)
     app.dependency_overrides.clear()
 
+@pytest.fixture
+def count_queries(test_engine):
+    """Context manager collecting the SQL statements run against the test database"""
+    @contextmanager
+    def counter():
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+    return counter
+
 @pytest.fixture
 def sample_article_data():
     return {
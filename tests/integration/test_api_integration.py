@@ -1,5 +1,15 @@
+import io
+import json
+import time
+import zipfile
+from datetime import datetime, timedelta
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from backend.database.crud import history_row
+from backend.database.history import SNAPSHOT_INTERVAL, compact_history, insert_history
+from backend.database.models import ArticleHistory, ContentBlob
+from backend.database.retention import RetentionPolicy, run_retention
 
 def test_article_category_integration(client: TestClient, sample_article_data, sample_category_data):
     """Test integration between articles and categories"""
@@ -161,4 +171,407 @@ def test_database_constraints_integration(client: TestClient, sample_category_da
     
     # Try to create another category with the same name (should fail due to unique constraint)
     duplicate_response = client.post("/api/v1/categories/", json=sample_category_data)
-    assert duplicate_response.status_code == 400  # Should return error due to unique constraint
\ No newline at end of file
+    assert duplicate_response.status_code == 400  # Should return error due to unique constraint
+
+def test_article_pages_load_categories_in_constant_queries(client, sample_article_data, count_queries):
+    """Test listing and searching don't issue a categories query per article"""
+    category = client.post("/api/v1/categories/", json={"name": "Quokka Category", "color": "#00AA00"}).json()
+    for i in range(12):
+        article_data = sample_article_data.copy()
+        article_data["title"] = f"Quokka smiles {i}"
+        article_data["categories"] = [category["id"]]
+        client.post("/api/v1/articles/", json=article_data)
+
+    def queries_for(url):
+        with count_queries() as statements:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(statements), response.json()
+
+    small, articles = queries_for("/api/v1/articles/?limit=2")
+    large, articles = queries_for("/api/v1/articles/?limit=12")
+    assert len(articles) == 12
+    assert small == large
+
+    small, _ = queries_for("/api/v1/search/articles?q=quokka&limit=2")
+    large, hits = queries_for("/api/v1/search/articles?q=quokka&limit=12")
+    assert len(hits) == 12
+    assert all(hit["categories"][0]["name"] == "Quokka Category" for hit in hits)
+    assert small == large
+
+def test_sparse_fieldsets(client, sample_article_data, count_queries):
+    """Test fields= projects list and search results without loading article bodies"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Pademelon tracks"
+    article_data["content"] = "Pademelons are small wallabies. " * 20
+    article_data["tags"] = ["macropod"]
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    with count_queries() as statements:
+        response = client.get("/api/v1/articles/?fields=title,excerpt,tags&limit=1000")
+    assert response.status_code == 200
+    listed = next(item for item in response.json() if item["id"] == article["id"])
+    assert listed == {
+        "id": article["id"],
+        "title": "Pademelon tracks",
+        "excerpt": article_data["content"][:200] + "...",
+        "tags": ["macropod"],
+    }
+    assert not any("articles.content" in statement for statement in statements)
+
+    with count_queries() as statements:
+        hits = client.get("/api/v1/search/articles?q=pademelon&fields=title,categories").json()
+    assert hits == [{"id": article["id"], "title": "Pademelon tracks", "categories": []}]
+    assert not any("articles.content" in statement for statement in statements if "articles_fts" not in statement)
+
+    # Without fields= the full list item is unchanged
+    full = client.get("/api/v1/search/articles?q=pademelon").json()[0]
+    assert full["content"] == article_data["content"]
+    assert full["excerpt"] == listed["excerpt"]
+
+    client.put(f"/api/v1/articles/{article['id']}", json={"content": "Short now."})
+    assert client.get("/api/v1/search/articles?q=pademelon&fields=excerpt").json()[0]["excerpt"] == "Short now."
+
+    assert client.get("/api/v1/articles/?fields=title,body").status_code == 400
+    assert client.get("/api/v1/search/articles?q=pademelon&mode=snippet&fields=title").status_code == 400
+
+def test_article_conditional_get(client, sample_article_data, count_queries):
+    """Test ETag/Last-Modified validators and 304 answers on article fetch"""
+    article = client.post("/api/v1/articles/", json=sample_article_data).json()
+    url = f"/api/v1/articles/{article['id']}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag == f'W/"{article["id"]}-1"'
+    last_modified = response.headers["Last-Modified"]
+
+    with count_queries() as statements:
+        response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 1
+    assert "articles.content" not in statements[0]
+
+    assert client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+    # If-None-Match takes precedence over If-Modified-Since
+    assert client.get(url, headers={"If-None-Match": '"stale"', "If-Modified-Since": last_modified}).status_code == 200
+
+    updated = client.put(url, json={"content": "Changed content."})
+    assert updated.headers["ETag"] == f'W/"{article["id"]}-2"'
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["content"] == "Changed content."
+
+    assert client.get("/api/v1/articles/missing-article", headers={"If-None-Match": etag}).status_code == 404
+
+def test_article_validators_follow_category_changes(client, sample_article_data):
+    """Test renaming or deleting an embedded category invalidates the article's ETag and Last-Modified"""
+    category = client.post("/api/v1/categories/", json={"name": "Quokka Validators", "color": "#112233"}).json()
+    article = client.post("/api/v1/articles/", json={**sample_article_data, "categories": [category["id"]]}).json()
+    url = f"/api/v1/articles/{article['id']}"
+    response = client.get(url)
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    time.sleep(1)  # HTTP dates have one-second resolution
+    client.put(f"/api/v1/categories/{category['id']}", json={"name": "Quokka Validators Renamed"})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["categories"][0]["name"] == "Quokka Validators Renamed"
+    assert client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 200
+    etag = response.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # A deleted category drops out of the ETag; the article row itself is left alone
+    client.delete(f"/api/v1/categories/{category['id']}")
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["categories"] == []
+    assert response.json()["updated_at"] == article["updated_at"]
+
+def test_article_responses_compressed(client, sample_article_data):
+    """Test large article bodies are gzipped and small responses are not"""
+    article_data = sample_article_data.copy()
+    article_data["content"] = "# Heading\n\nRepetitive markdown body. " * 200
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    response = client.get(f"/api/v1/articles/{article['id']}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(article_data["content"]) // 5
+    assert response.json()["content"] == article_data["content"]
+
+    assert "content-encoding" not in client.get("/health", headers={"Accept-Encoding": "gzip"}).headers
+
+def test_bulk_article_endpoints(client, test_db, sample_category_data, count_queries):
+    """Test bulk create/update/delete write in one transaction and report per-item errors"""
+    category_data = sample_category_data.copy()
+    category_data["name"] = "Bandicoot Category"
+    category = client.post("/api/v1/categories/", json=category_data).json()
+
+    items = [
+        {"title": f"Bandicoot {i}", "content": f"Bandicoot burrow number {i}.", "tags": ["bulk"], "categories": [category["id"]]}
+        for i in range(20)
+    ]
+    items.insert(3, {"title": "", "content": "Missing title"})
+    with count_queries() as statements:
+        response = client.post("/api/v1/articles/bulk", json=items)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["succeeded"] == 20
+    assert body["failed"] == 1
+    assert body["results"][3]["status"] == "error"
+    assert body["results"][3]["error"].startswith("title")
+    assert sum(1 for statement in statements if statement.startswith("INSERT")) == 4
+
+    created = [result["id"] for result in body["results"] if result["status"] == "created"]
+    article = client.get(f"/api/v1/articles/{created[0]}").json()
+    assert article["categories"][0]["id"] == category["id"]
+    assert [entry["change_type"] for entry in client.get(f"/api/v1/articles/{created[0]}/history").json()] == ["created"]
+    assert len(client.get("/api/v1/search/articles?q=bandicoot burrow&limit=100").json()) == 20
+
+    updates = [{"id": article_id, "tags": ["retagged"], "content": "Bandicoot nest."} for article_id in created[:5]]
+    updates.append({"id": "missing-article", "tags": ["retagged"]})
+    response = client.put("/api/v1/articles/bulk?atomic=true", json=updates).json()
+    assert response["failed"] == 1
+    assert response["succeeded"] == 0
+    assert client.get(f"/api/v1/articles/{created[0]}").json()["version"] == 1
+
+    response = client.put("/api/v1/articles/bulk", json=updates).json()
+    assert response["succeeded"] == 5
+    assert response["results"][5] == {"index": 5, "id": "missing-article", "status": "error", "error": "Article not found"}
+    article = client.get(f"/api/v1/articles/{created[0]}").json()
+    assert article["version"] == 2
+    assert article["tags"] == ["retagged"]
+    assert article["categories"][0]["id"] == category["id"]
+    assert len(client.get("/api/v1/search/articles?q=bandicoot nest").json()) == 5
+
+    # A repeated id is reported the same way by update and delete
+    duplicate = {"index": 1, "id": created[0], "status": "error", "error": "Duplicate id in batch"}
+    response = client.put("/api/v1/articles/bulk", json=[{"id": created[0], "tags": ["a"]}, {"id": created[0], "tags": ["b"]}]).json()
+    assert response["succeeded"] == 1 and response["results"][1] == duplicate
+    response = client.post("/api/v1/articles/bulk/delete?atomic=true", json={"ids": [created[0], created[0]]}).json()
+    assert response["succeeded"] == 0 and response["results"][1] == duplicate
+
+    # An item that is not an object fails alone instead of rejecting the batch
+    response = client.put("/api/v1/articles/bulk", json=[{"id": created[1], "tags": ["c"]}, 5])
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 1
+    assert response.json()["results"][1]["status"] == "error" and response.json()["results"][1]["id"] is None
+
+    response = client.post("/api/v1/articles/bulk/delete", json={"ids": created + [created[0], "missing-article"]}).json()
+    assert response["succeeded"] == 20
+    assert response["failed"] == 2
+    assert response["results"][20] == {"index": 20, "id": created[0], "status": "error", "error": "Duplicate id in batch"}
+    assert client.get(f"/api/v1/articles/{created[0]}").status_code == 404
+    assert client.get("/api/v1/search/articles?q=bandicoot").json() == []
+
+def test_export_streams(client, sample_article_data):
+    """Test the NDJSON and zip exports include categories, articles and history"""
+    category = client.post("/api/v1/categories/", json={"name": "Potoroo Category"}).json()
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Potoroo: a field guide"
+    article_data["content"] = "# Potoroo\n\nSmall marsupial."
+    article_data["categories"] = [category["id"]]
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    response = client.get("/api/v1/export/?format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert records[0]["type"] == "meta"
+    exported = next(r for r in records if r["type"] == "article" and r["id"] == article["id"])
+    assert exported["content"] == article_data["content"]
+    assert exported["categories"] == [category["id"]]
+    assert any(r["type"] == "category" and r["id"] == category["id"] for r in records)
+    assert any(r["type"] == "history" and r["article_id"] == article["id"] for r in records)
+
+    no_history = client.get("/api/v1/export/?history=false").text
+    assert '"type":"history"' not in no_history
+
+    response = client.get("/api/v1/export/?format=zip")
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        markdown = archive.read(f"articles/potoroo-a-field-guide-{article['id']}.md").decode()
+        assert '\ntitle: "Potoroo: a field guide"\n' in markdown
+        assert '\ncategories: ["Potoroo Category"]\n' in markdown
+        assert markdown.endswith("---\n" + article_data["content"] + "\n")
+        assert any(json.loads(line)["article_id"] == article["id"] for line in archive.read("history.ndjson").splitlines())
+        assert any(c["id"] == category["id"] for c in json.loads(archive.read("categories.json")))
+
+def test_history_stored_as_deltas(client, test_db, sample_article_data):
+    """Test history keeps every version's content while storing most of them as deltas"""
+    body = "".join(f"Paragraph {i} about gerbils and their burrows.\n" for i in range(40))
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Gerbil versions"
+    article_data["content"] = body
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    versions = [body]
+    for i in range(1, SNAPSHOT_INTERVAL + 5):
+        versions.append(versions[-1].replace(f"Paragraph {i} ", f"Paragraph {i} (edited) "))
+        assert client.put(f"/api/v1/articles/{article['id']}", json={"content": versions[-1]}).status_code == 200
+
+    history = client.get(f"/api/v1/articles/{article['id']}/history?limit=500").json()
+    assert [entry["version"] for entry in history] == list(range(len(versions), 0, -1))
+    assert [entry["size"] for entry in reversed(history)] == [len(content) for content in versions]
+    for version, content in enumerate(versions, start=1):
+        assert client.get(f"/api/v1/articles/{article['id']}/history/{version}").json()["content"] == content
+
+    stored = test_db.query(ArticleHistory).filter(ArticleHistory.article_id == article["id"]).order_by(ArticleHistory.version).all()
+    snapshots = [entry.version for entry in stored if entry.base_id is None]
+    assert snapshots == [1, SNAPSHOT_INTERVAL + 1]
+    assert sum(len(entry.content) for entry in stored) < len(body) * 3
+
+def test_compact_history_migrates_full_copies(client, test_db, sample_article_data):
+    """Test compacting history written as full copies keeps every version and shrinks it"""
+    body = "".join(f"Jerboa fact number {i}.\n" for i in range(60))
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Jerboa facts"
+    article_data["content"] = body
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    # History as it was stored before deltas: a full copy per version
+    versions = [body] + [body + f"Extra jerboa fact {i}.\n" for i in range(1, 6)]
+    test_db.execute(insert(ArticleHistory), [
+        history_row(article["id"], "Jerboa facts", content, version, "updated", datetime.utcnow())
+        for version, content in enumerate(versions[1:], start=2)
+    ])
+    test_db.commit()
+
+    stats = compact_history(test_db)
+    assert stats["rewritten"] >= 5
+    assert stats["bytes_after"] < stats["bytes_before"]
+    assert compact_history(test_db)["rewritten"] == 0
+
+    for version, content in enumerate(versions, start=1):
+        assert client.get(f"/api/v1/articles/{article['id']}/history/{version}").json()["content"] == content
+    stored = test_db.query(ArticleHistory).filter(ArticleHistory.article_id == article["id"], ArticleHistory.base_id.is_(None)).all()
+    assert stored and all(entry.blob_hash is not None and entry.content == "" for entry in stored)
+
+def test_history_snapshots_share_content_blobs(client, test_db, sample_article_data):
+    """Test identical snapshot bodies are stored once, compressed, and dropped once unreferenced"""
+    original = "".join(f"Bandicoot note {i} on the zorblewick meadow.\n" for i in range(40))
+    rewrite = "".join(f"Completely rewritten bandicoot paragraph {i}.\n" for i in range(40))
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Bandicoot reverts"
+    article_data["content"] = original
+    article = client.post("/api/v1/articles/", json=article_data).json()
+    # A rewrite is too different for a delta, and reverting makes it a snapshot again
+    for content in (rewrite, original):
+        assert client.put(f"/api/v1/articles/{article['id']}", json={"content": content}).status_code == 200
+
+    stored = test_db.query(ArticleHistory).filter(ArticleHistory.article_id == article["id"]).order_by(ArticleHistory.version).all()
+    assert [entry.base_id for entry in stored] == [None, None, None]
+    assert stored[0].blob_hash == stored[2].blob_hash != stored[1].blob_hash
+    blob = test_db.get(ContentBlob, stored[0].blob_hash)
+    assert blob.size == len(original) and len(blob.data) < len(original)
+    for version, content in enumerate((original, rewrite, original), start=1):
+        assert client.get(f"/api/v1/articles/{article['id']}/history/{version}").json()["content"] == content
+    original_hash, rewrite_hash = stored[0].blob_hash, stored[1].blob_hash
+    test_db.expire_all()
+
+    # Deleting an article frees the blobs no other article's history shares
+    copy_data = article_data.copy()
+    copy_data["content"] = rewrite
+    copy = client.post("/api/v1/articles/", json=copy_data).json()
+    assert client.delete(f"/api/v1/articles/{article['id']}").status_code == 200
+    assert test_db.get(ContentBlob, original_hash) is None
+    assert test_db.get(ContentBlob, rewrite_hash) is not None
+    assert client.post("/api/v1/articles/bulk/delete", json={"ids": [copy["id"]]}).json()["succeeded"] == 1
+    test_db.expire_all()
+    assert test_db.get(ContentBlob, rewrite_hash) is None
+
+def test_history_listing_is_paged_metadata(client, sample_article_data, count_queries):
+    """Test the history listing pages by cursor without content, and single versions load on demand"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Dunnart versions"
+    article = client.post("/api/v1/articles/", json=article_data).json()
+    for i in range(2, 8):
+        client.put(f"/api/v1/articles/{article['id']}", json={"content": f"Dunnart draft {i}"})
+
+    versions, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        with count_queries() as statements:
+            response = client.get(f"/api/v1/articles/{article['id']}/history", params=params)
+        assert response.status_code == 200
+        assert not any("article_history.content" in statement for statement in statements)
+        for entry in response.json():
+            assert "content" not in entry
+            assert entry["size"] == len(f"Dunnart draft {entry['version']}") or entry["version"] == 1
+            versions.append(entry["version"])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert versions == [7, 6, 5, 4, 3, 2, 1]
+
+    entry = client.get(f"/api/v1/articles/{article['id']}/history/4").json()
+    assert entry["content"] == "Dunnart draft 4" and entry["version"] == 4
+    assert client.get(f"/api/v1/articles/{article['id']}/history/99").status_code == 404
+    assert client.get(f"/api/v1/articles/{article['id']}/history?cursor=bogus").status_code == 400
+    assert client.get("/api/v1/articles/missing-article/history").status_code == 404
+
+def test_history_retention_prunes_old_versions(client, test_db, sample_article_data):
+    """Test retention thins old versions to one per day and week while every kept version still reads back"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Quoll history"
+    article_data["content"] = "".join(f"Quoll line {i}\n" for i in range(30))
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    # Autosaves: five a day for three days a month ago, two in one week a year ago
+    # Times of day are fixed so no bucket straddles midnight or a week boundary
+    now = datetime.utcnow()
+    year_ago = (now - timedelta(days=400)).replace(hour=12, minute=0)
+    year_ago -= timedelta(days=year_ago.weekday() - 2)
+    test_db.query(ArticleHistory).filter(ArticleHistory.article_id == article["id"]).update(
+        {"created_at": year_ago}, synchronize_session=False
+    )
+    moments = [year_ago + timedelta(hours=1)]
+    moments += [(now - timedelta(days=day)).replace(hour=hour, minute=0) for day in (32, 31, 30) for hour in (8, 9, 10, 11, 12)]
+    versions = {1: article_data["content"]}
+    rows = []
+    for version, created_at in enumerate(moments, start=2):
+        versions[version] = versions[version - 1] + f"Quoll autosave {version}\n"
+        rows.append(history_row(article["id"], "Quoll history", versions[version], version, "updated", created_at))
+    test_db.execute(insert(ArticleHistory), rows)
+    test_db.commit()
+    compact_history(test_db)
+
+    stats = run_retention(test_db, RetentionPolicy(keep_all_days=7, daily_days=90), pause=0)
+    assert stats["rows_deleted"] == 1 + 3 * 4
+    assert stats["bytes_reclaimed"] > 0
+    assert run_retention(test_db, RetentionPolicy(keep_all_days=7, daily_days=90), pause=0)["rows_deleted"] == 0
+
+    kept = [entry["version"] for entry in client.get(f"/api/v1/articles/{article['id']}/history").json()]
+    assert kept == [17, 12, 7, 2]
+    for version in kept:
+        assert client.get(f"/api/v1/articles/{article['id']}/history/{version}").json()["content"] == versions[version]
+
+def test_history_retention_counts_freed_blobs(client, test_db, sample_article_data):
+    """Test the bytes a retention pass reports include the blobs it frees"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Wallaroo drafts"
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    # Three unrelated rewrites in one week a year ago: full snapshots, each its own blob
+    year_ago = (datetime.utcnow() - timedelta(days=400)).replace(hour=12, minute=0)
+    year_ago -= timedelta(days=year_ago.weekday() - 2)
+    rows = [
+        history_row(article["id"], "Wallaroo drafts", "".join(f"Wallaroo draft {version} line {i} {'x' * version}\n" for i in range(60)),
+                    version, "updated", year_ago + timedelta(hours=version))
+        for version in (2, 3, 4)
+    ]
+    insert_history(test_db, rows)
+    test_db.commit()
+    expired = [test_db.get(ContentBlob, row["blob_hash"]) for row in rows[:2]]
+    expired_bytes = sum(len(blob.data) for blob in expired)
+    hashes = [blob.hash for blob in expired]
+
+    stats = run_retention(test_db, RetentionPolicy(keep_all_days=7, daily_days=90), pause=0)
+    assert stats["rows_deleted"] == 2 and stats["blobs_deleted"] >= 2
+    assert stats["bytes_reclaimed"] >= expired_bytes
+    test_db.expire_all()
+    assert test_db.query(ContentBlob).filter(ContentBlob.hash.in_(hashes)).count() == 0
@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+from backend.search import fts
+
+def walk(client: TestClient, url: str):
+    """Follow X-Next-Cursor until the last page, returning every item and the page count"""
+    items, pages = [], 0
+    response = client.get(url)
+    while True:
+        assert response.status_code == 200
+        items += response.json()
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return items, pages
+        response = client.get(f"{url}&cursor={cursor}")
+
+def test_article_list_cursor_pagination(client: TestClient, sample_article_data):
+    """Test the article list can be walked by cursor without gaps or duplicates"""
+    for i in range(7):
+        article_data = sample_article_data.copy()
+        article_data["title"] = f"Cursor listing {i}"
+        client.post("/api/v1/articles/", json=article_data)
+
+    everything = client.get("/api/v1/articles/?limit=1000").json()
+    items, pages = walk(client, "/api/v1/articles/?limit=3")
+
+    assert [a["id"] for a in items] == [a["id"] for a in everything]
+    assert pages == -(-len(everything) // 3)
+    updated = [a["updated_at"] for a in items]
+    assert updated == sorted(updated, reverse=True)
+
+@pytest.mark.parametrize("use_fts", [True, False])
+def test_search_cursor_pagination(client: TestClient, sample_article_data, monkeypatch, use_fts):
+    """Test search results can be walked by (rank, id) cursor"""
+    word = "galah" if use_fts else "corella"
+    for i in range(5):
+        article_data = sample_article_data.copy()
+        article_data["title"] = f"{word} {i}" if i % 2 else f"Birds {i}"
+        article_data["content"] = f"Notes about the {word}."
+        client.post("/api/v1/articles/", json=article_data)
+
+    if not use_fts:
+        monkeypatch.setattr(fts, "has_fts_index", lambda db: False)
+
+    everything = client.get(f"/api/v1/search/articles?q={word}&limit=100").json()
+    items, pages = walk(client, f"/api/v1/search/articles?q={word}&limit=2")
+
+    assert len(everything) == 5
+    assert [a["id"] for a in items] == [a["id"] for a in everything]
+    assert pages == 3
+
+def test_invalid_cursor(client: TestClient):
+    """Test malformed or foreign cursors are rejected"""
+    assert client.get("/api/v1/articles/?cursor=not-a-cursor").status_code == 400
+
+    client.post("/api/v1/articles/", json={"title": "Cursor a", "content": "x"})
+    client.post("/api/v1/articles/", json={"title": "Cursor b", "content": "x"})
+    list_cursor = client.get("/api/v1/articles/?limit=1").headers["X-Next-Cursor"]
+    assert client.get(f"/api/v1/search/articles?q=cursor&cursor={list_cursor}").status_code == 400
@@ -0,0 +1,228 @@
+import pytest
+from fastapi.testclient import TestClient
+from backend.database.crud import SearchIndexCRUD
+from backend.database.models import SearchIndex
+from backend.search import fts
+from backend.search.inverted_index import article_index
+
+def test_search_ranks_title_matches_first(client: TestClient, sample_article_data):
+    """Test BM25 ranking puts title hits above body-only hits"""
+    body_hit = sample_article_data.copy()
+    body_hit["title"] = "Unrelated Notes"
+    body_hit["content"] = "Somewhere in here we mention quokkas once."
+    body_response = client.post("/api/v1/articles/", json=body_hit)
+
+    title_hit = sample_article_data.copy()
+    title_hit["title"] = "Quokkas of Rottnest Island"
+    title_hit["content"] = "Small marsupials with a famous smile."
+    title_response = client.post("/api/v1/articles/", json=title_hit)
+
+    search_response = client.get("/api/v1/search/articles?q=quokkas")
+    assert search_response.status_code == 200
+
+    results = search_response.json()
+    assert [r["id"] for r in results] == [title_response.json()["id"], body_response.json()["id"]]
+
+def test_search_matches_term_prefixes(client: TestClient, sample_article_data):
+    """Test each term matches as a word prefix and all terms are required"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Wombat burrows"
+    article_data["content"] = "Wombats dig extensive burrow systems."
+    client.post("/api/v1/articles/", json=article_data)
+
+    assert len(client.get("/api/v1/search/articles?q=wombat").json()) == 1
+    assert len(client.get("/api/v1/search/articles?q=womb burr").json()) == 1
+    assert len(client.get("/api/v1/search/articles?q=wombat platypus").json()) == 0
+
+def test_search_escapes_fts_syntax(client: TestClient):
+    """Test FTS5 operators in user input are treated as plain text"""
+    response = client.get('/api/v1/search/articles?q=NOT "unterminated OR *')
+    assert response.status_code == 200
+
+def test_search_index_follows_article_writes(client: TestClient, test_db, sample_article_data):
+    """Test search_index rows are written, updated and removed with the article"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Platypus Venom"
+    article_data["content"] = "Males carry a venomous spur."
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    entry = test_db.query(SearchIndex).filter(SearchIndex.article_id == article["id"]).one()
+    assert entry.title_tokens == " platypus venom "
+    assert " venomous " in entry.content_tokens
+
+    client.put(f"/api/v1/articles/{article['id']}", json={"title": "Platypus Bills"})
+    test_db.expire_all()
+    entry = test_db.query(SearchIndex).filter(SearchIndex.article_id == article["id"]).one()
+    assert entry.title_tokens == " platypus bills "
+
+    client.delete(f"/api/v1/articles/{article['id']}")
+    assert test_db.query(SearchIndex).filter(SearchIndex.article_id == article["id"]).count() == 0
+
+def test_search_token_index_fallback(client: TestClient, test_db, sample_article_data, monkeypatch):
+    """Test search uses the pre-tokenized index when FTS5 is unavailable"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Echidna facts"
+    article_data["content"] = "Echidnas are monotremes."
+    client.post("/api/v1/articles/", json=article_data)
+
+    monkeypatch.setattr(fts, "has_fts_index", lambda db: False)
+    results = client.get("/api/v1/search/articles?q=echid monotreme").json()
+    assert len(results) == 1
+    assert results[0]["title"] == "Echidna facts"
+
+    # A bulk rebuild yields the same results
+    assert SearchIndexCRUD.reindex(test_db) >= 1
+    results = client.get("/api/v1/search/articles?q=echid monotreme").json()
+    assert [r["title"] for r in results] == ["Echidna facts"]
+
+def test_search_in_memory_index(client: TestClient, test_db, sample_article_data):
+    """Test the in-process index answers searches and tracks article writes"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Numbat diet"
+    article_data["content"] = "Numbats eat termites."
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    article_index.load(test_db)
+    try:
+        assert [r["id"] for r in client.get("/api/v1/search/articles?q=numbat termites").json()] == [article["id"]]
+
+        client.put(f"/api/v1/articles/{article['id']}", json={"content": "Numbats eat ants."})
+        assert client.get("/api/v1/search/articles?q=numbat termites").json() == []
+        assert len(client.get("/api/v1/search/articles?q=numbat ants").json()) == 1
+
+        client.delete(f"/api/v1/articles/{article['id']}")
+        assert client.get("/api/v1/search/articles?q=numbat").json() == []
+    finally:
+        article_index.unload()
+
+@pytest.mark.parametrize("engine", ["fts", "tokens", "memory"])
+def test_search_finds_word_fragments_and_cjk(client: TestClient, test_db, sample_article_data, monkeypatch, engine):
+    """Test mid-word fragments and CJK words, which no tokenizer splits out, still match as substrings"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = f"Mixed script notes {engine}"
+    article_data["content"] = "Quollscript is great. 日本語の文章です"
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    if engine == "tokens":
+        monkeypatch.setattr(fts, "has_fts_index", lambda db: False)
+    if engine == "memory":
+        article_index.load(test_db)
+    try:
+        for query in ("ollscri", "文章", "quollscript 文章"):
+            ids = [hit["id"] for hit in client.get("/api/v1/search/articles", params={"q": query, "limit": 100}).json()]
+            assert article["id"] in ids, query
+        hits = client.get("/api/v1/search/articles", params={"q": "文章", "mode": "snippet", "limit": 100}).json()
+        hit = next(hit for hit in hits if hit["id"] == article["id"])
+        assert [hit["snippet"][start:end] for start, end in hit["highlights"]] == ["文章"]
+        facets = client.get("/api/v1/search/articles", params={"q": "ollscri", "facets": "tags"}).json()["facets"]
+        assert facets["tags"]
+        # Whole-word queries keep using the token engines
+        assert article["id"] in [hit["id"] for hit in client.get("/api/v1/search/articles", params={"q": "quolls", "limit": 100}).json()]
+    finally:
+        article_index.unload()
+        client.delete(f"/api/v1/articles/{article['id']}")
+
+def test_substring_recall_never_scans_articles(client: TestClient, count_queries):
+    """Test misses, CJK queries and typos are answered from the indexes, not a LIKE scan over articles"""
+    for params in ({"q": "zzzznomatch"}, {"q": "日本"}, {"q": "kubernetis", "fuzzy": "true"}):
+        with count_queries() as statements:
+            assert client.get("/api/v1/search/articles", params=params).status_code == 200
+        assert not any(" LIKE " in statement.upper() for statement in statements), params
+
+@pytest.mark.parametrize("use_fts", [True, False])
+def test_search_snippet_mode(client: TestClient, sample_article_data, monkeypatch, use_fts):
+    """Test snippet mode returns a query-centred snippet and highlight offsets, not content"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = f"Cassowary field notes {use_fts}"
+    article_data["content"] = "Filler sentence. " * 200 + "The cassowary is a large flightless bird. " + "More filler. " * 200
+    client.post("/api/v1/articles/", json=article_data)
+
+    if not use_fts:
+        monkeypatch.setattr(fts, "has_fts_index", lambda db: False)
+    response = client.get(f"/api/v1/search/articles?q=cassowary {str(use_fts).lower()}&mode=snippet")
+    assert response.status_code == 200
+
+    hits = response.json()
+    assert len(hits) == 1
+    hit = hits[0]
+    assert "content" not in hit
+    assert len(hit["snippet"]) < 400
+    assert [hit["snippet"][start:end].lower() for start, end in hit["highlights"]] == ["cassowary"]
+    assert [hit["title"][start:end] for start, end in hit["title_highlights"]] == ["Cassowary", str(use_fts)]
+
+def test_search_rejects_unknown_mode(client: TestClient):
+    """Test mode is validated"""
+    response = client.get("/api/v1/search/articles?q=anything&mode=compact")
+    assert response.status_code == 422
+
+def test_search_fuzzy_mode(client: TestClient, sample_article_data):
+    """Test fuzzy search finds articles despite misspelled terms"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Kookaburra calls"
+    article_data["content"] = "The laughing kookaburra is a large kingfisher."
+    article = client.post("/api/v1/articles/", json=article_data).json()
+
+    assert client.get("/api/v1/search/articles?q=kookabura lauhging").json() == []
+
+    results = client.get("/api/v1/search/articles?q=kookabura lauhging&fuzzy=true").json()
+    assert [r["id"] for r in results] == [article["id"]]
+
+    hit = client.get("/api/v1/search/articles?q=kingfsher&fuzzy=true&mode=snippet").json()[0]
+    assert [hit["snippet"][start:end] for start, end in hit["highlights"]] == ["kingfisher"]
+
+def test_search_cache_invalidated_by_writes(client: TestClient, sample_article_data):
+    """Test repeated searches hit the cache until an article write"""
+    article_data = sample_article_data.copy()
+    article_data["title"] = "Bilby burrows"
+    article_data["content"] = "Bilbies are desert marsupials."
+    client.post("/api/v1/articles/", json=article_data)
+
+    before = client.get("/api/v1/search/cache").json()
+    assert len(client.get("/api/v1/search/articles?q=bilby").json()) == 1
+    assert len(client.get("/api/v1/search/articles?q=BILBY").json()) == 1
+    after = client.get("/api/v1/search/cache").json()
+    assert after["hits"] == before["hits"] + 1
+
+    article_data["title"] = "Bilby diet"
+    client.post("/api/v1/articles/", json=article_data)
+    assert len(client.get("/api/v1/search/articles?q=bilby").json()) == 2
+
+@pytest.mark.parametrize("engine", ["fts", "tokens", "memory"])
+def test_search_facets(client: TestClient, test_db, sample_article_data, sample_category_data, monkeypatch, engine):
+    """Test facet counts cover every hit, not just the returned page"""
+    category_data = sample_category_data.copy()
+    category_data["name"] = f"Wombat habitats {engine}"
+    category = client.post("/api/v1/categories/", json=category_data).json()
+
+    for i in range(3):
+        article_data = sample_article_data.copy()
+        article_data["title"] = f"Wombat {engine} note {i}"
+        article_data["content"] = "Wombats dig burrows."
+        article_data["tags"] = ["burrowing", f"wombat-{i % 2}"]
+        article_data["categories"] = [category["id"]] if i else []
+        client.post("/api/v1/articles/", json=article_data)
+
+    if engine == "tokens":
+        monkeypatch.setattr(fts, "has_fts_index", lambda db: False)
+    if engine == "memory":
+        article_index.load(test_db)
+    try:
+        response = client.get(f"/api/v1/search/articles?q=wombat {engine}&limit=1&facets=categories,tags")
+    finally:
+        article_index.unload()
+    assert response.status_code == 200
+
+    body = response.json()
+    assert len(body["items"]) == 1
+    assert body["next_cursor"] == response.headers["X-Next-Cursor"]
+    assert body["facets"]["categories"] == [{"value": category["id"], "label": category["name"], "count": 2}]
+    assert body["facets"]["tags"] == [
+        {"value": "burrowing", "label": "burrowing", "count": 3},
+        {"value": "wombat-0", "label": "wombat-0", "count": 2},
+        {"value": "wombat-1", "label": "wombat-1", "count": 1},
+    ]
+
+def test_search_facets_validated(client: TestClient):
+    """Test only known facets are accepted and plain searches stay a bare list"""
+    assert client.get("/api/v1/search/articles?q=anything&facets=authors").status_code == 400
+    assert isinstance(client.get("/api/v1/search/articles?q=anything").json(), list)
@@ -0,0 +1,36 @@
+import json
+from benchmarks.corpus import CorpusGenerator, parse_size
+from benchmarks.search_benchmark import percentile_summary
+
+def test_corpus_is_reproducible():
+    """Test the same seed always yields the same articles and queries"""
+    first = list(CorpusGenerator(seed=7, vocabulary_size=1000).articles(20))
+    second = list(CorpusGenerator(seed=7, vocabulary_size=1000).articles(20))
+    assert first == second
+    assert CorpusGenerator(seed=7, vocabulary_size=1000).queries(10) == CorpusGenerator(seed=7, vocabulary_size=1000).queries(10)
+    assert first != list(CorpusGenerator(seed=8, vocabulary_size=1000).articles(20))
+
+def test_corpus_articles_look_like_wiki_pages():
+    """Test generated articles carry Markdown bodies, tags and valid categories"""
+    generator = CorpusGenerator(seed=1, vocabulary_size=1000)
+    category_ids = {category["id"] for category in generator.categories}
+    for row, categories in generator.articles(50):
+        assert row["content"].startswith("# ")
+        assert set(json.loads(row["tags"])) <= set(generator.tags)
+        assert set(categories) <= category_ids
+        assert row["updated_at"] >= row["created_at"]
+
+def test_parse_size():
+    assert parse_size("10k") == 10_000
+    assert parse_size("1M") == 1_000_000
+    assert parse_size("2500") == 2500
+
+def test_percentile_summary():
+    summary = percentile_summary([i / 1000 for i in range(1, 101)], elapsed=2.0)
+    assert summary["requests"] == 100
+    assert summary["throughput_rps"] == 50.0
+    assert summary["min_ms"] == 1.0
+    assert summary["max_ms"] == 100.0
+    assert 50 <= summary["p50_ms"] <= 51
+    assert 95 <= summary["p95_ms"] <= 96
+    assert 99 <= summary["p99_ms"] <= 100
@@ -156,4 +156,65 @@ def test_get_categories_with_pagination(client: TestClient, sample_category_data
     
     response = client.get("/api/v1/categories/?skip=2&limit=2")
     assert response.status_code == 200
-    assert len(response.json()) == 2
\ No newline at end of file
+    assert len(response.json()) == 2
+
+def test_category_tree_loads_in_constant_queries(client: TestClient, test_db, count_queries):
+    """Test a 1000-node tree is served from a fixed number of queries, not one per node"""
+    from sqlalchemy import delete, insert, or_
+    from backend.database.category_tree import rebuild_closure
+    from backend.database.models import Category, CategoryClosure
+
+    # Ten roots, each with nine children, each with ten grandchildren
+    rows = []
+    for r in range(10):
+        root_id = f"zorble-root-{r}"
+        rows.append({"id": root_id, "name": f"Zorble root {r}", "parent_id": None})
+        for c in range(9):
+            child_id = f"{root_id}-{c}"
+            rows.append({"id": child_id, "name": f"Zorble {r}.{c}", "parent_id": root_id})
+            rows.extend(
+                {"id": f"{child_id}-{g}", "name": f"Zorble {r}.{c}.{g}", "parent_id": child_id} for g in range(10)
+            )
+    assert len(rows) == 1000
+    test_db.execute(insert(Category), rows)
+    rebuild_closure(test_db.connection())
+    test_db.commit()
+
+    try:
+        with count_queries() as statements:
+            response = client.get("/api/v1/categories/roots")
+        assert response.status_code == 200
+        assert len(statements) == 1
+        roots = {root["id"]: root for root in response.json() if root["id"].startswith("zorble-root-")}
+        assert len(roots) == 10
+        assert all(len(root["children"]) == 9 for root in roots.values())
+        assert sorted(grandchild["id"] for grandchild in roots["zorble-root-3"]["children"][0]["children"]) == [
+            f"zorble-root-3-0-{g}" for g in range(10)
+        ]
+
+        with count_queries() as statements:
+            response = client.get("/api/v1/categories/zorble-root-7")
+        assert len(statements) == 2
+        subtree = response.json()
+        assert sum(len(child["children"]) for child in subtree["children"]) == 90
+    finally:
+        test_db.execute(delete(CategoryClosure).where(or_(
+            CategoryClosure.ancestor_id.like("zorble-root-%"), CategoryClosure.descendant_id.like("zorble-root-%")
+        )))
+        test_db.execute(delete(Category).where(Category.id.like("zorble-root-%")))
+        test_db.commit()
+
+def test_category_list_counts_articles_without_loading_them(client: TestClient, count_queries):
+    """Test article_count comes from one aggregate query that never reads article rows"""
+    category = client.post("/api/v1/categories/", json={"name": "Zorblewick counts"}).json()
+    empty = client.post("/api/v1/categories/", json={"name": "Zorblewick empty"}).json()
+    for i in range(3):
+        client.post("/api/v1/articles/", json={"title": f"Counted {i}", "content": "x" * 5000, "categories": [category["id"]]})
+
+    with count_queries() as statements:
+        response = client.get("/api/v1/categories/", params={"limit": 1000})
+    assert response.status_code == 200
+    assert len(statements) == 2
+    assert not any("articles" in statement.replace("article_categories", "") for statement in statements)
+    counts = {item["id"]: item["article_count"] for item in response.json()}
+    assert counts[category["id"]] == 3 and counts[empty["id"]] == 0
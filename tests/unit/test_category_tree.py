@@ -0,0 +1,82 @@
+from sqlalchemy import select
+from backend.database.category_tree import rebuild_closure
+from backend.database.models import CategoryClosure
+
+def closure_pairs(db, category_ids):
+    rows = db.execute(select(CategoryClosure.ancestor_id, CategoryClosure.descendant_id, CategoryClosure.depth).where(
+        CategoryClosure.descendant_id.in_(category_ids)
+    ))
+    return {(ancestor, descendant): depth for ancestor, descendant, depth in rows}
+
+def make_category(client, name, parent=None):
+    response = client.post("/api/v1/categories/", json={"name": name, **({"parent_id": parent["id"]} if parent else {})})
+    assert response.status_code == 200
+    return response.json()
+
+def test_closure_follows_create_move_and_delete(client, test_db):
+    """Test the closure table matches the parent links through every category write"""
+    plants = make_category(client, "Quibblewort plants")
+    trees = make_category(client, "Quibblewort trees", plants)
+    oaks = make_category(client, "Quibblewort oaks", trees)
+    fungi = make_category(client, "Quibblewort fungi")
+    ids = [plants["id"], trees["id"], oaks["id"], fungi["id"]]
+    assert closure_pairs(test_db, ids) == {
+        (plants["id"], plants["id"]): 0, (trees["id"], trees["id"]): 0, (oaks["id"], oaks["id"]): 0, (fungi["id"], fungi["id"]): 0,
+        (plants["id"], trees["id"]): 1, (plants["id"], oaks["id"]): 2, (trees["id"], oaks["id"]): 1,
+    }
+
+    # Moving a subtree re-hangs its descendants too
+    assert client.put(f"/api/v1/categories/{trees['id']}", json={"parent_id": fungi["id"]}).status_code == 200
+    test_db.expire_all()
+    pairs = closure_pairs(test_db, ids)
+    assert pairs[(fungi["id"], oaks["id"])] == 2 and (plants["id"], oaks["id"]) not in pairs
+
+    # No cycles
+    response = client.put(f"/api/v1/categories/{fungi['id']}", json={"parent_id": oaks["id"]})
+    assert response.status_code == 400
+    assert client.put(f"/api/v1/categories/{fungi['id']}", json={"parent_id": "missing"}).status_code == 400
+
+    # Deleting a category moves its children up a level
+    assert client.delete(f"/api/v1/categories/{trees['id']}").status_code == 200
+    test_db.expire_all()
+    assert client.get(f"/api/v1/categories/{oaks['id']}").json()["parent_id"] == fungi["id"]
+    pairs = closure_pairs(test_db, ids)
+    assert pairs == {
+        (plants["id"], plants["id"]): 0, (oaks["id"], oaks["id"]): 0, (fungi["id"], fungi["id"]): 0, (fungi["id"], oaks["id"]): 1,
+    }
+
+    # A rebuild from the parent links agrees with the incremental upkeep
+    rebuild_closure(test_db.connection())
+    test_db.commit()
+    assert closure_pairs(test_db, ids) == pairs
+
+def test_subtree_articles_and_search(client, count_queries):
+    """Test listing and searching a subtree covers every level below the category, and nothing else"""
+    animals = make_category(client, "Snorfle animals")
+    birds = make_category(client, "Snorfle birds", animals)
+    owls = make_category(client, "Snorfle owls", birds)
+    rocks = make_category(client, "Snorfle rocks")
+    filed = {}
+    for title, category in (("Snorfle owl", owls), ("Snorfle bird", birds), ("Snorfle animal", animals), ("Snorfle rock", rocks)):
+        filed[title] = client.post("/api/v1/articles/", json={
+            "title": title, "content": "The snorfle wanders.", "categories": [category["id"]]
+        }).json()["id"]
+
+    with count_queries() as statements:
+        response = client.get(f"/api/v1/categories/{birds['id']}/articles", params={"fields": "title"})
+    assert response.status_code == 200
+    assert {article["title"] for article in response.json()} == {"Snorfle owl", "Snorfle bird"}
+    assert sum("category_closure" in statement for statement in statements) == 1
+
+    titles = [article["title"] for article in client.get(f"/api/v1/categories/{animals['id']}/articles", params={"limit": 2}).json()]
+    assert len(titles) == 2
+    assert client.get("/api/v1/categories/missing/articles").status_code == 404
+
+    search = client.get("/api/v1/search/articles", params={"q": "snorfle", "category": birds["id"]}).json()
+    assert {hit["title"] for hit in search} == {"Snorfle owl", "Snorfle bird"}
+    search = client.get("/api/v1/search/articles", params={"q": "snorfle", "category": animals["id"], "mode": "snippet"}).json()
+    assert {hit["title"] for hit in search} == {"Snorfle owl", "Snorfle bird", "Snorfle animal"}
+    faceted = client.get("/api/v1/search/articles", params={"q": "snorfle", "category": rocks["id"], "facets": "categories"}).json()
+    assert [hit["title"] for hit in faceted["items"]] == ["Snorfle rock"]
+    assert faceted["facets"]["categories"] == [{"value": rocks["id"], "label": "Snorfle rocks", "count": 1}]
+    assert client.get("/api/v1/search/articles", params={"q": "snorfle", "category": "missing"}).status_code == 404
@@ -0,0 +1,94 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from backend.utils.compression import CompressedCache, CompressionMiddleware, negotiate_encoding
+
+BODY = "markdown " * 500
+MUTABLE = {"body": BODY}
+
+@pytest.fixture
+def cache():
+    return CompressedCache(max_entries=2)
+
+@pytest.fixture
+def compressed_client(cache):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, cache=cache)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(BODY, headers={"ETag": 'W/"a-1"'})
+
+    @app.get("/mutable")
+    async def mutable():
+        return PlainTextResponse(MUTABLE["body"], headers={"ETag": 'W/"a-1"'})
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/binary")
+    async def binary():
+        return Response(b"\x00" * 5000, media_type="application/zip")
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(50):
+                yield f'{{"line": {i}}}\n' * 10
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate", brotli_available=False) == "gzip"
+    assert negotiate_encoding("gzip, br", brotli_available=True) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", brotli_available=True) == "gzip"
+    assert negotiate_encoding("br", brotli_available=False) is None
+    assert negotiate_encoding("gzip;q=0", brotli_available=False) is None
+    assert negotiate_encoding("*", brotli_available=False) == "gzip"
+    assert negotiate_encoding("", brotli_available=True) is None
+
+def test_compresses_above_threshold(compressed_client):
+    """Test large text is gzipped while small and binary bodies pass through"""
+    response = compressed_client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(BODY) // 5
+    assert response.text == BODY
+
+    assert "content-encoding" not in compressed_client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in compressed_client.get("/binary", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in compressed_client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+def test_reuses_compressed_bytes_for_etagged_responses(compressed_client, cache):
+    """Test responses with an ETag are compressed once and then served from the cache"""
+    for _ in range(3):
+        assert compressed_client.get("/large", headers={"Accept-Encoding": "gzip"}).text == BODY
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["entries"] == 1
+
+def test_cache_follows_body_when_etag_is_unchanged(compressed_client):
+    """Test a body that changes under the same ETag is never served from a stale cache entry"""
+    MUTABLE["body"] = BODY
+    assert compressed_client.get("/mutable", headers={"Accept-Encoding": "gzip"}).text == BODY
+    MUTABLE["body"] = "renamed " * 500
+    assert compressed_client.get("/mutable", headers={"Accept-Encoding": "gzip"}).text == "renamed " * 500
+
+def test_streams_compressed_chunks(compressed_client):
+    """Test streaming responses are compressed incrementally into one valid gzip stream"""
+    with compressed_client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw).decode().count("\n") == 500
+
+def test_cache_eviction_by_size():
+    cache = CompressedCache(max_entries=10, max_bytes=10)
+    cache.put(("/a", "1", "gzip"), b"123456")
+    cache.put(("/b", "1", "gzip"), b"123456")
+    assert cache.get(("/a", "1", "gzip")) is None
+    assert cache.get(("/b", "1", "gzip")) == b"123456"
+    assert cache.stats()["bytes"] == 6
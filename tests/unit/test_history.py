@@ -0,0 +1,42 @@
+from backend.database.blobs import BLOB_MIN_BYTES, content_hash, compress, decompress
+from backend.database.history import make_delta, apply_delta, encode_version, pack_storage, SNAPSHOT_INTERVAL
+
+def test_delta_round_trip():
+    """Test applying a delta to its base always yields the new content"""
+    base = "# Title\n\nFirst paragraph.\n\nSecond paragraph.\nLast line"
+    edits = [
+        base + " with more",
+        base.replace("First", "Opening"),
+        "Preface\n" + base,
+        base.replace("\n\nSecond paragraph.", ""),
+        "",
+        base + "\n",
+        "completely different",
+    ]
+    for content in edits:
+        assert apply_delta(base, make_delta(base, content)) == content
+    assert apply_delta("", make_delta("", base)) == base
+
+def test_small_edits_are_stored_as_deltas():
+    """Test a one-line change to a long article is stored as a small delta"""
+    base = "".join(f"Line {i} of a long article.\n" for i in range(200))
+    content = base.replace("Line 100 of", "Line one hundred of")
+    storage = encode_version(content, ("previous-id", 0, base))
+    assert storage["base_id"] == "previous-id" and storage["depth"] == 1
+    assert len(storage["content"]) < 100
+
+def test_snapshots_are_stored_in_full():
+    """Test first versions, rewrites and every interval-th version are full snapshots"""
+    assert encode_version("text", None) == {"content": "text", "base_id": None, "depth": 0, "size": 4}
+    assert encode_version("brand new text", ("previous-id", 0, "old words"))["base_id"] is None
+    base = "".join(f"Line {i}\n" for i in range(50))
+    assert encode_version(base + "x\n", ("previous-id", SNAPSHOT_INTERVAL - 1, base))["base_id"] is None
+
+def test_large_snapshots_are_packed_into_blobs():
+    """Test only snapshots of at least BLOB_MIN_BYTES move to a blob, keyed by their text"""
+    body = "x" * BLOB_MIN_BYTES
+    assert pack_storage(encode_version(body, None)) == ("", content_hash(body))
+    assert pack_storage(encode_version("short", None)) == ("short", None)
+    delta = {"content": "[]", "base_id": "previous-id", "depth": 1, "size": BLOB_MIN_BYTES * 2}
+    assert pack_storage(delta) == ("[]", None)
+    assert decompress(compress(body)) == body and len(compress(body)) < len(body)
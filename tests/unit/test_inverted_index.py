@@ -0,0 +1,53 @@
+import pytest
+from array import array
+from backend.search.inverted_index import InvertedIndex, intersect, COMPACT_RATIO
+
+@pytest.fixture
+def index():
+    index = InvertedIndex()
+    index.loaded = True
+    index.add_article("a", "Python packaging", "Wheels and sdists")
+    index.add_article("b", "Python typing", "Protocols and generics")
+    index.add_article("c", "Rust packaging", "Cargo and crates")
+    return index
+
+def test_intersect_sorted_postings():
+    """Test intersection of ascending posting lists"""
+    assert intersect(array("I", [1, 3, 5, 7]), array("I", [2, 3, 4, 7, 9])) == array("I", [3, 7])
+    assert intersect(array("I", []), array("I", [1, 2])) == array("I")
+
+def test_and_query_with_prefixes(index):
+    """Test every term must match, each as a token prefix"""
+    assert index.search("python") == ["b", "a"]
+    assert index.search("python pack") == ["a"]
+    assert index.search("packag") == ["c", "a"]
+    assert index.search("python crates") == []
+
+def test_update_and_delete(index):
+    """Test rewritten articles move to the front and deleted ones disappear"""
+    index.add_article("a", "Python packaging", "Now with pyproject")
+    assert index.search("wheels") == []
+    assert index.search("python") == ["a", "b"]
+
+    index.remove_article("b")
+    assert index.search("python") == ["a"]
+    assert len(index) == 2
+
+def test_compaction_keeps_results(index):
+    """Test tombstone compaction renumbers docs without changing results"""
+    for _ in range(5):
+        index.add_article("b", "Python typing", "Protocols and generics")
+    assert index._tombstones <= len(index._article_ids) * COMPACT_RATIO
+    assert index.search("python") == ["b", "a"]
+    assert index.search("generics") == ["b"]
+
+def test_skip_and_limit(index):
+    """Test paging over the matched ids"""
+    assert index.search("and", skip=1, limit=1) == ["b"]
+    assert index.search("and", skip=3) == []
+
+def test_unloaded_index_ignores_writes():
+    """Test write hooks are no-ops until the index is loaded"""
+    index = InvertedIndex()
+    index.add_article("a", "Title", "Body")
+    assert len(index) == 0
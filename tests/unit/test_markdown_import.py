@@ -0,0 +1,102 @@
+from datetime import datetime
+from sqlalchemy import insert
+from backend.database.export import article_markdown
+from backend.database.markdown_import import split_front_matter, parse_markdown_file, import_markdown_tree, _simple_front_matter
+from backend.database.models import Article, Category
+from backend.search import fts
+
+def test_split_front_matter():
+    """Test front-matter is parsed and removed from the body"""
+    meta, body = split_front_matter('---\ntitle: "A: B"\ntags: [x, y]\n---\n# Body\n')
+    assert meta == {"title": "A: B", "tags": ["x", "y"]}
+    assert body == "# Body\n"
+    assert split_front_matter("# No front-matter\n") == ({}, "# No front-matter\n")
+
+def test_simple_front_matter_fallback():
+    """Test the fallback parser reads JSON values, flow lists and block lists"""
+    assert _simple_front_matter('title: "Quoted"\nversion: 3\ntags:\n  - one\n  - two\ncategories: [a, b]') == {
+        "title": "Quoted", "version": 3, "tags": ["one", "two"], "categories": ["a", "b"]
+    }
+
+def test_parse_markdown_file_reads_exported_articles(tmp_path):
+    """Test a file written by the zip export parses back to the same article"""
+    article = {
+        "id": "exported-id", "title": "Round trip", "content": "# Round trip\n\nBody text.",
+        "tags": ["alpha", "beta"], "categories": ["cat-1"], "version": 4,
+        "created_at": datetime(2024, 1, 2, 3, 4, 5), "updated_at": datetime(2024, 2, 3, 4, 5, 6),
+    }
+    path = tmp_path / "guides" / "round-trip.md"
+    path.parent.mkdir()
+    path.write_text(article_markdown(article, {"cat-1": "Guides"}))
+
+    parsed = parse_markdown_file(str(path), str(tmp_path))
+    assert parsed["id"] == "exported-id"
+    assert parsed["title"] == "Round trip"
+    assert parsed["content"] == article["content"]
+    assert parsed["tags"] == ["alpha", "beta"]
+    assert parsed["categories"] == ["Guides"]
+    assert parsed["directories"] == ("guides",)
+    assert parsed["version"] == 4
+    assert parsed["created_at"] == article["created_at"]
+    assert parsed["updated_at"] == article["updated_at"]
+
+def test_parse_markdown_file_without_front_matter(tmp_path):
+    """Test the title falls back to the first heading, then the file name"""
+    (tmp_path / "with-heading.md").write_text("Intro\n\n# The Heading\n\nText")
+    (tmp_path / "plain_notes.md").write_text("Just text")
+    assert parse_markdown_file(str(tmp_path / "with-heading.md"), str(tmp_path))["title"] == "The Heading"
+    parsed = parse_markdown_file(str(tmp_path / "plain_notes.md"), str(tmp_path))
+    assert parsed["title"] == "plain notes"
+    assert parsed["id"] is None and parsed["tags"] == [] and parsed["directories"] == ()
+
+def test_import_markdown_tree(tmp_path, test_db, client, count_queries):
+    """Test a directory tree imports in parallel with nested categories and searchable content"""
+    (tmp_path / "Glimbrook" / "burrows").mkdir(parents=True)
+    (tmp_path / "Glimbrook" / "burrows" / "deep.md").write_text("---\ntags: [glimbrook]\n---\n# Deep burrows\n\nzorblewick tunnels")
+    (tmp_path / "Glimbrook" / "intro.md").write_text("# Glimbrook intro\n\nzorblewick smiles")
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / ".hidden" / "skip.md").write_text("# Hidden")
+    (tmp_path / "notes.txt").write_text("not markdown")
+
+    with count_queries() as statements:
+        stats = import_markdown_tree(test_db, str(tmp_path), workers=2, batch_size=1)
+    assert stats["files"] == 2 and stats["imported"] == 2 and stats["errors"] == []
+    # Each FTS index is rebuilt once, when the suspended triggers are restored
+    rebuilds = [statement for statement in statements if "'rebuild'" in statement]
+    assert rebuilds and len(rebuilds) == len(set(rebuilds))
+    assert stats["files_per_second"] > 0
+
+    parent = test_db.query(Category).filter(Category.name == "Glimbrook").one()
+    child = test_db.query(Category).filter(Category.name == "burrows").one()
+    assert child.parent_id == parent.id
+    deep = test_db.query(Article).filter(Article.title == "Deep burrows").one()
+    assert [category.id for category in deep.categories] == [child.id]
+    assert deep.excerpt.startswith("# Deep burrows")
+    assert len(deep.history) == 1
+
+    hits = client.get("/api/v1/search/articles", params={"q": "zorblewick"}).json()
+    assert {hit["title"] for hit in hits} == {"Deep burrows", "Glimbrook intro"}
+
+    # Files carrying an existing article id are skipped on re-import
+    again = tmp_path / "again"
+    again.mkdir()
+    (again / "again.md").write_text(f'---\nid: "{deep.id}"\n---\nchanged')
+    stats = import_markdown_tree(test_db, str(again), workers=0)
+    assert stats["imported"] == 0 and stats["skipped"] == 1
+    assert test_db.get(Article, deep.id).content == "# Deep burrows\n\nzorblewick tunnels"
+
+def test_interrupted_import_is_reindexed_on_startup(test_db, client):
+    """Test rows written while an import had the FTS trigger suspended become searchable at the next startup"""
+    connection = test_db.connection()
+    connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts.FTS_TABLE}_ai")
+    connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts.TRIGRAM_TABLE}_ai")
+    # The import dies after writing a batch, before restoring the trigger
+    test_db.execute(insert(Article), [{"id": "interrupted-import", "title": "Crumblenook", "content": "snorkelwump burrows", "version": 1}])
+    test_db.commit()
+    assert fts.search_ranked(test_db, "snorkelwump") == []
+
+    fts.create_fts_index(None, test_db.connection())
+    test_db.commit()
+    assert fts.insert_trigger_exists(test_db.connection())
+    assert [article_id for article_id, _ in fts.search_ranked(test_db, "snorkelwump")] == ["interrupted-import"]
+    assert [article_id for article_id, _ in fts.search_substring_ranked(test_db, "orkelwu")] == ["interrupted-import"]
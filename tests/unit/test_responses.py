@@ -0,0 +1,31 @@
+import json
+from datetime import datetime
+from backend.utils import responses
+from backend.utils.responses import FastJSONResponse
+
+ROW = {
+    "id": "a1",
+    "title": "Ünïcode title",
+    "tags": ["x"],
+    "created_at": datetime(2024, 5, 1, 12, 30, 0, 123000),
+    "highlights": [(0, 3)],
+    "categories": None,
+}
+
+def test_fast_json_response_encodes_rows():
+    """Test rows with datetimes and tuples encode like FastAPI's own encoder"""
+    body = json.loads(FastJSONResponse(ROW).body)
+    assert body == {
+        "id": "a1",
+        "title": "Ünïcode title",
+        "tags": ["x"],
+        "created_at": "2024-05-01T12:30:00.123000",
+        "highlights": [[0, 3]],
+        "categories": None,
+    }
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    """Test the stdlib fallback produces the same document when orjson is missing"""
+    fast = responses.dumps(ROW)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(responses.dumps(ROW)) == json.loads(fast)
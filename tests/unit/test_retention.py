@@ -0,0 +1,44 @@
+import asyncio
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+from backend.database.retention import RetentionPolicy, RetentionJob
+
+Row = namedtuple("Row", "id created_at")
+
+def test_retention_policy_buckets():
+    """Test versions are kept in full for a week, then daily, then weekly"""
+    now = datetime(2024, 6, 30, 12, 0)
+    policy = RetentionPolicy(keep_all_days=7, daily_days=90)
+    assert policy.bucket(now - timedelta(days=6), now) is None
+    assert policy.bucket(now - timedelta(days=10), now) == ("day", "2024-06-20")
+    assert policy.bucket(now - timedelta(days=100), now)[0] == "week"
+
+def test_retention_policy_keeps_newest_per_bucket():
+    """Test only the newest version of each day or week survives, plus recent and latest versions"""
+    now = datetime(2024, 6, 30, 12, 0)
+    rows = [
+        Row("week-a", datetime(2024, 1, 2, 9)), Row("week-b", datetime(2024, 1, 3, 9)),
+        Row("day-a", datetime(2024, 6, 10, 8)), Row("day-b", datetime(2024, 6, 10, 17)),
+        Row("other-day", datetime(2024, 6, 11, 8)),
+        Row("recent-a", datetime(2024, 6, 28, 8)), Row("recent-b", datetime(2024, 6, 28, 9)),
+    ]
+    policy = RetentionPolicy(keep_all_days=7, daily_days=90)
+    assert policy.kept_ids(rows, now) == {"week-b", "day-b", "other-day", "recent-a", "recent-b"}
+    # The newest row is kept even when it has expired
+    assert policy.kept_ids(rows[:2], now) == {"week-b"}
+
+def test_retention_job_runs_off_the_event_loop(test_engine):
+    """Test the job runs a pass in a worker thread and stops cleanly"""
+    job = RetentionJob(sessionmaker(bind=test_engine), RetentionPolicy(), startup_delay_seconds=0)
+
+    async def scenario():
+        job.start()
+        for _ in range(200):
+            if job.last_run is not None:
+                break
+            await asyncio.sleep(0.01)
+        await job.stop()
+
+    asyncio.run(scenario())
+    assert job.last_run is not None and "rows_deleted" in job.last_run
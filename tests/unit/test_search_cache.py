@@ -0,0 +1,44 @@
+import pytest
+from backend.search.cache import ContentGeneration, SearchCache
+
+@pytest.fixture
+def generation():
+    return ContentGeneration()
+
+def test_hits_and_misses(generation):
+    """Test repeated keys are served from the cache and counted"""
+    cache = SearchCache(max_size=10, generation=generation)
+    calls = []
+    compute = lambda: calls.append(1) or ["a"]
+
+    assert cache.get_or_compute("k", compute) == ["a"]
+    assert cache.get_or_compute("k", compute) == ["a"]
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_generation_bump_invalidates(generation):
+    """Test a content write makes every cached result stale"""
+    cache = SearchCache(max_size=10, generation=generation)
+    cache.get_or_compute("k", lambda: ["old"])
+    generation.bump()
+    assert cache.get_or_compute("k", lambda: ["new"]) == ["new"]
+
+def test_lru_eviction(generation):
+    """Test the least recently used entry is evicted first"""
+    cache = SearchCache(max_size=2, generation=generation)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("c", lambda: 3)
+    assert cache.get_or_compute("a", lambda: "recomputed") == 1
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+def test_ttl_expiry(generation, monkeypatch):
+    """Test entries expire after the TTL"""
+    now = [1000.0]
+    monkeypatch.setattr("backend.search.cache.time.monotonic", lambda: now[0])
+    cache = SearchCache(max_size=10, ttl_seconds=5, generation=generation)
+    cache.get_or_compute("k", lambda: "old")
+    now[0] += 6
+    assert cache.get_or_compute("k", lambda: "new") == "new"
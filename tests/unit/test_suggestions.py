@@ -0,0 +1,31 @@
+import pytest
+from backend.search.suggestions import TitleIndex
+
+@pytest.fixture
+def index():
+    index = TitleIndex()
+    index.loaded = True
+    index.set_title("a", "Getting Started Guide")
+    index.set_title("b", "Docker Guide")
+    index.set_title("c", "Guides and Tutorials")
+    return index
+
+def test_title_prefix_ranks_before_word_prefix(index):
+    """Test titles starting with the prefix come before inner-word matches"""
+    assert [article_id for article_id, _ in index.suggest("guide")] == ["c", "a", "b"]
+    assert index.suggest("Started  g") == [("a", "Getting Started Guide")]
+    assert index.suggest("guide", limit=1) == [("c", "Guides and Tutorials")]
+
+def test_title_changes_stay_in_sync(index):
+    """Test renamed and removed articles update the suggestions"""
+    index.set_title("b", "Kubernetes Handbook")
+    assert index.suggest("docker") == []
+    assert index.suggest("hand") == [("b", "Kubernetes Handbook")]
+
+    index.remove("b")
+    assert index.suggest("kube") == []
+    assert len(index) == 2
+
+def test_empty_prefix(index):
+    """Test whitespace-only prefixes return nothing"""
+    assert index.suggest("   ") == []
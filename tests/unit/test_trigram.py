@@ -0,0 +1,42 @@
+from itertools import product
+import pytest
+from backend.search.trigram import TrigramIndex, trigrams
+
+@pytest.fixture
+def index():
+    index = TrigramIndex()
+    index.loaded = True
+    index.add_text("Kookaburra laughing calls", "The laughing kookaburra is a kingfisher")
+    return index
+
+def test_trigrams_are_padded():
+    """Test short terms still produce start-anchored trigrams"""
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+
+def test_similar_ranks_by_overlap(index):
+    """Test misspellings resolve to the closest vocabulary term"""
+    assert index.similar("kookabura")[0][0] == "kookaburra"
+    assert index.similar("lauhging")[0][0] == "laughing"
+    assert index.similar("zzzz") == []
+
+def test_query_variants_keep_typed_terms_first(index):
+    """Test variants are scored by the product of term similarities"""
+    variants = index.query_variants("laughing kookabura")
+    assert variants[0] == ("laughing kookabura", 1.0)
+    assert variants[1][0] == "laughing kookaburra"
+    assert all(a[1] >= b[1] for a, b in zip(variants, variants[1:]))
+
+def test_query_variants_stay_bounded_for_long_queries(index):
+    """Test long typo'd queries keep the best variants without enumerating every combination"""
+    index.add_text(" ".join(f"wallaby{a}{b}" for a in "abcdefghijkl" for b in "xyz"))
+    # Four candidates for each of twelve terms: 16 million combinations
+    query = " ".join(f"walaby{a}x" for a in "abcdefghijkl")
+    assert all(len(index.similar(term)) == 3 for term in query.split())
+    variants = index.query_variants(query, max_variants=5)
+    assert len(variants) == 5
+    assert variants[0] == (query, 1.0)
+
+    # Same best variants as scoring every combination of a short query
+    choices = [[(term, 1.0)] + [c for c in index.similar(term) if c[0] != term][:3] for term in ("lauhging", "kookabura")]
+    scored = sorted(((f"{a[0]} {b[0]}", a[1] * b[1]) for a, b in product(*choices)), key=lambda item: -item[1])
+    assert index.query_variants("lauhging kookabura") == scored[:5]